@@ -0,0 +1,61 @@
+"""
+Compare the aggregations of numpy-backed data by xarray and by the numba
+kernels of ``xrviz.kernels``.
+
+    python benchmarks/reductions.py [--size N] [--repeat R]
+
+prints the best time of each, in seconds, for an array of about ``N``
+float32 values of shape (time, level, y, x) aggregated along each of
+``DIMS``: the leading dimension, and middle ones. Aggregations along the
+last dimension are left to xarray (see ``xrviz.kernels.applies``).
+"""
+import argparse
+import time
+import numpy as np
+import xarray as xr
+from xrviz import kernels
+from xrviz.reductions import aggregate
+
+DIMS = ['time', 'level', 'y']
+
+
+def best_time(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', type=int, default=2 ** 25)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    ny, nx, levels = 256, 256, 8
+    times = max(1, args.size // (ny * nx * levels))
+    values = np.random.RandomState(0).normal(
+        size=(times, levels, ny, nx)).astype('float32')
+    values[:, :, :10] = np.nan
+    data = xr.DataArray(values, dims=['time', 'level', 'y', 'x'])
+
+    print(f"shape {data.shape}, {data.nbytes / 2 ** 20:.0f} MiB")
+    print(f"{'dimension':<10}{'aggregation':<12}{'xarray':>10}"
+          f"{'kernels':>10}{'speed-up':>10}")
+    for dim in DIMS:
+        for agg in kernels.AGGREGATIONS:
+            kernels.KERNEL_SIZE = None
+            reference = best_time(lambda: aggregate(data, {dim: agg}),
+                                  args.repeat)
+            kernels.KERNEL_SIZE = 0
+            aggregate(data, {dim: agg})  # compile
+            kernel = best_time(lambda: aggregate(data, {dim: agg}),
+                               args.repeat)
+            print(f"{dim:<10}{agg:<12}{reference:>10.3f}{kernel:>10.3f}"
+                  f"{reference / kernel:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
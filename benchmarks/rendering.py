@@ -0,0 +1,60 @@
+"""
+Compare plotting evenly spaced data as a QuadMesh and as an Image.
+
+    python benchmarks/rendering.py [--size N] [--repeat R] [--rasterize]
+
+prints the best time of each, in seconds, to build the plot of a frame of
+about ``N`` float32 values with hvplot and render it with bokeh, and the
+size of the rendered figure, as sent to the browser.
+"""
+import argparse
+import json
+import time
+import numpy as np
+import xarray as xr
+import holoviews as hv
+import hvplot.xarray  # noqa: F401
+from bokeh.embed import json_item
+
+
+def best_time(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def render(data, plot, rasterize):
+    graph = getattr(data.hvplot, plot)(x='x', y='y', rasterize=rasterize)
+    return hv.render(graph, backend='bokeh')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', type=int, default=2 ** 20)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--rasterize', action='store_true')
+    args = parser.parse_args()
+
+    ny = max(2, int(np.sqrt(args.size / 2)))
+    nx = max(2, args.size // ny)
+    values = np.random.RandomState(0).normal(size=(ny, nx)).astype('float32')
+    data = xr.DataArray(values, dims=['y', 'x'], name='temp',
+                        coords={'y': np.linspace(-90., 90., ny),
+                                'x': np.linspace(-180., 180., nx)})
+
+    print(f"shape {data.shape}, {data.nbytes / 2 ** 20:.0f} MiB")
+    print(f"{'plot':<10}{'time':>10}{'MiB':>10}")
+    times = {}
+    for plot in ['quadmesh', 'image']:
+        times[plot] = best_time(lambda: render(data, plot, args.rasterize),
+                                args.repeat)
+        size = len(json.dumps(json_item(render(data, plot, args.rasterize))))
+        print(f"{plot:<10}{times[plot]:>10.3f}{size / 2 ** 20:>10.1f}")
+    print(f"speed-up {times['quadmesh'] / times['image']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+import panel as pn
+from .sigslot import SigSlot
+from .climatology import CLIMATOLOGIES
+from .difference import SECOND_DATASET
+
+#  Option of the ``Analysis`` pane to correlate with the series tapped.
+TAPPED_SERIES = 'tapped series'
+
+TEXT = """
+Plot values derived from the selected variable. For more information, please
+refer to the [documentation](https://xrviz.readthedocs.io/en/latest/interface.html#analysis).
+"""
+
+
+class Analysis(SigSlot):
+    """
+    A pane to choose what is plotted from the values of the selected variable.
+
+    The following options are available in this pane:
+
+        1. ``mode`` (default `values`):
+            - ``values``: the values of the variable are plotted.
+            - ``anomaly``: the values minus their climatology, i.e. the mean
+              of the values for the same day of the year or month over the
+              reference period. Only for variables with a datetime dimension.
+            - ``difference``: the values minus those of a reference, set by
+              ``difference along``.
+            - ``correlation``: the Pearson correlation along the dimension
+              selected in ``extract along`` (in the ``Axes`` pane), with
+              ``correlate with``.
+        2. ``climatology`` (default `day-of-year`):
+            Whether the climatology is the mean for each ``day-of-year``, or
+            for each month (``monthly``).
+        3. ``reference start`` and ``reference end``:
+            Dates bounding the reference period of the climatology, e.g.
+            ``1991-01-01``. All times are used when left empty.
+        4. ``difference along``:
+            A dimension of the variable, to subtract the values at
+            ``subtracted value`` along it from those of every frame, e.g.
+            a time step or a forecast run. Or ``second dataset``, to subtract
+            the same variable of the dataset given as ``reference`` to the
+            ``Dashboard``, on the grid of the data.
+        5. ``subtracted value``:
+            The value along ``difference along`` of the reference frame.
+        6. ``correlate with`` (default `tapped series`):
+            Another variable, whose correlation with the selected variable
+            is plotted. Or ``tapped series``: the values are plotted, and
+            tapping the graph maps the correlation of the series extracted
+            there with the values at every other point, below the series.
+
+    The climatology is computed once per variable and reference period, and
+    cached on disk (see ``xrviz.climatology.CACHE_DIR``) when the data was
+    read from a file. Reference frames and grids aligned with the second
+    dataset are computed once per variable, and correlations once per
+    variable or tap.
+
+    Parameters
+    ----------
+    data: xarray.Dataset
+        The data plotted.
+    reference: xarray.Dataset
+        A second dataset, to plot differences with.
+    """
+
+    def __init__(self, data, reference=None):
+        super().__init__()
+        self.data = data
+        self.reference = reference
+        self.mode = pn.widgets.Select(
+            name='mode', value='values',
+            options=['values', 'anomaly', 'difference', 'correlation'])
+        self.climatology = pn.widgets.Select(name='climatology',
+                                             value='day-of-year',
+                                             options=list(CLIMATOLOGIES))
+        self.reference_start = pn.widgets.TextInput(name='reference start',
+                                                    width=140)
+        self.reference_end = pn.widgets.TextInput(name='reference end',
+                                                  width=140)
+        self.difference_along = pn.widgets.Select(name='difference along',
+                                                  options=[])
+        self.subtracted_value = pn.widgets.Select(name='subtracted value',
+                                                  options=[])
+        self.correlate_with = pn.widgets.Select(name='correlate with',
+                                                options=[TAPPED_SERIES])
+
+        for widget in [self.mode, self.climatology, self.reference_start,
+                       self.reference_end, self.difference_along,
+                       self.subtracted_value, self.correlate_with]:
+            self._register(widget, 'values_changed')
+        self.connect('values_changed', self.set_subtracted_values)
+        self._subtracted_along = object()  # none yet
+
+        self.panel = pn.Column(
+            pn.pane.Markdown(TEXT, margin=(0, 10)),
+            pn.Row(self.mode, self.climatology),
+            pn.Row(self.reference_start, self.reference_end),
+            pn.Row(self.difference_along, self.subtracted_value),
+            pn.Row(self.correlate_with),
+            name='Analysis'
+        )
+
+    def setup(self, var):
+        """
+        List the references available for the selected variable.
+        """
+        self.var = var
+        options = []
+        if var is not None:
+            options = [dim for dim in self.data[var].dims
+                       if dim in self.data.coords]
+            if self.reference is not None and var in self.reference:
+                options.append(SECOND_DATASET)
+        self._subtracted_along = object()  # values of another variable
+        self.difference_along.options = options
+        if options:
+            self.difference_along.value = options[0]
+        self.set_subtracted_values()
+        self.correlate_with.options = [TAPPED_SERIES] + [
+            name for name, other in self.data.data_vars.items()
+            if name != var and other.ndim > 0]
+
+    def set_subtracted_values(self, *args):
+        along = self.difference_along.value
+        if along == self._subtracted_along:
+            return  # another widget changed
+        self._subtracted_along = along
+        if along is None or along == SECOND_DATASET:
+            self.subtracted_value.options = []
+            self.subtracted_value.disabled = True
+        else:
+            self.subtracted_value.options = list(self.data[along].values)
+            self.subtracted_value.disabled = False
+
+    def set_coords(self, data):
+        self.data = data
+
+    def setup_initial_values(self, init_params={}):
+        """
+        To select initial values for the widgets in this pane.
+        """
+        for row in self.panel[1:]:
+            for widget in row:
+                if widget.name in init_params:
+                    widget.value = init_params[widget.name]
+
+    @property
+    def kwargs(self):
+        out = {widget.name: widget.value
+               for row in self.panel[1:] for widget in row}
+        return out
@@ -0,0 +1,150 @@
+import threading
+import time
+import dask
+from dask.callbacks import Callback
+from .sigslot import SigSlot
+from .compatibility import has_distributed
+
+KINDS = ['threads', 'processes', 'distributed']
+
+#  Seconds between updates of the status of ``distributed`` backends, whose
+#  computations emit no ``computed`` signal.
+STATUS_PERIOD = 2.
+
+
+class _Utilisation(Callback):
+    """
+    Measures how busy the workers of a local scheduler were, for the
+    computations of each thread.
+    """
+    def __init__(self, backend):
+        super().__init__()
+        self.backend = backend
+        # callbacks are global: the graph, warm-up and limits threads may
+        # compute at once, each with its own state
+        self._states = {}
+
+    def _start(self, dsk):
+        # computations may be nested, e.g. within a dask task
+        state = self._states.setdefault(threading.get_ident(), {'depth': 0})
+        if state['depth'] == 0:
+            state.update(wall=time.perf_counter(), busy=0., started={})
+        state['depth'] += 1
+
+    def _pretask(self, key, dsk, state):
+        started = self._states[threading.get_ident()]['started']
+        started[key] = time.perf_counter()
+
+    def _posttask(self, key, result, dsk, state, id):
+        own = self._states[threading.get_ident()]
+        own['busy'] += time.perf_counter() - own['started'].pop(
+            key, time.perf_counter())
+
+    def _finish(self, dsk, state, errored):
+        own = self._states[threading.get_ident()]
+        own['depth'] -= 1
+        if own['depth'] == 0:
+            del self._states[threading.get_ident()]
+            wall = time.perf_counter() - own['wall']
+            if wall > 0:
+                self.backend._computed(
+                    own['busy'] / (wall * self.backend.n_workers))
+
+
+class Backend(SigSlot):
+    """
+    Where the dask computations of the dashboard run.
+
+    Parameters
+    ----------
+    kind: str
+        One of
+
+            - ``threads``: dask's threaded scheduler.
+            - ``processes``: dask's multiprocessing scheduler, which avoids
+              the GIL for pure-python parts of the computations.
+            - ``distributed``: a local ``dask.distributed`` cluster of
+              single-threaded worker processes.
+    n_workers: int
+        Number of threads, processes or workers. By default, the number
+        of CPUs.
+    memory_limit: str or int
+        Memory limit of each worker, for ``distributed`` only, e.g. ``'2GB'``.
+
+    Attributes
+    ----------
+    client:
+        The ``dask.distributed.Client``, for ``distributed`` only.
+    utilisation:
+        Fraction of the time the workers were busy during the last
+        computation, for local schedulers; CPU use of the workers for
+        ``distributed``.
+
+    The anonymous signal ``computed`` is emitted after each computation on
+    a local scheduler. The status of ``distributed`` backends is polled
+    every ``STATUS_PERIOD`` seconds instead.
+    """
+
+    def __init__(self, kind='threads', n_workers=None, memory_limit=None):
+        super().__init__()
+        if kind not in KINDS:
+            raise ValueError(f"Backend should be one of {KINDS}, not {kind}")
+        self.kind = kind
+        self.n_workers = n_workers or dask.system.CPU_COUNT
+        self.memory_limit = memory_limit
+        self.utilisation = None
+        self.client = None
+        self._callback = None
+        self._register(None, 'computed')
+        if kind == 'distributed':
+            if not has_distributed:
+                raise ImportError("The distributed backend requires "
+                                  "dask.distributed to be installed.")
+            from dask.distributed import Client, LocalCluster
+            cluster = LocalCluster(n_workers=self.n_workers,
+                                   threads_per_worker=1,
+                                   memory_limit=memory_limit or 'auto')
+            self.client = Client(cluster, set_as_default=False)
+
+    def activate(self):
+        """Use this backend for all dask computations of this process"""
+        if self.client is not None:
+            dask.config.set(scheduler=self.client)
+        else:
+            dask.config.set(scheduler=self.kind, num_workers=self.n_workers)
+            if self._callback is None:
+                self._callback = _Utilisation(self)
+                self._callback.register()
+
+    def close(self):
+        """Stop using this backend, and shut down the cluster if any"""
+        if self._callback is not None:
+            self._callback.unregister()
+            self._callback = None
+        dask.config.set(scheduler=None, num_workers=None)
+        if self.client is not None:
+            self.client.cluster.close()
+            self.client.close()
+            self.client = None
+
+    def _computed(self, utilisation):
+        self.utilisation = utilisation
+        self._emit('computed', utilisation)
+
+    def status(self):
+        """Kind, number of workers and utilisation of the backend"""
+        workers = self.n_workers
+        if self.client is not None:
+            info = self.client.scheduler_info()['workers'].values()
+            workers = len(info)
+            cpu = [w.get('metrics', {}).get('cpu', 0) for w in info]
+            self.utilisation = sum(cpu) / 100. / len(cpu) if cpu else None
+        return {'kind': self.kind, 'workers': workers,
+                'utilisation': self.utilisation}
+
+    def describe(self):
+        status = self.status()
+        text = f"{status['kind']}: {status['workers']} workers"
+        if status['utilisation'] is not None:
+            text += f", {status['utilisation']:.0%} busy"
+        return text
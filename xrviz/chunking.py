@@ -0,0 +1,62 @@
+import numpy as np
+
+#  Size of the chunks aimed at along dimensions which are neither plotted
+#  nor animated, in bytes.
+TARGET_BYTES = 64 * 2 ** 20
+
+
+def disk_chunks(var):
+    """
+    Chunk sizes of a variable in its file, by dimension.
+
+    Read from the encoding set by the netCDF4/h5netcdf (``chunksizes``) or
+    zarr (``chunks``) backends. Empty if the variable is contiguous or
+    not read from a file.
+    """
+    sizes = var.encoding.get('chunksizes') or var.encoding.get('chunks')
+    if not sizes or len(sizes) != var.ndim:
+        return {}
+    return dict(zip(var.dims, sizes))
+
+
+def auto_chunks(var, spatial=None, animate=(), target_bytes=TARGET_BYTES):
+    """
+    Choose dask chunks for a variable, from the way it is plotted.
+
+    Lazy operations on the chunked variable, e.g. anomalies, differences
+    and derived variables, are then applied chunk by chunk, so that showing
+    a frame computes only that frame.
+
+    Parameters
+    ----------
+    var: xarray.DataArray
+    spatial: iterable
+        Dimensions of the plotted ``x`` and ``y``, which are not split, so
+        that a frame is one chunk. By default, the last two dimensions.
+    animate: iterable
+        Dimensions selected or animated, which get chunks of size 1, so that
+        showing a frame reads only that frame.
+    target_bytes: int
+        Size aimed at for chunks, along the remaining dimensions. Their
+        chunks are multiples of the chunks on disk, where known.
+
+    Returns
+    -------
+    dict of chunk size by dimension
+    """
+    spatial = set(var.dims[-2:] if spatial is None else spatial)
+    on_disk = disk_chunks(var)
+    chunks = {dim: var.sizes[dim] if dim in spatial else 1
+              for dim in var.dims}
+    frame_bytes = var.dtype.itemsize * int(np.prod(list(chunks.values())))
+    # share what is left of the target between the other dimensions
+    others = [dim for dim in var.dims
+              if dim not in spatial and dim not in animate]
+    if not others:
+        return chunks
+    per_dim = max(1., target_bytes / frame_bytes) ** (1. / len(others))
+    for dim in others:
+        base = on_disk.get(dim, 1)
+        size = max(base, int(per_dim) // base * base)
+        chunks[dim] = min(size, var.sizes[dim])
+    return chunks
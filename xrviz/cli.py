@@ -1,17 +1,85 @@
+import argparse
+import json
 import sys
+from .backend import KINDS, Backend
 
-def main():
-    usage = "Usage: `xrviz show datafile/url`"
-    if len(sys.argv) ==3 and 'show' == sys.argv[1]:
+
+def parse_chunks(value):
+    """``auto``, or dask chunks given as JSON, e.g. ``{"time": 1}``"""
+    return value if value == 'auto' else json.loads(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='xrviz', description='Interactive visualisations for xarrays')
+    commands = parser.add_subparsers(dest='command')
+
+    show = commands.add_parser('show', help='display the interface for a '
+                                            'datafile/url')
+    show.add_argument('path', help='datafile/url')
+    show.add_argument('--chunks', type=parse_chunks, default=None,
+                      help="'auto' to chunk variables for the plotted axes, "
+                           "or dask chunks as JSON, e.g. '{\"time\": 1}'")
+    show.add_argument('--backend', choices=KINDS, default=None,
+                      help='where dask computations run')
+    show.add_argument('--workers', type=int, default=None,
+                      help='number of threads, processes or workers')
+    show.add_argument('--memory-limit', default=None,
+                      help="memory limit per worker of the distributed "
+                           "backend, e.g. '2GB'")
+
+    show.add_argument('--stats', action='store_true',
+                      help='read colormap limits from the statistics index '
+                           'written by `xrviz index`, if up to date')
+
+    index = commands.add_parser('index', help='compute statistics of the '
+                                              'variables of a datafile, for '
+                                              '`xrviz show --stats`')
+    index.add_argument('path', help='datafile')
+    index.add_argument('--output', default=None,
+                       help='index file, by default next to the datafile')
+    index.add_argument('--backend', choices=KINDS, default=None,
+                       help='where dask computations run')
+    index.add_argument('--workers', type=int, default=None,
+                       help='number of threads, processes or workers')
+
+    args = parser.parse_args(argv)
+    if args.command == 'show':
         import xarray as xr
         from .dashboard import Dashboard
 
         try:
-            data = xr.open_dataset(sys.argv[2])
+            data = xr.open_dataset(args.path)
         except:
-            print("Unable to open the datafile/url.", usage)
+            print("Unable to open the datafile/url.", show.format_usage())
             sys.exit()
-        dash = Dashboard(data)
+        backend = None
+        if args.backend:
+            backend = Backend(args.backend, n_workers=args.workers,
+                              memory_limit=args.memory_limit)
+        dash = Dashboard(data, chunks=args.chunks, backend=backend,
+                         stats_index=args.stats or None)
         dash.show()
+    elif args.command == 'index':
+        import xarray as xr
+        from .stats_index import build_index, index_path, write_index
+
+        try:
+            data = xr.open_dataset(args.path)
+        except:
+            print("Unable to open the datafile.", index.format_usage())
+            sys.exit()
+        backend = None
+        if args.backend:
+            backend = Backend(args.backend, n_workers=args.workers)
+            backend.activate()
+        try:
+            stats = build_index(data, args.path)
+        finally:
+            if backend is not None:
+                backend.close()
+        output = args.output or index_path(args.path)
+        write_index(stats, output)
+        print(f"Indexed {len(stats.variables)} variables in {output}")
     else:
-        print(usage)
+        parser.print_usage()
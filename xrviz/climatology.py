@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import dask
+import dask.array
+import numpy as np
+import pandas as pd
+import xarray as xr
+from .reductions import group_codes, group_mean
+from .compatibility import logger
+
+#  Where climatologies of variables read from files are cached.
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'xrviz')
+
+#  Climatologies available, by the attribute of times grouped by.
+CLIMATOLOGIES = {'day-of-year': 'dayofyear', 'monthly': 'month'}
+
+
+def time_dim(data):
+    """The first datetime dimension of ``data``, or None"""
+    for dim in data.dims:
+        if dim in data.coords and data[dim].dtype.kind == 'M':
+            return dim
+    return None
+
+
+def _cache_path(data, dim, freq, start, end, source, cache_dir):
+    """
+    File caching a climatology, named after the inputs it depends on,
+    including the expression of derived variables (see
+    ``xrviz.expressions.evaluate``) and the index values of ``data``, which
+    tell subsets of the same variable apart.
+    """
+    stat = os.stat(source)
+    key = json.dumps([os.path.abspath(source), stat.st_size, stat.st_mtime,
+                      data.name, data.attrs.get('expression'),
+                      str(data.dtype), list(data.dims), list(data.shape),
+                      dim, freq, start, end])
+    sha = hashlib.sha1(key.encode())
+    for d in data.dims:
+        if d in data.indexes:
+            sha.update(pd.util.hash_pandas_object(
+                data.indexes[d], index=False).values.tobytes())
+    return os.path.join(cache_dir, f'climatology-{sha.hexdigest()}.npz')
+
+
+def climatology(data, dim, freq, start=None, end=None, source=None,
+                cache_dir=CACHE_DIR):
+    """
+    Mean of ``data`` for each day of the year or month, over the reference
+    period from ``start`` to ``end`` along the time dimension ``dim``.
+
+    The means are computed in one pass over the data, in parallel over the
+    chunks of dask data (see ``xrviz.reductions.group_mean``).
+
+    Parameters
+    ----------
+    data: xarray.DataArray
+    dim: str
+        A datetime dimension of ``data``.
+    freq: str
+        One of the values of ``CLIMATOLOGIES``.
+    start, end: str
+        Dates bounding the reference period, if any.
+    source: str
+        File ``data`` was read from. If given, the climatology is cached in
+        ``cache_dir``, and read from there while the file is unchanged.
+
+    Returns
+    -------
+    xarray.DataArray, with ``dim`` replaced by ``freq``
+    """
+    reference = data.sel({dim: slice(start or None, end or None)})
+    path = None
+    if source is not None and cache_dir is not None:
+        path = _cache_path(reference, dim, freq, start, end, source,
+                           cache_dir)
+    if path is not None and os.path.exists(path):
+        with np.load(path) as cached:
+            values, labels = cached['values'], cached['labels']
+    else:
+        codes, labels = group_codes(reference.get_index(dim), freq)
+        values = group_mean(reference.data, reference.get_axis_num(dim),
+                            codes, len(labels))
+        values, = dask.compute(values)
+        labels = np.asarray(labels)
+        if path is not None:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                np.savez(path, values=values, labels=labels)
+            except OSError as e:
+                logger.warning(f"Cannot cache the climatology: {e}")
+    coords = {name: coord for name, coord in data.coords.items()
+              if dim not in coord.dims}
+    coords[freq] = labels
+    return xr.DataArray(values, coords=coords, name=data.name,
+                        dims=[freq if d == dim else d for d in data.dims])
+
+
+def anomalies(data, clim, dim, lazy=True):
+    """
+    Subtract ``clim`` from ``data``, matching each time along ``dim`` with
+    its day of the year or month.
+
+    With ``lazy``, the result is a dask array, with one chunk per time if
+    ``data`` is not a dask array already (see
+    ``xrviz.chunking.auto_chunks``). ``clim`` must have the dimensions of
+    ``data``, but ``dim``.
+    """
+    freq = [d for d in clim.dims if d not in data.dims][0]
+    axis = data.get_axis_num(dim)
+    clim = clim.transpose(*[freq if d == dim else d for d in data.dims])
+    # times missing from the reference period get the NaNs appended
+    missing = np.full(clim.shape[:axis] + (1,) + clim.shape[axis + 1:], np.nan)
+    values = np.concatenate([clim.values, missing], axis=axis)
+    keys = getattr(data.get_index(dim), freq)
+    index = clim.get_index(freq).get_indexer(keys)
+    index = np.where(index < 0, len(clim[freq]), index)
+    if lazy:
+        array = data.data
+        if not isinstance(array, dask.array.Array):
+            array = dask.array.from_array(array, chunks={axis: 1})
+        reference = dask.array.from_array(values, chunks=-1)
+        out = array - dask.array.take(reference, index, axis=axis)
+    else:
+        out = np.asarray(data) - np.take(values, index, axis=axis)
+    return data.copy(data=out)
@@ -32,3 +32,35 @@ try:
 except ImportError:
     logger.debug("Install crick to use tdigest method for finding cmap limits.")
     has_crick_tdigest = False
+
+try:
+    import psutil
+    has_psutil = True
+except ImportError:
+    logger.debug("Install psutil to measure the memory used by the process.")
+    has_psutil = False
+
+try:
+    import dask.distributed
+    has_distributed = True
+except ImportError:
+    logger.debug("Install dask.distributed to run computations on a local "
+                 "cluster.")
+    has_distributed = False
+
+try:
+    import numexpr
+    has_numexpr = True
+except ImportError:
+    logger.debug("Install numexpr to evaluate derived variables faster.")
+    has_numexpr = False
+    numexpr = None
+
+try:
+    import scipy.sparse
+    import scipy.spatial
+    has_scipy = True
+except ImportError:
+    logger.debug("Install scipy to regrid curvilinear data to regular grids.")
+    has_scipy = False
+    scipy = None
@@ -6,7 +6,10 @@ from .display3d import Display3d
 from .describe import Describe
 from .fields import Fields
 from .style import Style
+from .analysis import Analysis
 from .coord_setter import CoordSetter
+from .performance import Performance
+from .progress import ProgressReporter
 from .compatibility import has_cartopy
 
 TEXT = """
@@ -25,6 +28,8 @@ class Control(SigSlot):
         The data to be visualised. Here, we are mostly concerned with
         displaying the variables, their attributes, and assigning coordinates
         to roles upon plotting.
+    reference: xarray.DataSet
+        A second dataset, to plot differences with (see ``Analysis``).
 
     Attributes
     ----------
@@ -42,22 +47,38 @@ class Control(SigSlot):
             A ``Fields`` instance to select the axes to plot with.
     6. style:
             A ``Style`` instance to customise styling of the graphs.
-    7. projection:
+    7. analysis:
+            An ``Analysis`` instance to choose what is plotted from the values
+            of the variable, e.g. anomalies.
+    8. projection:
             A ``Projection`` instance to customise the projection of
             geographical data.
-    8. kwargs:
+    9. performance:
+            A ``Performance`` instance recording per-stage timings of the
+            plotting calls.
+    10. progress:
+            A ``ProgressReporter`` instance showing the progress of dask
+            computations, which can be stopped with its ``Stop`` button.
+    11. kwargs:
             A dictionary gathered from the widgets of the input Panes,
             of a form which can be passed to the plotting function as kwargs.
     """
 
-    def __init__(self, data):
+    def __init__(self, data, performance=False, memory_threshold=None,
+                 reference=None):
         super().__init__()
         self.data = data
+        self.performance = Performance(enabled=performance,
+                                       memory_threshold=memory_threshold)
+        self.progress = ProgressReporter()
         self.displayer = Display(self.data)
-        self.displayer3d = Display3d(self.data)
+        self.displayer3d = Display3d(self.data,
+                                     recorder=self.performance.recorder,
+                                     progress=self.progress)
         self.describer = Describe(self.data)
         self.fields = Fields(self.data)
         self.style = Style()
+        self.analysis = Analysis(self.data, reference=reference)
         self.coord_setter = CoordSetter(self.data)
 
         self.tabs = pn.Tabs(
@@ -70,6 +91,7 @@ class Control(SigSlot):
             self.coord_setter.panel,
             self.fields.panel,
             self.style.panel,
+            self.analysis.panel,
             self.displayer3d.panel,
             background='#f5f5f5',
             width_policy='max',
@@ -84,9 +106,14 @@ class Control(SigSlot):
             self.fields.connect('x', self.check_is_projectable)
             self.fields.connect('y', self.check_is_projectable)
 
+        if performance:
+            self.tabs.append(self.performance.panel)
+
         self.displayer.connect("variable_selected", self.describer.setup)
         self.displayer.connect("variable_selected", self.fields.setup)
         self.displayer.connect("variable_selected", self.style.setup)
+        self.displayer.connect("variable_selected", self.analysis.setup)
+        self.analysis.connect("values_changed", self.style.setup)
 
         self.panel = pn.WidgetBox(self.tabs, width_policy='max')
 
@@ -95,6 +122,7 @@ class Control(SigSlot):
         self.coord_setter.setup_initial_values(initial_params)
         self.fields.setup_initial_values(initial_params)
         self.style.setup_initial_values(initial_params)
+        self.analysis.setup_initial_values(initial_params)
         if has_cartopy:
             self.projection.setup_initial_values(initial_params)
 
@@ -111,6 +139,7 @@ class Control(SigSlot):
         self.displayer.set_coords(self.data)
         self.describer.set_coords(self.data, var)
         self.fields.set_coords(self.data, var)
+        self.analysis.set_coords(self.data)
 
     def check_is_projectable(self, *args):
         """
@@ -127,6 +156,7 @@ class Control(SigSlot):
         out = self.displayer.kwargs
         out.update(self.fields.kwargs)
         out.update(self.style.kwargs)
+        out.update(self.analysis.kwargs)
         if has_cartopy:
             out.update(self.projection.kwargs)
         return out
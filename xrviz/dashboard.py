@@ -1,5 +1,6 @@
 import ast
 import dask
+from concurrent.futures import ThreadPoolExecutor
 import panel as pn
 import pandas as pd
 import numpy as np
@@ -12,9 +13,26 @@ from bokeh.models import HoverTool
 import warnings
 from itertools import cycle
 import numpy
-from .sigslot import SigSlot
+from .sigslot import SigSlot, _DeferredSlot, _on_document, _served_document
 from .control import Control
-from .utils import convert_widget, player_with_name_and_value, is_float, look_for_class
+from .performance import instrument
+from .planner import plan
+from .reductions import (ENSEMBLE, Rolling, aggregate, correlation, resample,
+                         rolling)
+from .chunking import auto_chunks
+from .backend import STATUS_PERIOD, Backend
+from .progress import Cancelled, cancellable
+from .climatology import CLIMATOLOGIES, anomalies, climatology, time_dim
+from .analysis import TAPPED_SERIES
+from .difference import SECOND_DATASET, align, subtract
+from .expressions import derive, split_definition
+from .weights import with_cell_measure
+from .vertical import INTERPOLATE, interpolate
+from .regrid import regrid
+from .stats_index import StatsIndex, index_path, load_index
+from .warmup import WarmUp
+from .utils import (convert_widget, player_with_name_and_value, is_float,
+                    look_for_class, plot_type)
 from .compatibility import ccrs, gv, gf, has_cartopy, logger, has_crick_tdigest
 
 
@@ -33,6 +51,72 @@ class Dashboard(SigSlot):
         For more details, refer to
         `Set Initial Parameters <../html/set_initial_parameters.html>`_ .
 
+    performance: bool
+        Whether to record per-stage timings of the plotting calls, shown in
+        the ``Performance`` tab.
+
+    memory_threshold: `int`
+        Warn when a plotting call uses more memory than this, in bytes.
+        Measurements are available from ``recorder.memory_report()``.
+
+    memory_budget: `int`
+        Estimated peak memory, in bytes, above which aggregations switch to
+        a cheaper strategy (see ``xrviz.planner.Plan``). No limit if None.
+
+    confirm_over_budget: `bool`
+        Ask the user to confirm aggregations over ``memory_budget``, rather
+        than switching to a cheaper strategy.
+
+    chunks: `'auto'` or `dict`
+        With ``'auto'``, variables which are not dask arrays are wrapped in
+        dask chunks when plotted, following their chunks on disk and the
+        plotted axes (see ``xrviz.chunking.auto_chunks``), so that frames
+        are read lazily and aggregations run in parallel. A dict is passed
+        to ``xarray.Dataset.chunk``.
+
+    backend: `str` or ``Backend``
+        Where dask computations run: ``'threads'``, ``'processes'`` or
+        ``'distributed'``, or a ``xrviz.backend.Backend`` instance to set the
+        number of workers and their memory limit. By default, dask's current
+        scheduler is used.
+
+    provisional_limits: `bool`
+        For data larger than ``PROVISIONAL_SIZE`` values, render with colormap
+        limits estimated from a sample, then compute the exact limits in the
+        background and update the graph and the ``cmap lower/upper limit``
+        inputs when done.
+
+    stats_index: `bool`, `str` or ``StatsIndex``
+        Statistics computed beforehand by ``xrviz index``, from which the
+        colormap limits of unaggregated frames are read rather than
+        computed. Either the path of the index file, True to look for it
+        next to the file the data was read from, or a
+        ``xrviz.stats_index.StatsIndex`` instance. Indexes older than the
+        data file are ignored, as are the variables which are not indexed
+        with the dimensions, shape and coordinates of ``data``.
+
+    warm_up: `bool`
+        Once the interface is shown, compute the colormap limits and basic
+        statistics of the first frame of every variable in a background
+        thread, most recently plotted variables first, so that their first
+        graph is faster. It pauses while graphs are being made.
+
+    approximate_quantiles: `bool`
+        Approximate medians of dask data in one streaming pass over its
+        chunks (see ``xrviz.reductions.approximate_quantile``), rather than
+        loading whole aggregated dimensions in each chunk.
+
+    derived: `dict`
+        Variables to add to the data, by name, as expressions of its
+        variables, e.g. ``{'speed': 'sqrt(u**2 + v**2)'}``. They are
+        evaluated lazily, frame by frame (see ``xrviz.expressions``). More
+        can be defined in the ``Variables`` pane.
+
+    reference: xarray.DataSet
+        A second dataset, e.g. another forecast run, from which variables
+        are subtracted in the ``difference`` mode of the ``Analysis`` pane.
+        It is aligned with the grid of the data by nearest neighbours.
+
     Attributes
     ----------
 
@@ -55,28 +139,104 @@ class Dashboard(SigSlot):
     8. clear_series_button:
             A ``pn.widgets.Button`` to clear the `taps_graph` and
             `series_graph`.
+    9. recorder:
+            A ``Recorder`` instance holding the timings of the last
+            plotting calls.
+    10. plan:
+            The ``Plan`` chosen for the aggregations of the last graph,
+            described in ``budget_pane``.
+    11. backend:
+            The ``Backend`` running dask computations, if one was given. Its
+            worker count and utilisation are shown in ``backend_status``,
+            after each computation, or every ``xrviz.backend.STATUS_PERIOD``
+            seconds for ``distributed``.
+    12. progress:
+            A ``ProgressReporter`` showing the progress of the computations
+            for the graphs, series and cube, with a ``Stop`` button.
+    13. stats:
+            The ``StatsIndex`` of the data, if one was found.
+    14. limits_cache:
+            Colormap limits of the frames computed so far, by variable and
+            position of the frame.
+    15. warm_up:
+            The ``WarmUp`` computing statistics in the background, or None.
+            Its ``results`` hold the min, max, mean and fraction of missing
+            values of the first frame of each variable.
+    16. climatology:
+            The climatology subtracted from the selected variable in anomaly
+            mode (see ``xrviz.analysis.Analysis``), or None.
+    17. correlations:
+            Correlation maps computed in correlation mode, by variable, tap
+            and dimension, up to ``CORRELATIONS_CACHED`` of them.
+    18. correlation_graph:
+            The map of the correlation with the last series tapped.
     """
-    def __init__(self, data, initial_params={}):
+    def __init__(self, data, initial_params={}, performance=False,
+                 memory_threshold=None, memory_budget=None,
+                 confirm_over_budget=False, chunks=None, backend=None,
+                 provisional_limits=False, stats_index=None, warm_up=False,
+                 approximate_quantiles=False, derived=None, reference=None):
         super().__init__()
         if not isinstance(data, xr.core.dataarray.DataWithCoords):
             raise ValueError("Input should be an xarray data object, not %s" % type(data))
         self.set_data(data)
+        if derived:
+            self.data = derive(self.data, derived)
+        self.reference = (
+            xr.Dataset({f'{reference.name}': reference})
+            if isinstance(reference, xr.DataArray) else reference)
+        self.stats = self.load_stats(stats_index)
+        if isinstance(chunks, dict):
+            self.data = self.data.chunk(chunks)
+        self.auto_chunk = chunks == 'auto'
+        self._chunked = (None, None)
+        self._rolling = (None, None)
+        self._resampled = (None, None)
+        self._climatology = (None, None)
+        self._reference = (None, None)
+        self.backend = (Backend(backend) if isinstance(backend, str)
+                        else backend)
+        self.backend_status = pn.pane.Markdown('', margin=(5, 10))
+        if self.backend is not None:
+            self.backend.activate()
+            self.backend.connect('computed', self.update_backend_status)
+            self.update_backend_status()
+            if self.backend.client is not None:
+                pn.state.add_periodic_callback(
+                    self.update_backend_status,
+                    period=int(1000 * STATUS_PERIOD))
         self.initial_params = initial_params
-        self.control = Control(self.data)
+        self.control = Control(self.data, performance=performance,
+                               memory_threshold=memory_threshold,
+                               reference=self.reference)
+        self.recorder = self.control.performance.recorder
+        self.progress = self.control.progress
         self.plot_button = pn.widgets.Button(name='Plot', width=200,
                                              disabled=True)
         self.index_selectors = []
         self.graph = pn.Spacer(name='Graph')
         self.taps_graph = hv.Points([])
         self.series_graph = pn.Row(pn.Spacer(name='Series Graph'))
+        self.correlation_graph = pn.Row(pn.Spacer(name='Correlation Graph'))
+        self.correlations = {}
         self.clear_series_button = pn.widgets.Button(name='Clear',
                                                      width=200,
                                                      disabled=True)
+        self.memory_budget = memory_budget
+        self.approximate_quantiles = approximate_quantiles
+        self.confirm_over_budget = confirm_over_budget
+        self.plan = None
+        self._over_budget_confirmed = False
+        self.plot_anyway_button = pn.widgets.Button(name='Plot anyway',
+                                                    width=200)
+        self.budget_pane = pn.Row()
         self.output = pn.Row(self.graph,
                              pn.Column(name='Index_selectors'))
 
         self._register(self.plot_button, 'plot_clicked', 'clicks')
-        self.connect('plot_clicked', self.create_graph)
+        self.connect('plot_clicked', self.plot_clicked)
+        self._graph_slot = _DeferredSlot(self._create_graph,
+                                         ThreadPoolExecutor(1))
 
         self._register(self.control.coord_setter.coord_selector, 'set_coords')
         self.connect("set_coords", self.set_coords)
@@ -84,21 +244,52 @@ class Dashboard(SigSlot):
         self._register(self.clear_series_button, 'clear_series', 'clicks')
         self.connect('clear_series', self.clear_series)
 
+        self._register(self.plot_anyway_button, 'plot_anyway', 'clicks')
+        self.connect('plot_anyway', self.plot_anyway)
+
+        self.provisional_limits = provisional_limits
+        self._limits_token = 0
+        self._limits_executor = ThreadPoolExecutor(1)
+        self._register(None, 'refine_limits')
+        self.connect('refine_limits', self._exact_limits,
+                     executor=self._limits_executor)
+
+        self.limits_cache = {}
+        self.warm_up = None
+        if warm_up:
+            names = [name for name, var in self.data.data_vars.items()
+                     if var.ndim > 1]
+            self.warm_up = WarmUp(self._warm_variable, names,
+                                  busy=lambda: self.progress.tracking)
+            self.control.displayer.connect('variable_selected',
+                                           self.warm_up.touch)
+            _on_document(self.warm_up.start)
+
         self.control.displayer.connect('variable_selected',
                                        self.check_is_plottable)
+        self.control.displayer.connect('derive', self.add_derived)
         self.control.displayer.connect('variable_selected',
                                        self._link_aggregation_selectors)
         self.control.fields.connect('x', self._link_aggregation_selectors)
         self.control.fields.connect('y', self._link_aggregation_selectors)
+        self.control.fields.connect('window', self.control.style.setup)
+        self.control.fields.connect('percentile', self.control.style.setup)
+        self.control.fields.connect('threshold', self.control.style.setup)
+        self.control.fields.connect('vertical', self.control.style.setup)
+        self.control.fields.connect('levels', self.control.style.setup)
 
         self.panel = pn.Column(self.control.panel,
                                pn.Row(self.control.displayer3d.plot_button_3d,
                                       self.plot_button,
                                       self.clear_series_button,
+                                      self.progress.panel,
+                                      self.backend_status,
                                       ),
+                               self.budget_pane,
                                self.control.displayer3d.data_cube,
                                self.output,
-                               self.series_graph, width_policy='max')
+                               self.series_graph, self.correlation_graph,
+                               width_policy='max')
 
         # To auto-select in case of single variable
         if len(list(self.data.variables)) == 1:
@@ -120,15 +311,501 @@ class Dashboard(SigSlot):
         """
         if not self.clear_series_button.disabled:
             self.series_graph[0] = pn.Spacer(name='Series Graph')
+            self.correlation_graph[0] = pn.Spacer(name='Correlation Graph')
             self.series = hv.Points([]).opts(frame_height=self.kwargs['frame_height'],
                                              frame_width=self.kwargs['frame_width'])
             self.taps.clear()
             self.clear_points.event(clear=True)
 
+    def variable_data(self):
+        """
+        The data of the selected variable, to be plotted.
+
+        With ``chunks='auto'``, it is wrapped in dask chunks suited to the
+        plotted axes and animated dimensions, unless already chunked. The
+        areas of its cells, if any, are among its coordinates (see
+        ``xrviz.weights.with_cell_measure``).
+        """
+        data = with_cell_measure(self.data, self.var)
+        if not self.auto_chunk or isinstance(data.data, dask.array.Array):
+            return data
+        spatial = set(self.data[self.kwargs['x']].dims).union(
+            self.data[self.kwargs['y']].dims)
+        animate = tuple(self.kwargs['dims_to_select_animate'])
+        key = (id(self.data), self.var, tuple(sorted(spatial)), animate)
+        if self._chunked[0] != key:
+            self._chunked = (key, data.chunk(auto_chunks(
+                data, spatial=spatial, animate=animate)))
+        return self._chunked[1]
+
+    def load_stats(self, stats_index):
+        """
+        Find the statistics index given as ``stats_index`` to ``__init__``.
+        """
+        if stats_index is None:
+            return None
+        if isinstance(stats_index, StatsIndex):
+            return stats_index.matching(self.data)
+        source = self.data.encoding.get('source')
+        if stats_index is True:
+            if source is None:
+                return None
+            stats_index = index_path(source)
+        return load_index(stats_index, source=source, data=self.data)
+
+    def indexed_frame(self, sel_data, frame):
+        """
+        The frame of the selected variable shown by ``sel_data``, if any.
+
+        ``frame`` gives the position along each dimension selected from the
+        variable, or is empty if the whole variable is plotted. Frames are
+        the values over the last two dimensions of a variable, as in the
+        statistics index. Data which is aggregated or scaled is not a frame.
+        """
+        if (self.kwargs['dims_to_agg'] or self.kwargs['dims_to_roll'] or
+                self.kwargs['dims_to_resample'] or
+                self.kwargs['dims_to_interpolate'] or
+                self.kwargs['mode'] != 'values' or
+                self.kwargs['color_scale'] != 'linear' or
+                self.plan.strategy != 'exact'):
+            return None
+        dims = self.data[self.var].dims
+        if not frame:
+            return {} if set(sel_data.dims) == set(dims) else None
+        if set(sel_data.dims) != set(dims[-2:]):
+            return None
+        return frame
+
+    def known_limits(self, frame):
+        """
+        Colormap limits of a frame of the selected variable, if they are in
+        the statistics index or were computed before.
+        """
+        if self.stats is not None and self.var in self.stats:
+            limits = self.stats.limits(self.var, frame or None)
+            if limits is not None:
+                return limits
+        return self.limits_cache.get(frame_key(self.var, frame))
+
+    def _warm_variable(self, name):
+        """Compute limits and statistics of the first frame of a variable"""
+        var = self.data[name]
+        frame = {dim: 0 for dim in var.dims[:-2]}
+        if self.auto_chunk and not isinstance(var.data, dask.array.Array):
+            var = var.chunk(auto_chunks(var, animate=tuple(frame)))
+        sel_data = var.isel(**frame)
+        key = frame_key(name, frame)
+        if key not in self.limits_cache:
+            self.limits_cache[key] = [float(v) for v in
+                                      find_cmap_limits(sel_data)]
+        stats = dask.compute(sel_data.min(), sel_data.max(), sel_data.mean(),
+                             sel_data.isnull().mean())
+        return dict(zip(['min', 'max', 'mean', 'nan_fraction'],
+                        [float(v) for v in stats]))
+
+    def cmap_limits(self, sel_data, frame=None):
+        """
+        Colormap limits for the data to be plotted.
+
+        If ``frame`` is given (see ``indexed_frame``), the limits are read
+        from the statistics index or ``limits_cache`` if there. With
+        ``provisional_limits``, large data gets limits estimated from a
+        sample, and the exact limits are computed in the background.
+        """
+        self._limits_token += 1
+        if frame is not None:
+            limits = self.known_limits(frame)
+            self.recorder.cache(limits is not None)
+            if limits is not None:
+                return limits
+        if not self.provisional_limits or sel_data.size <= PROVISIONAL_SIZE:
+            limits = find_cmap_limits(sel_data)
+            if frame is not None:
+                self.limits_cache[frame_key(self.var, frame)] = limits
+            return limits
+        limits = sample_cmap_limits(sel_data)
+        self.recorder.note(provisional_limits=True)
+        self._emit('refine_limits', (self._limits_token, sel_data, limits))
+        return limits
+
+    def _exact_limits(self, args):
+        """Compute exact limits, to be applied if still relevant"""
+        token, sel_data, provisional = args
+        lower, upper = find_cmap_limits(sel_data)
+
+        def apply():
+            # not if another graph was made, or the limits were changed
+            style = self.control.style
+            shown = (style.lower_limit.value, style.upper_limit.value)
+            if (token == self._limits_token and
+                    shown == tuple(str(round(v, 5)) for v in provisional)):
+                self.set_cmap_limits(lower, upper)
+        return apply
+
+    def set_cmap_limits(self, lower, upper):
+        """
+        Update the colormap limits of the graph shown, and their inputs.
+        """
+        self.control.style.lower_limit.value = str(round(lower, 5))
+        self.control.style.upper_limit.value = str(round(upper, 5))
+        clim = (lower, upper)
+        pane = self.output[0]
+        if isinstance(pane, pn.pane.HoloViews):
+            pane.object = pane.object.opts(hv.opts.QuadMesh(clim=clim),
+                                           hv.opts.Image(clim=clim))
+
+    @property
+    def climatology(self):
+        return self._climatology[1]
+
+    def read_kwargs(self):
+        """
+        The values of the input panes.
+
+        When the selected variable is correlated with another along a
+        dimension, the dimension is reduced by ``correlate``, rather than
+        aggregated or animated.
+        """
+        kwargs = self.control.kwargs
+        dim = correlated_dim(kwargs)
+        if dim is not None:
+            for key in ['dims_to_agg', 'dims_to_select_animate']:
+                kwargs[key] = [d for d in kwargs[key] if d != dim]
+            for key in ['dims_to_roll', 'dims_to_resample',
+                        'dims_to_interpolate']:
+                kwargs[key] = {d: v for d, v in kwargs[key].items()
+                               if d != dim}
+        return kwargs
+
+    def analyse(self, data, point=None):
+        """
+        Derive what is plotted from ``data``, the values of the selected
+        variable, following the mode of the ``Analysis`` pane.
+
+        For series, ``point`` gives the values selected from the variable
+        along its other dimensions.
+        """
+        mode = self.kwargs['mode']
+        if mode == 'anomaly':
+            return self.anomalies(data, point)
+        if mode == 'difference':
+            return self.differences(data, point)
+        if mode == 'correlation' and point is None:
+            return self.correlate(data)
+        return data
+
+    def anomalies(self, data, point=None):
+        """
+        Subtract the climatology of the selected variable from ``data``, a
+        part of its values.
+
+        The climatology is computed once per variable and reference period
+        (see ``xrviz.climatology.climatology``), in parallel over the chunks
+        of ``variable_data``. The subtraction is lazy (see
+        ``xrviz.chunking.auto_chunks``). For series, ``point`` gives the
+        values selected from the variable along its other dimensions.
+        """
+        var = self.variable_data()
+        dim = time_dim(var)
+        if dim is None or dim not in data.dims:
+            logger.warning(f"{self.var} has no datetime dimension: plotting "
+                           f"its values rather than anomalies")
+            return data
+        freq = CLIMATOLOGIES[self.kwargs['climatology']]
+        start = self.kwargs['reference start'] or None
+        end = self.kwargs['reference end'] or None
+        key = (id(self.data), self.var, freq, start, end)
+        self.recorder.cache(self._climatology[0] == key)
+        if self._climatology[0] != key:
+            self._climatology = (key, climatology(
+                var, dim, freq, start, end,
+                source=self.data.encoding.get('source')))
+        clim = self._climatology[1]
+        if point is None:
+            return anomalies(data, clim, dim)
+        for d, val in point.items():
+            clim = sel_val_from_dim(clim, d, val)
+        return anomalies(data, clim, dim, lazy=False)
+
+    def differences(self, data, point=None):
+        """
+        Subtract the reference set in the ``Analysis`` pane from ``data``, a
+        part of the values of the selected variable.
+
+        The reference, a frame of the variable or the variable of the second
+        dataset on its grid (see ``xrviz.difference.align``), is computed once
+        per variable. The subtraction is lazy (see
+        ``xrviz.chunking.auto_chunks``). ``point`` is as for ``anomalies``.
+        """
+        along = self.kwargs['difference along']
+        value = self.kwargs['subtracted value']
+        if along is None:
+            return data
+        key = (id(self.data), self.var, along,
+               str(value) if along != SECOND_DATASET else None)
+        self.recorder.cache(self._reference[0] == key)
+        if self._reference[0] != key:
+            var = self.data[self.var]
+            if along == SECOND_DATASET:
+                reference = align(self.reference[self.var], var)
+            else:
+                reference = var.sel({along: value}, drop=True).compute()
+            self._reference = (key, reference)
+        reference = self._reference[1]
+        if point is None:
+            return subtract(data, reference)
+        for d, val in point.items():
+            reference = sel_val_from_dim(reference, d, val)
+        return data - reference
+
+    def correlate(self, data):
+        """
+        Correlation of ``data``, the values of the selected variable, with
+        the variable set in the ``Analysis`` pane, along ``extract along``.
+
+        Correlation maps are computed in one pass over the data (see
+        ``xrviz.reductions.correlation``), and cached. ``data`` is returned
+        as is when correlating with tapped series, which is done by
+        ``create_correlation_graph``.
+        """
+        dim = correlated_dim(self.kwargs)
+        if dim is None:
+            if self.kwargs['correlate with'] != TAPPED_SERIES:
+                logger.warning("Select the dimension to correlate along in "
+                               "'extract along'")
+            return data
+        other = self.kwargs['correlate with']
+        key = (id(self.data), self.var, other, dim)
+        return self.cached_correlation(
+            key, lambda: correlation(data, self.data[other], [dim]))
+
+    def cached_correlation(self, key, compute):
+        """The correlation map computed by ``compute``, cached by ``key``"""
+        self.recorder.cache(key in self.correlations)
+        if key not in self.correlations:
+            while len(self.correlations) >= CORRELATIONS_CACHED:
+                del self.correlations[next(iter(self.correlations))]
+            self.correlations[key] = compute().compute()
+        return self.correlations[key]
+
+    def create_correlation_graph(self, point, others, dim):
+        """
+        Map the correlation of the selected variable with its series at
+        ``point``, along ``dim``.
+
+        The other remaining dimensions are selected at ``others``, as for the
+        series. Maps are cached per tap.
+        """
+        data = self.variable_data()
+        for d, val in others.items():
+            data = sel_val_from_dim(data, d, val)
+        series = data
+        for d, val in point.items():
+            series = sel_val_from_dim(series, d, val)
+        series = series.reset_coords(drop=True)
+        key = (id(self.data), self.var, dim,
+               tuple(sorted((d, str(v)) for d, v in point.items())),
+               tuple(sorted((d, str(v)) for d, v in others.items())))
+        try:
+            with self.recorder.stage('correlation'), self.progress.track():
+                corr = self.cached_correlation(
+                    key, lambda: correlation(data, series, [dim]))
+        except Cancelled:
+            return pn.Spacer(name='Correlation Graph')
+        graph_opts = {'x': self.kwargs['x'],
+                      'y': self.kwargs['y'],
+                      'title': f'Correlation of {self.var} along {dim}',
+                      'frame_height': self.kwargs['frame_height'],
+                      'frame_width': self.kwargs['frame_width'],
+                      'cmap': 'RdBu_r',
+                      'colorbar': self.kwargs['colorbar'],
+                      'rasterize': self.kwargs['rasterize']}
+        with self.recorder.stage('hvplot'):
+            plot = plot_type(corr, graph_opts['x'], graph_opts['y'])
+            return getattr(corr.hvplot, plot)(**graph_opts).redim.range(
+                **{corr.name: (-1, 1)})
+
+    def values_key(self):
+        """
+        Identifies the values plotted for the selected variable, for the
+        caches of data derived from them.
+        """
+        mode = self.kwargs['mode']
+        cached = {'anomaly': self._climatology[0],
+                  'difference': self._reference[0],
+                  'correlation': (self.kwargs['correlate with'],
+                                  correlated_dim(self.kwargs))}
+        return (id(self.data), self.var, mode, cached.get(mode))
+
+    def resample(self, data):
+        """
+        Apply the calendar resampling selected in the ``Axes`` pane to the
+        data of the selected variable.
+
+        The resampled data is computed once per variable and frequency, in
+        one pass (see ``xrviz.reductions.resample``), and kept until another
+        resampling is plotted.
+        """
+        dims = self.kwargs['dims_to_resample']
+        if not dims:
+            return data
+        key = (self.values_key(), tuple(sorted(dims.items())))
+        self.recorder.cache(self._resampled[0] == key)
+        if self._resampled[0] != key:
+            for dim, freq in dims.items():
+                data = resample(data, dim, freq)
+            self._resampled = (key, data.compute())
+        return self._resampled[1]
+
+    def interpolate(self, data, point=None):
+        """
+        Interpolate ``data`` to the target levels selected in the ``Axes``
+        pane, along the dimensions set to ``interpolate``.
+
+        The indices and weights of the targets are computed once per
+        geometry of the vertical coordinate, and shared by the variables
+        and time steps on it (see ``xrviz.vertical.interpolation_weights``).
+        ``point`` is as for ``anomalies``.
+        """
+        dims = self.kwargs['dims_to_interpolate']
+        for dim, targets in dims.items():
+            levels = self.data[self.kwargs['vertical coordinate']]
+            for d, val in (point or {}).items():
+                if d in levels.dims:
+                    levels = sel_val_from_dim(levels, d, val)
+            data = interpolate(data, dim, levels, targets)
+        return data
+
+    def regrid(self, data):
+        """
+        Regrid ``data`` to a regular grid, with the method selected in the
+        ``Style`` pane, when its ``x`` and ``y`` are curvilinear
+        coordinates, i.e. 2-D on the same dimensions.
+
+        The weights are computed once per grid, and cached on disk (see
+        ``xrviz.regrid.regrid_weights``). Frames are regridded lazily, as
+        they are shown.
+
+        Returns
+        -------
+        (data, whether it was regridded)
+        """
+        x, y = self.kwargs['x'], self.kwargs['y']
+        method = self.kwargs['regrid']
+        if (method == 'none' or not isinstance(data, xr.DataArray) or
+                x not in data.coords or y not in data.coords or
+                data[x].ndim != 2 or set(data[x].dims) != set(data[y].dims)):
+            return data, False
+        return regrid(data, x, y, method), True
+
+    def roll(self, sel_data, selection=None):
+        """
+        Apply the rolling aggregations selected in the ``Axes`` pane.
+
+        With ``selection``, the value selected along each rolled dimension,
+        only the selected frame is computed. When a single dimension is
+        rolled, the frames are computed incrementally as it is animated
+        (see ``xrviz.reductions.Rolling``).
+        """
+        dims_to_roll = self.kwargs['dims_to_roll']
+        window = self.kwargs['rolling window']
+        if selection is not None and len(dims_to_roll) == 1:
+            (dim, agg), = dims_to_roll.items()
+            others = sorted((d, str(v)) for d, v in selection.items()
+                            if d != dim)
+            key = (self.values_key(), dim, agg, window, tuple(others),
+                   self.plan.strategy, tuple(sorted(self.plan.steps.items())),
+                   self.kwargs['vertical coordinate'],
+                   tuple(sorted(self.kwargs['dims_to_interpolate'].items())))
+            self.recorder.cache(self._rolling[0] == key)
+            if self._rolling[0] != key:
+                self._rolling = (key, Rolling(sel_data, dim, agg, window))
+            position = self.data.get_index(dim).get_loc(selection[dim])
+            return self._rolling[1].frame(position)
+        for dim, agg in dims_to_roll.items():
+            sel_data = rolling(sel_data, dim, agg, window)
+        if selection is not None:
+            sel_data = sel_data.sel({dim: selection[dim]
+                                     for dim in dims_to_roll}, drop=True)
+        return sel_data
+
+    def update_backend_status(self, *args):
+        """
+        Show the worker count and utilisation of the backend.
+        """
+        def update():
+            self.backend_status.object = self.backend.describe()
+        _on_document(update)
+
+    def plan_aggregation(self):
+        """
+        Check the aggregations against ``memory_budget``, before running them.
+
+        Returns the ``Plan`` to follow, or None if the user has to confirm
+        the aggregations first.
+        """
+        data = self.variable_data()
+        aggs = {dim: self.kwargs[dim] for dim in self.kwargs['dims_to_agg']}
+        # only the graph of dims selects a single frame before aggregating
+        selection = (self.kwargs['dims_to_select_animate']
+                     if not (self.kwargs['are_var_coords'] or
+                             self.kwargs['compute min/max from all data'])
+                     else [])
+        spatial = set(self.data[self.kwargs['x']].dims).union(
+            self.data[self.kwargs['y']].dims)
+        confirm = self.confirm_over_budget and not self._over_budget_confirmed
+        self.plan = plan(data, aggs, self.memory_budget, spatial=spatial,
+                         selection=selection, confirm=confirm,
+                         approximate=self.approximate_quantiles)
+        self.recorder.note(plan=self.plan.strategy,
+                           estimated_peak=self.plan.peak_bytes)
+
+        self.budget_pane.clear()
+        if self.plan.strategy == 'confirm':
+            self.budget_pane.extend([
+                pn.pane.Markdown(f"**Over the memory budget:** "
+                                 f"{self.plan.description}"),
+                self.plot_anyway_button])
+            return None
+        if self.plan.strategy != 'exact':
+            self.budget_pane.append(pn.pane.Markdown(self.plan.description))
+        return self.plan
+
+    def plot_clicked(self, *args):
+        """
+        Create the graph. In a served document, it is created in the
+        background, so that the server handles the ``Stop`` button of
+        ``progress`` meanwhile.
+        """
+        if _served_document() is None:
+            self._create_graph(False)
+        else:
+            self._graph_slot(False)
+
+    def plot_anyway(self, *args):
+        """
+        Create the graph, though it is over the memory budget, in the
+        background as ``plot_clicked`` does.
+        """
+        if _served_document() is None:
+            self._create_graph(True)
+        else:
+            self._graph_slot(True)
+
+    def _create_graph(self, confirmed):
+        """``create_graph``, over the memory budget if ``confirmed``"""
+        self._over_budget_confirmed = confirmed
+        try:
+            self.create_graph()
+        finally:
+            self._over_budget_confirmed = False
+
     def _link_aggregation_selectors(self, *args):
         for dim_selector in self.control.kwargs['remaining_dims']:
             self.control.fields.connect(dim_selector, self.control.style.setup)
 
+    @instrument
+    @cancellable
     def create_graph(self, *args):
         """
         Creates a graph according to the values selected in the widgets.
@@ -147,14 +824,20 @@ class Dashboard(SigSlot):
             uses ``create_indexed_graph`` method for creation of the graph.
             The selectors are created and linked with graph by XrViz.
         """
-        self.kwargs = self.control.kwargs
+        self.kwargs = self.read_kwargs()
         self.var = self.kwargs['Variables']
+        self._limits_token += 1
+        if self.warm_up is not None:
+            self.warm_up.touch(self.var)
+        if self.plan_aggregation() is None:
+            return
         if self.index_selectors:
             for selector in self.index_selectors:
                 del selector
         self.index_selectors = []
         self.output[1].clear()  # clears Index_selectors
         self.series_graph[0] = pn.Spacer(name='Series Graph')
+        self.correlation_graph[0] = pn.Spacer(name='Correlation Graph')
         self.series = hv.Points([]).opts(frame_height=self.kwargs['frame_height'],
                                          frame_width=self.kwargs['frame_width'])
         self.taps.clear()
@@ -173,14 +856,15 @@ class Dashboard(SigSlot):
             color_scale = self.kwargs['color_scale']
             dims_to_agg = self.kwargs['dims_to_agg']
             use_all_data = self.kwargs['compute min/max from all data']
-            sel_data = self.data[self.var]
+            sel_data = self.variable_data()
 
             if has_cartopy:
                 is_geo = self.kwargs['is_geo']
                 base_map = self.kwargs['basemap']
                 show_map = True if base_map != None else False
 
-                if is_geo:
+            if has_cartopy and is_geo:
+                with self.recorder.stage('projection'):
                     crs_params = self.kwargs['crs params']
                     crs_params = process_proj_params(crs_params)
                     crs = getattr(ccrs, self.kwargs['crs'])(**crs_params)
@@ -202,12 +886,21 @@ class Dashboard(SigSlot):
 
                     feature_map = gv.Overlay([getattr(gf, feat) for feat in self.kwargs['features'] if feat is not 'None'])
 
-            for dim in dims_to_agg:
-                if self.kwargs[dim] == 'count':
-                    sel_data = (~ sel_data.isnull()).sum(dim)
-                else:
-                    agg = self.kwargs[dim]
-                    sel_data = getattr(sel_data, agg)(dim)
+            self.recorder.note(sel_data)
+            with self.recorder.stage('analysis'):
+                sel_data = self.analyse(sel_data)
+            with self.recorder.stage('resampling'):
+                sel_data = self.resample(sel_data)
+            with self.recorder.stage('interpolation'):
+                sel_data = self.interpolate(sel_data)
+            with self.recorder.stage('aggregation'):
+                sel_data = self.plan.apply(sel_data)
+                sel_data = self.roll(sel_data)
+                sel_data = aggregate(
+                    sel_data, {dim: self.kwargs[dim] for dim in dims_to_agg},
+                    approximate=self.approximate_quantiles,
+                    percentile=self.kwargs['percentile'],
+                    threshold=self.kwargs['threshold'])
 
             if self.var in list(sel_data.coords):  # When a var(coord) is plotted wrt itself
                 sel_data = sel_data.to_dataset(name=f'{sel_data.name}_')
@@ -215,21 +908,25 @@ class Dashboard(SigSlot):
             if color_scale is not 'linear':
                 sel_data = getattr(numpy, color_scale)(sel_data)  # Color Scaling
 
-            if not use_all_data:
-                # sel the values at first step, to use for cmap limits
-                sels = {dim: 0 for dim in self.kwargs['dims_to_select_animate']}
-                sel_data_for_cmap = sel_data.isel(**sels, drop=True)
-            else:
-                sel_data_for_cmap = sel_data
+            with self.recorder.stage('selection'):
+                if not use_all_data:
+                    # sel the values at first step, to use for cmap limits
+                    sels = {dim: 0 for dim in self.kwargs['dims_to_select_animate']}
+                    sel_data_for_cmap = sel_data.isel(**sels, drop=True)
+                else:
+                    sels = {}
+                    sel_data_for_cmap = sel_data
+                frame = self.indexed_frame(sel_data_for_cmap, sels)
 
             cmin, cmax = self.kwargs['cmap lower limit'], self.kwargs['cmap upper limit']
             cmin, cmax = (cmin, cmax) if is_float(cmin) and is_float(cmax) else ('', '')
 
             # It is better to set initial values as 0.1,0.9 rather than
             # 0,1(min, max) to get a color balance graph
-            c_lim_lower, c_lim_upper = (
-                (float(cmin), float(cmax)) if cmin and cmax
-                else find_cmap_limits(sel_data_for_cmap))
+            with self.recorder.stage('cmap limits'):
+                c_lim_lower, c_lim_upper = (
+                    (float(cmin), float(cmax)) if cmin and cmax
+                    else self.cmap_limits(sel_data_for_cmap, frame))
 
             color_range = {sel_data.name: (c_lim_lower, c_lim_upper)}
 
@@ -237,7 +934,14 @@ class Dashboard(SigSlot):
                 self.control.style.lower_limit.value = str(round(c_lim_lower, 5))
                 self.control.style.upper_limit.value = str(round(c_lim_upper, 5))
 
-            assign_opts = {dim: self.data[dim] for dim in sel_data.dims}
+            with self.recorder.stage('regridding'):
+                sel_data, regridded = self.regrid(sel_data)
+
+            assign_opts = {dim: self.plan.index(self.data[dim])
+                           if dim not in self.kwargs['dims_to_resample'] and
+                           dim not in self.kwargs['dims_to_interpolate'] and
+                           not regridded
+                           else sel_data[dim] for dim in sel_data.dims}
             # Following tasks are happening here:
             # 1. assign_opts: reassignment of coords(if not done result in
             # errors for some of the selections in fields panel)
@@ -247,10 +951,12 @@ class Dashboard(SigSlot):
             # lower and upper limits
             # 4. active_tools: activate the tools required such as 'wheel_zoom',
             # 'pan'
-            graph = sel_data.assign_coords(
-                **assign_opts).hvplot.quadmesh(
-                **graph_opts).redim.range(**color_range).opts(
-                active_tools=['wheel_zoom', 'pan'])
+            with self.recorder.stage('hvplot'):
+                sel_data = sel_data.assign_coords(**assign_opts)
+                plot = plot_type(sel_data, graph_opts['x'], graph_opts['y'])
+                graph = getattr(sel_data.hvplot, plot)(
+                    **graph_opts).redim.range(**color_range).opts(
+                    active_tools=['wheel_zoom', 'pan'])
 
             self.tap_stream.source = graph
 
@@ -262,7 +968,8 @@ class Dashboard(SigSlot):
                 if show_map:
                     graph = getattr(gv.tile_sources, base_map) * graph
 
-            self.create_selectors_players(graph)
+            with self.recorder.stage('render'):
+                self.create_selectors_players(graph)
 
         else:  # if one or both x,y are var_dims
             self.var_dims = list(self.data[self.var].dims)
@@ -271,9 +978,15 @@ class Dashboard(SigSlot):
             self.var_selector_dims = self.kwargs['dims_to_select_animate']
 
             for dim in self.var_selector_dims:
-                ops = list(self.data[self.var][dim].values)
+                if dim in self.kwargs['dims_to_resample']:
+                    ops = list(self.resample(
+                        self.analyse(self.variable_data()))[dim].values)
+                elif dim in self.kwargs['dims_to_interpolate']:
+                    ops = list(self.kwargs['dims_to_interpolate'][dim])
+                else:
+                    ops = list(self.data[self.var][dim].values)
 
-                if self.kwargs[dim] == 'select':
+                if self.kwargs[dim] in ['select', INTERPOLATE]:
                     selector = pn.widgets.Select(name=dim, options=ops)
                 else:
                     selector = pn.widgets.DiscretePlayer(name=dim,
@@ -291,6 +1004,8 @@ class Dashboard(SigSlot):
                     player = player_with_name_and_value(selector)
                     self.output[1].append(player)
 
+    @instrument
+    @cancellable
     def create_indexed_graph(self, *args):
         """
         Creates a graph for the dimensions selected in widgets `x` and `y`.
@@ -298,7 +1013,7 @@ class Dashboard(SigSlot):
         This is used when values selected in `x` and `y` are not data
         coordinates (i.e. one or both values are data dimensions).
         """
-        self.kwargs = self.control.kwargs
+        self.kwargs = self.read_kwargs()
         selection = {}  # to collect the value of index selectors
         for i, dim in enumerate(list(self.var_selector_dims)):
             selection[dim] = self.index_selectors[i].value
@@ -314,14 +1029,43 @@ class Dashboard(SigSlot):
         color_scale = self.kwargs['color_scale']
         use_all_data = self.kwargs['compute min/max from all data']
 
-        sel_data = self.data[self.var]
-
-        for dim in dims_to_agg:
-            if self.kwargs[dim] == 'count':
-                sel_data = (~ sel_data.isnull()).sum(dim)
-            else:
-                agg = self.kwargs[dim]
-                sel_data = getattr(sel_data, agg)(dim)
+        sel_data = self.variable_data()
+        self.recorder.note(sel_data)
+        with self.recorder.stage('analysis'):
+            sel_data = self.analyse(sel_data)
+        with self.recorder.stage('resampling'):
+            sel_data = self.resample(sel_data)
+        with self.recorder.stage('interpolation'):
+            sel_data = self.interpolate(sel_data)
+
+        dims_to_roll = self.kwargs['dims_to_roll']
+        if not use_all_data:  # do the selection earlier, before aggregating
+            with self.recorder.stage('selection'):
+                sel_data = sel_data.sel(
+                    **{dim: val for dim, val in selection.items()
+                       if dim not in dims_to_roll}, drop=True)
+            # resampled and interpolated values are not in the index
+            positions = ({dim: self.data.get_index(dim).get_loc(val)
+                          for dim, val in selection.items()}
+                         if not self.kwargs['dims_to_resample'] and
+                         not self.kwargs['dims_to_interpolate'] else None)
+        else:
+            positions = {}
+        frame = (self.indexed_frame(sel_data, positions)
+                 if positions is not None and
+                 all(isinstance(p, (int, np.integer))
+                     for p in positions.values())
+                 else None)
+
+        with self.recorder.stage('aggregation'):
+            sel_data = self.plan.apply(sel_data)
+            sel_data = self.roll(sel_data,
+                                 selection if not use_all_data else None)
+            sel_data = aggregate(
+                sel_data, {dim: self.kwargs[dim] for dim in dims_to_agg},
+                approximate=self.approximate_quantiles,
+                percentile=self.kwargs['percentile'],
+                threshold=self.kwargs['threshold'])
 
         # rename the sel_data in case it is a coordinate, because we
         # cannot create a Dataset from a DataArray with the same name
@@ -329,9 +1073,6 @@ class Dashboard(SigSlot):
         if sel_data.name in self.data.coords:
                 sel_data = sel_data.to_dataset(name=f'{sel_data.name}_')
 
-        if not use_all_data:  # do the selection earlier
-            sel_data = sel_data.sel(**selection, drop=True)
-
         if color_scale is not 'linear':
             sel_data = getattr(numpy, color_scale)(sel_data)  # Color Scaling
 
@@ -340,9 +1081,10 @@ class Dashboard(SigSlot):
 
         # It is better to set initial values as 0.1,0.9 rather than
         # 0,1(min, max) to get a color balance graph
-        c_lim_lower, c_lim_upper = (
-            (float(cmin), float(cmax)) if cmin and cmax
-            else find_cmap_limits(sel_data))
+        with self.recorder.stage('cmap limits'):
+            c_lim_lower, c_lim_upper = (
+                (float(cmin), float(cmax)) if cmin and cmax
+                else self.cmap_limits(sel_data, frame))
 
         color_range = {sel_data.name: (c_lim_lower, c_lim_upper)}
 
@@ -351,23 +1093,28 @@ class Dashboard(SigSlot):
             self.control.style.upper_limit.value = str(round(c_lim_upper, 5))
 
         if use_all_data:  # do the selection later
-            sel_data = sel_data.sel(**selection, drop=True)
-
-        assign_opts = {dim: self.data[dim] for dim in sel_data.dims}
-        graph = sel_data.assign_coords(
-            **assign_opts).hvplot.quadmesh(**graph_opts).redim.range(
-            **color_range).opts(active_tools=['wheel_zoom', 'pan'])
+            with self.recorder.stage('selection'):
+                sel_data = sel_data.sel(**selection, drop=True)
+
+        assign_opts = {dim: self.plan.index(self.data[dim])
+                       for dim in sel_data.dims}
+        with self.recorder.stage('hvplot'):
+            sel_data = sel_data.assign_coords(**assign_opts)
+            plot = plot_type(sel_data, graph_opts['x'], graph_opts['y'])
+            graph = getattr(sel_data.hvplot, plot)(**graph_opts).redim.range(
+                **color_range).opts(active_tools=['wheel_zoom', 'pan'])
         self.graph = graph
-        if len(self.data[self.var].dims) > 2 and self.kwargs['extract along']:
-            self.tap_stream.source = graph
-            self.taps_graph = hv.DynamicMap(
-                self.create_taps_graph,
-                streams=[self.tap_stream, self.clear_points])
-            self.output[0] = self.graph * self.taps_graph
-            self.clear_series_button.disabled = False
-        else:
-            self.output[0] = self.graph
-            self.clear_series_button.disabled = True
+        with self.recorder.stage('render'):
+            if len(self.data[self.var].dims) > 2 and self.kwargs['extract along']:
+                self.tap_stream.source = graph
+                self.taps_graph = hv.DynamicMap(
+                    self.create_taps_graph,
+                    streams=[self.tap_stream, self.clear_points])
+                self.output[0] = self.graph * self.taps_graph
+                self.clear_series_button.disabled = False
+            else:
+                self.output[0] = self.graph
+                self.clear_series_button.disabled = True
 
     def create_taps_graph(self, x, y, clear=False):
         """
@@ -394,6 +1141,7 @@ class Dashboard(SigSlot):
         self.series_graph[0] = self.create_series_graph(x, y, color, clear)
         return tapped_map
 
+    @instrument
     def create_series_graph(self, x, y, color, clear=False):
         """
         Extract a series at a given point, and plot it.
@@ -421,6 +1169,9 @@ class Dashboard(SigSlot):
             color = self.taps[-1][-1] if self.taps[-1][-1] else None
             other_dims = [dim for dim in self.kwargs['remaining_dims'] if
                           dim is not extract_along]
+            # members of ensembles are all extracted, for a plume plot
+            plume = {dim: self.kwargs[dim] for dim in other_dims
+                     if self.kwargs.get(dim) in ENSEMBLE}
 
             # to use the value selected in index selector for selecting
             # data to create series. In case of aggregation, plot is
@@ -436,7 +1187,8 @@ class Dashboard(SigSlot):
                             val = dim_sel.value
                             other_dim_sels.update({dim: val})
                             dim_found = True
-                    if not dim_found:  # when dim is used for aggregation
+                    if not dim_found and dim not in plume:
+                        # when dim is used for aggregation
                         val = self.data[dim][0].values
                         other_dim_sels.update({dim: val})
 
@@ -463,15 +1215,40 @@ class Dashboard(SigSlot):
                              " multi-dimensional coords.")
                 return self.series
 
-            if len(other_dims):
-                series_sel.update(other_dim_sels)
-
-            sel_series_data = self.data[self.var]
-            for dim, val in series_sel.items():
-                sel_series_data = sel_val_from_dim(sel_series_data, dim, val)
-
-            series_df = pd.DataFrame({extract_along: self.data[extract_along],
-                                      self.var: np.asarray(sel_series_data)})
+            with self.recorder.stage('selection'):
+                sel_series_data = with_cell_measure(self.data, self.var)
+                for dim, val in series_sel.items():
+                    sel_series_data = sel_val_from_dim(sel_series_data, dim, val)
+                sel_series_data = self.analyse(sel_series_data, series_sel)
+                # values of resampled and interpolated dims are selected after
+                for dim, freq in self.kwargs['dims_to_resample'].items():
+                    sel_series_data = resample(sel_series_data, dim, freq)
+                sel_series_data = self.interpolate(sel_series_data, series_sel)
+                if len(other_dims):
+                    for dim, val in other_dim_sels.items():
+                        sel_series_data = sel_val_from_dim(sel_series_data, dim, val)
+                if extract_along in self.kwargs['dims_to_roll']:
+                    sel_series_data = rolling(
+                        sel_series_data, extract_along,
+                        self.kwargs['dims_to_roll'][extract_along],
+                        self.kwargs['rolling window'])
+
+            members = None
+            if plume:
+                members = sel_series_data.transpose(extract_along, ...)
+                sel_series_data = aggregate(
+                    sel_series_data, plume,
+                    percentile=self.kwargs['percentile'],
+                    threshold=self.kwargs['threshold'])
+            try:
+                with self.recorder.stage('extraction'), self.progress.track():
+                    sel_series_data, members = dask.compute(sel_series_data,
+                                                            members)
+                    series_df = pd.DataFrame({extract_along: sel_series_data[extract_along],
+                                              self.var: np.asarray(sel_series_data)})
+            except Cancelled:
+                return self.series
+            self.recorder.note(sel_series_data)
 
             tooltips = [(extract_along, f"@{extract_along}"),
                         (self.var, f"@{self.var}")]
@@ -480,11 +1257,26 @@ class Dashboard(SigSlot):
                     tooltips.append((dim, str(val)))
             hover = HoverTool(tooltips=tooltips)
 
-            series_map = series_df.hvplot(x=extract_along, y=self.var,
-                                          frame_height=self.kwargs['frame_height'],
-                                          frame_width=self.kwargs['frame_width'],
-                                          tools=[hover])
+            with self.recorder.stage('hvplot'):
+                series_map = series_df.hvplot(x=extract_along, y=self.var,
+                                              frame_height=self.kwargs['frame_height'],
+                                              frame_width=self.kwargs['frame_width'],
+                                              tools=[hover])
             self.series = series_map.opts(color=color) * self.series
+            if members is not None:
+                along = np.asarray(members[extract_along])
+                values = np.asarray(members).reshape((len(along), -1))
+                curves = [hv.Curve((along, values[:, i]), extract_along,
+                                   self.var).opts(color=color, alpha=0.3,
+                                                  line_width=1)
+                          for i in range(values.shape[1])]
+                self.series = hv.Overlay(curves) * self.series
+
+            if (self.kwargs['mode'] == 'correlation' and
+                    self.kwargs['correlate with'] == TAPPED_SERIES):
+                self.correlation_graph[0] = self.create_correlation_graph(
+                    series_sel, other_dim_sels if len(other_dims) else {},
+                    extract_along)
 
         return self.series
 
@@ -541,15 +1333,36 @@ class Dashboard(SigSlot):
         self.data = self.data.set_coords(new_coords)  # this `set_coords` belongs to xr.dataset
         self.control.set_coords(self.data)
 
+    def add_derived(self, definition):
+        """
+        Add the variable defined as ``name = expression`` in the
+        ``Variables`` pane to the data, and select it.
+        """
+        displayer = self.control.displayer
+        try:
+            name, expression = split_definition(definition)
+            self.data = derive(self.data, {name: expression})
+        except ValueError as e:
+            displayer.message.object = str(e)
+            return
+        displayer.message.object = ''
+        displayer.definition.value = ''
+        self.control.set_coords(self.data)
+        displayer.select_variable(name)
+
     def check_is_plottable(self, var):
         """
         Check if a data variable can be plotted.
 
-        If a variable is 1-d, disable plot_button for it.
+        If a variable is 1-d, or has no valid values according to the
+        statistics index, disable plot_button for it.
         """
         self.plot_button.disabled = False  # important to enable button once disabled
         data = self.data[var]
         self.plot_button.disabled = len(data.dims) <= 1
+        if self.stats is not None and self.stats.all_missing(var):
+            logger.warning(f"{var} has no valid values")
+            self.plot_button.disabled = True
 
     def correct_val(self, dim, x):
         """ Convert tapped coordinates to int, if not time-type
@@ -571,6 +1384,25 @@ class Dashboard(SigSlot):
         return len(x_dims) == len(y_dims) == 2 and sorted(x_dims) == sorted(y_dims)
 
 
+#  Number of correlation maps kept in `Dashboard.correlations`.
+CORRELATIONS_CACHED = 16
+
+#  Number of values above which `provisional_limits` applies, and size
+#  of the sample the provisional limits are estimated from.
+PROVISIONAL_SIZE = 10 ** 6
+SAMPLE_SIZE = 10 ** 4
+
+
+def sample_cmap_limits(sel_data, size=SAMPLE_SIZE):
+    """
+    Estimate the colormap limits from about ``size`` evenly spaced values.
+    """
+    step = int(np.ceil((sel_data.size / size) ** (1. / max(sel_data.ndim, 1))))
+    sample = sel_data.isel({dim: slice(None, None, step)
+                            for dim in sel_data.dims})
+    return find_cmap_limits(sample.compute())
+
+
 def find_cmap_limits(sel_data):
     if isinstance(sel_data.data, dask.array.core.Array):
         method = 'tdigest' if has_crick_tdigest else 'default'
@@ -580,6 +1412,22 @@ def find_cmap_limits(sel_data):
         return [float(q) for q in sel_data.quantile([0.1, 0.9])]
 
 
+def frame_key(var, frame):
+    """Key of a frame of a variable, in ``Dashboard.limits_cache``"""
+    return var, tuple(sorted((dim, int(pos)) for dim, pos in frame.items()))
+
+
+def correlated_dim(kwargs):
+    """
+    The dimension along which the selected variable is correlated with
+    another, given the values of the input panes, or None.
+    """
+    if (kwargs['mode'] == 'correlation' and
+            kwargs['correlate with'] != TAPPED_SERIES):
+        return kwargs['extract along']
+    return None
+
+
 def sel_val_from_dim(data, dim, x):
     """ Select values from a dim.
     """
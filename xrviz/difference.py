@@ -0,0 +1,44 @@
+import dask.array
+from .chunking import auto_chunks
+
+#  Option of the ``Analysis`` pane to subtract the same variable from the
+#  dataset opened alongside.
+SECOND_DATASET = 'second dataset'
+
+
+def align(reference, data):
+    """
+    The values of ``reference`` on the grid of ``data``, for each of their
+    dimensions with an index, by nearest neighbours.
+
+    ``reference`` is returned as is if both have the same indexes, and
+    lazily reindexed otherwise.
+    """
+    if set(reference.dims) != set(data.dims):
+        raise ValueError(f"Cannot subtract {reference.name} with dimensions "
+                         f"{reference.dims} from {data.name} with dimensions "
+                         f"{data.dims}")
+    reference = reference.transpose(*data.dims)
+    indexes = {dim: data.get_index(dim) for dim in data.dims
+               if dim in data.indexes and dim in reference.indexes}
+    if all(reference.get_index(dim).equals(index)
+           for dim, index in indexes.items()):
+        return reference
+    kwargs = {}
+    if all(index.is_monotonic_increasing or index.is_monotonic_decreasing
+           for index in indexes.values()):
+        kwargs['method'] = 'nearest'
+    return reference.reindex(indexes, **kwargs)
+
+
+def subtract(data, reference):
+    """
+    ``data - reference``, lazily.
+
+    Data not in a dask array gets chunks of one frame (see
+    ``xrviz.chunking.auto_chunks``). ``reference`` has the dimensions of
+    ``data``, or some of them.
+    """
+    if not isinstance(data.data, dask.array.Array):
+        data = data.chunk(auto_chunks(data, animate=data.dims[:-2]))
+    return (data - reference).transpose(*data.dims).rename(data.name)
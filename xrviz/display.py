@@ -10,6 +10,11 @@ class Display(SigSlot):
     For each data, its variables are displayed in ``pn.widgets.MultiSelect``.
     Variables which are data coordinates are annotated with '📈'.
 
+    Derived variables are defined in ``definition`` as
+    ``name = expression``, e.g. ``speed = sqrt(u**2 + v**2)``. Clicking
+    ``Add`` emits the signal ``derive`` with the definition, for the
+    ``Dashboard`` to add the variable (see ``xrviz.expressions``).
+
     Parameters
     ----------
 
@@ -19,7 +24,8 @@ class Display(SigSlot):
     ----------
 
     panel:
-        A ``panel.Row`` instance which displays the Multiselect widget.
+        A ``panel.Column`` instance which displays the Multiselect widget,
+        and the inputs to define a derived variable.
 
     """
 
@@ -32,13 +38,29 @@ class Display(SigSlot):
             name=self.name)
         self.set_variables()
 
+        self.definition = pn.widgets.TextInput(
+            name='Derived variable', placeholder='name = expression',
+            min_width=100, max_width=200, width_policy='max')
+        self.add_button = pn.widgets.Button(name='Add', width=60,
+                                            align='end')
+        self.message = pn.pane.Markdown('', margin=(0, 10))
+
         self._register(self.select, "variable_selected")
+        self._register(self.add_button, "add_clicked", "clicks")
+        self._register(None, "derive")
+        self.connect("add_clicked", self.add_derived)
 
-        self.panel = pn.Row(self.select)
+        self.panel = pn.Column(self.select,
+                               pn.Row(self.definition, self.add_button),
+                               self.message)
 
     def set_variables(self,):
         self.select.options = [None] + list(self.data.variables)
 
+    def add_derived(self, *args):
+        if self.definition.value:
+            self._emit("derive", self.definition.value)
+
     def select_variable(self, variable):
         """
         Select a data variable from the available options.
@@ -1,6 +1,8 @@
 from .utils3d import *
 from xrviz.sigslot import SigSlot
 from .selection3d import Selection3d
+from .performance import Recorder, instrument
+from .progress import ProgressReporter, cancellable
 import numpy as np
 import panel as pn
 import plotly
@@ -17,9 +19,12 @@ class Display3d(SigSlot):
     """Displays a list of data variables for selection.
     """
 
-    def __init__(self, data, skip_lat=20, skip_lon=20, skip_lev=2,colorscale="inferno"):
+    def __init__(self, data, skip_lat=20, skip_lon=20, skip_lev=2,colorscale="inferno",
+                 recorder=None, progress=None):
         super().__init__()
         self.data = data
+        self.recorder = recorder if recorder is not None else Recorder()
+        self.progress = progress if progress is not None else ProgressReporter()
         self.coords = self.data.coords
         self.sel3d = Selection3d()
         self.skip_lat = int(self.sel3d.kwargs['skip_lat'])
@@ -67,14 +72,19 @@ class Display3d(SigSlot):
     def set_times(self,):
         self.time_select_3d.options = [val for val in self.data.time.data]
 
+    @instrument
+    @cancellable
     def create_cube(self, _):
         var =self.select_var_3d.value
         tval = self.time_select_3d.value
-        self.ds = self.data[var].sel(time=tval).data#.compute()
+        with self.recorder.stage('selection'):
+            self.ds = self.data[var].sel(time=tval).data#.compute()
 
-        self.ds = np.transpose(self.ds, (2,1,0))
-        isomin = round(self.ds.min())
-        isomax = round(self.ds.max())
+            self.ds = np.transpose(self.ds, (2,1,0))
+        self.recorder.note(self.ds)
+        with self.recorder.stage('limits'):
+            isomin = round(self.ds.min())
+            isomax = round(self.ds.max())
 
         volume = plotly.graph_objects.Volume(
             x=self.X.flatten(),
@@ -110,7 +120,8 @@ class Display3d(SigSlot):
                                  mode='lines')
         
         fig = dict(data=[volume, map_lines], layout=plotly_layout)
-        self.data_cube[0] =  pn.pane.Plotly(fig)   
+        with self.recorder.stage('render'):
+            self.data_cube[0] =  pn.pane.Plotly(fig)   
         
     def get_map_X_Y(self,):
         with open("data/INDIA_STATES.json") as json_file:
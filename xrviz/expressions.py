@@ -0,0 +1,194 @@
+import ast
+import functools
+import dask.array
+import numpy as np
+import xarray as xr
+from .chunking import auto_chunks
+from .compatibility import has_numexpr, numexpr
+
+#  Functions allowed in expressions, all evaluated by numexpr but the
+#  last two, which are evaluated with numpy.
+FUNCTIONS = ['sqrt', 'exp', 'log', 'log10', 'abs', 'sin', 'cos', 'tan',
+             'arcsin', 'arccos', 'arctan', 'arctan2', 'sinh', 'cosh', 'tanh',
+             'where', 'minimum', 'maximum']
+
+_NUMPY_ONLY = {'minimum', 'maximum'}
+
+#  Largest constant exponent allowed, so that powers of constants, which
+#  Python computes exactly on integers, stay small.
+MAX_EXPONENT = 64
+
+#  Syntax allowed in expressions: arithmetic, comparisons and logical
+#  operators (``&``, ``|`` and ``~``) on variables, numbers and FUNCTIONS.
+_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call,
+          ast.Name, ast.Load, ast.Constant, ast.Add, ast.Sub, ast.Mult,
+          ast.Div, ast.Pow, ast.Mod, ast.USub, ast.UAdd, ast.Invert,
+          ast.BitAnd, ast.BitOr, ast.Gt, ast.GtE, ast.Lt, ast.LtE, ast.Eq,
+          ast.NotEq)
+
+
+@functools.lru_cache(maxsize=None)
+def _compile(expression):
+    """
+    Check that ``expression`` is safe to evaluate.
+
+    Returns the names of the variables it uses, its code, and whether
+    numexpr can evaluate it. Raises ``ValueError`` otherwise.
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression {expression!r}: {e.msg}")
+    functions = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, _NODES):
+            raise ValueError(f"{type(node).__name__} not allowed in "
+                             f"{expression!r}")
+        if isinstance(node, ast.Call):
+            if (not isinstance(node.func, ast.Name) or node.keywords or
+                    node.func.id not in FUNCTIONS):
+                raise ValueError(f"Only the functions {', '.join(FUNCTIONS)}"
+                                 f" are allowed in {expression!r}")
+            functions.add(node.func.id)
+        if (isinstance(node, ast.Constant) and
+                not isinstance(node.value, (int, float))):
+            raise ValueError(f"{node.value!r} not allowed in {expression!r}")
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+            _check_power(node, expression)
+    names = sorted({node.id for node in ast.walk(tree)
+                    if isinstance(node, ast.Name)} - functions)
+    code = compile(tree, '<expression>', 'eval')
+    return names, code, has_numexpr and not functions & _NUMPY_ONLY
+
+
+def _check_power(node, expression):
+    """
+    Reject powers of powers, and exponents of no variable other than signed
+    numbers up to ``MAX_EXPONENT``, e.g. ``9**9**8`` or ``9**(10**4*10**4)``,
+    which would take Python too long.
+    """
+    for operand in [node.left, node.right]:
+        if any(isinstance(n, ast.BinOp) and isinstance(n.op, ast.Pow)
+               for n in ast.walk(operand)):
+            raise ValueError(f"Nested powers not allowed in {expression!r}")
+    exponent = node.right
+    if any(isinstance(n, ast.Name) and n.id not in FUNCTIONS
+           for n in ast.walk(exponent)):
+        return  # raised element-wise by numpy
+    while (isinstance(exponent, ast.UnaryOp) and
+           isinstance(exponent.op, (ast.USub, ast.UAdd))):
+        exponent = exponent.operand
+    if (not isinstance(exponent, ast.Constant) or
+            abs(exponent.value) > MAX_EXPONENT):
+        raise ValueError(f"Exponents should be variables or numbers up to "
+                         f"{MAX_EXPONENT} in {expression!r}")
+
+
+def parse(expression, names):
+    """
+    Check that ``expression`` is safe to evaluate, and only uses variables
+    among ``names``.
+
+    Returns
+    -------
+    list of the names of the variables used
+    """
+    used, _, _ = _compile(expression)
+    unknown = [name for name in used if name not in names]
+    if unknown:
+        raise ValueError(f"Unknown variables in {expression!r}: "
+                         f"{', '.join(unknown)}")
+    if not used:
+        raise ValueError(f"{expression!r} uses no variable")
+    return used
+
+
+def compute(expression, values):
+    """
+    Evaluate ``expression`` on numpy arrays, with numexpr where possible.
+
+    ``values`` are the arrays of the variables used, by name.
+    """
+    names, code, fast = _compile(expression)
+    with np.errstate(all='ignore'):
+        if fast:
+            return numexpr.evaluate(expression.strip(), local_dict=values)
+        namespace = {name: getattr(np, name) for name in FUNCTIONS}
+        namespace['__builtins__'] = {}
+        return eval(code, namespace, dict(values))
+
+
+def evaluate(data, expression, name=None):
+    """
+    Lazily evaluate ``expression`` on the variables of ``data``.
+
+    The variables are broadcast against each other, and the expression is
+    applied to each chunk of their dask arrays. Variables not in dask
+    arrays get chunks of one frame (see ``xrviz.chunking.auto_chunks``).
+
+    Parameters
+    ----------
+    data: xarray.Dataset
+    expression: str
+        E.g. ``sqrt(u**2 + v**2)``, see ``FUNCTIONS`` for the functions
+        allowed.
+    name: str
+        Name of the result.
+
+    Returns
+    -------
+    xarray.DataArray, with the expression in its attributes
+    """
+    names = parse(expression, list(data.variables))
+    variables = [data[n].reset_coords(drop=True) for n in names]
+    # dimensions in the order of the variable with most of them
+    order = max(variables, key=lambda var: var.ndim).dims
+    arrays = []
+    for var in xr.broadcast(*variables):
+        var = var.transpose(*order, ...)
+        if not isinstance(var.data, dask.array.Array):
+            var = var.chunk(auto_chunks(var, animate=var.dims[:-2]))
+        arrays.append(var)
+    samples = {n: np.ones(1, dtype=a.dtype) for n, a in zip(names, arrays)}
+    dtype = np.asarray(compute(expression, samples)).dtype
+
+    def apply(*values):
+        return compute(expression, dict(zip(names, values)))
+
+    out = xr.apply_ufunc(apply, *arrays, dask='parallelized',
+                         output_dtypes=[dtype])
+    coords = {k: v for k, v in data.coords.items()
+              if set(v.dims) <= set(out.dims)}
+    return out.assign_coords(coords).rename(name).assign_attrs(
+        expression=expression)
+
+
+def derive(data, derived):
+    """
+    Add derived variables to ``data``.
+
+    Parameters
+    ----------
+    data: xarray.Dataset
+    derived: dict
+        Expression of each new variable, by name. Expressions may use the
+        variables derived before them.
+
+    Returns
+    -------
+    xarray.Dataset
+    """
+    for name, expression in derived.items():
+        if name in data.variables:
+            raise ValueError(f"{name} is already a variable")
+        data = data.assign({name: evaluate(data, expression, name)})
+    return data
+
+
+def split_definition(definition):
+    """The name and expression of a definition such as ``speed = sqrt(u)``"""
+    name, sep, expression = definition.partition('=')
+    if not sep or not name.strip().isidentifier() or not expression.strip():
+        raise ValueError(f"Definitions are written as name = expression, "
+                         f"not {definition!r}")
+    return name.strip(), expression.strip()
@@ -3,7 +3,10 @@ from distutils.version import LooseVersion
 import xarray as xr
 import warnings
 from .sigslot import SigSlot
-from .utils import convert_widget
+from .utils import convert_widget, is_float
+from .reductions import ENSEMBLE, RESAMPLING, ROLLING, STATISTICS, is_ensemble_dim
+from .weights import WEIGHTED, grid_dims, with_cell_measure
+from .vertical import INTERPOLATE, is_level_dim, parse_levels, vertical_coords
 from .compatibility import mpcalc
 
 TEXT = """
@@ -45,8 +48,45 @@ class Fields(SigSlot):
             6. ``median``: Creates plot along median of the selected dimension.
             7. ``std``: Creates plot along standard deviation of the selected dimension.
             8. ``count``: Creates plot along non-nan values of the selected dimension.
+            9. ``rolling mean``, ``rolling max``, ``rolling min``,
+               ``rolling sum``: Animates the dimension like ``animate``,
+               showing at each step the aggregation of the last
+               ``rolling window`` values, e.g. a 24-hour running mean of hourly
+               data.
+            10. ``daily mean``, ``monthly mean``, ``seasonal mean``,
+                ``day-of-year climatology``: Only for time dimensions. Animates
+                the means over each day, month, season (DJF, MAM, JJA, SON) or
+                day of the year.
+            11. ``slope``: Creates plot along the least-squares slope of the
+                values against the dimension, per unit of its coordinate (per
+                day for times).
+            12. ``trend``: Creates plot along the linear change over the whole
+                dimension, i.e. ``slope`` times its range.
+            13. ``percentile``: Creates plot along the ``percentile`` of the
+                values along the dimension, approximated in a streaming pass
+                for dask data.
+            14. ``exceedances``: Creates plot along the number of values above
+                ``threshold``.
+            15. ``ensemble mean``, ``ensemble spread``,
+                ``ensemble probability``, ``ensemble percentile``: Only for
+                dimensions of ensemble members (e.g. ``member`` or
+                ``realization``). Creates plot along the mean, standard
+                deviation, probability of exceeding ``threshold`` or
+                ``percentile`` of the members. Series extracted are plotted for
+                every member (plume), with the statistic.
+            16. ``weighted mean``, ``weighted std``: Only for dimensions of
+                latitude/longitude grids. Creates plot along the mean or
+                standard deviation of the values weighted by the areas of their
+                cells, read from the ``cell_measures`` of the variable or
+                derived from its latitude.
+            17. ``interpolate``: Only for vertical dimensions (e.g. ``sigma``
+                or ``level``). Interpolates the variable to the
+                ``target levels`` of the ``vertical coordinate``, a variable
+                along the dimension such as depth or pressure, and selects
+                among them. Without target levels, the levels of the dimension
+                are selected.
 
-        Note that for both ``select`` and ``animate``, the plot will update
+        Note that for ``select``, ``animate`` and the rolling aggregations, the plot will update
         according to the value selected in the generated widget. Also, if a
         dimension has been aggregated, its select widget would not be
         available.
@@ -67,12 +107,34 @@ class Fields(SigSlot):
         agg_header = pn.pane.Markdown('### Aggregations', margin=(0, 20, 0, 20))
         self.agg_selectors = pn.Column()
         self.agg_opts = ['select', 'animate', 'mean', 'max',
-                         'min', 'median', 'std', 'count']
+                         'min', 'median', 'std', 'count'] + [
+                            f'rolling {agg}' for agg in ROLLING] + STATISTICS
+        self.window = pn.widgets.IntSlider(name='rolling window', value=3,
+                                           start=1, end=100, width=240,
+                                           margin=(0, 20, 20, 20))
+        self.percentile = pn.widgets.FloatSlider(name='percentile', value=95.,
+                                                 start=0., end=100., step=0.5,
+                                                 width=240,
+                                                 margin=(0, 20, 20, 20))
+        self.threshold = pn.widgets.TextInput(name='threshold', value='0',
+                                              width=240,
+                                              margin=(0, 20, 20, 20))
+        self.vertical = pn.widgets.Select(name='vertical coordinate',
+                                          options=[], width=240,
+                                          margin=(0, 20, 20, 20))
+        self.levels = pn.widgets.TextInput(name='target levels', value='',
+                                           placeholder='e.g. 500, 850',
+                                           width=240, margin=(0, 20, 20, 20))
         self.series_col = pn.Column()
         self.are_var_coords = False
 
         self._register(self.x, 'x')
         self._register(self.y, 'y')
+        self._register(self.window, 'window')
+        self._register(self.percentile, 'percentile')
+        self._register(self.threshold, 'threshold')
+        self._register(self.vertical, 'vertical')
+        self._register(self.levels, 'levels')
 
         self.connect('x', self.change_y)
         self.connect('y', self.change_dim_selectors)
@@ -83,8 +145,9 @@ class Fields(SigSlot):
                 pn.WidgetBox(dim_header, self.x, self.y,
                              background=(240, 240, 240)),
                 pn.Spacer(),
-                pn.WidgetBox(agg_header, self.agg_selectors,
-                             background=(240, 240, 240))
+                pn.WidgetBox(agg_header, self.agg_selectors, self.window,
+                             self.percentile, self.threshold, self.vertical,
+                             self.levels, background=(240, 240, 240))
             ),
             self.series_col,
             name='Axes')
@@ -162,6 +225,10 @@ class Fields(SigSlot):
             self.remaining_dims = [dim for dim in self.var_dims
                                    if dim not in dims_not_to_agg]
 
+        if self.remaining_dims:
+            sizes = [self.data[self.var].sizes[dim] for dim in self.remaining_dims]
+            self.window.end = max(max(sizes), self.window.start + 1)
+        vertical = []
         for i, dim in enumerate(sorted(self.remaining_dims)):
             if i == 0 and i == (len(self.remaining_dims)-1):
                 margin = (0, 20, 20, 20)
@@ -171,11 +238,23 @@ class Fields(SigSlot):
                 margin = (5, 20, 20, 20)
             else:
                 margin = (0, 20, 5, 20)
+            options = self.agg_opts.copy()
+            if self.data[dim].dtype.kind == 'M':  # calendar for datetimes
+                options += list(RESAMPLING)
+            if is_ensemble_dim(self.data, dim):
+                options += ENSEMBLE
+            if dim in grid_dims(with_cell_measure(self.data, self.var)):
+                options += WEIGHTED
+            if is_level_dim(self.data, dim):
+                options += [INTERPOLATE]
+                vertical += vertical_coords(self.data, self.var, dim)
             agg_selector = pn.widgets.Select(name=dim,
-                                             options=self.agg_opts,
+                                             options=options,
                                              width=240, margin=margin)
             self._register(agg_selector, agg_selector.name)
             self.agg_selectors.append(agg_selector)
+        self.vertical.options = vertical
+        self.vertical.disabled = self.levels.disabled = not vertical
 
         self.s_selector = pn.widgets.Select(name='extract along',
                                             options=[None]+sorted(self.remaining_dims),
@@ -184,7 +263,9 @@ class Fields(SigSlot):
         self.series_col.append(self.s_selector)
 
     def setup_initial_values(self, init_params={}):
-        for widget in [self.x, self.y] + list(self.agg_selectors) + list(self.series_col):
+        for widget in ([self.x, self.y, self.window, self.percentile,
+                        self.threshold, self.vertical, self.levels] +
+                       list(self.agg_selectors) + list(self.series_col)):
             if widget.name in init_params:
                 widget.value = init_params[widget.name]
 
@@ -205,10 +286,29 @@ class Fields(SigSlot):
         out = {p.name: p.value for p in self.panel[1][0][1:]}  # since panel[0][0][1] is Markdown
         selectors = {p.name: p.value for p in self.panel[1][2][1]}  # remaining_dims
         out.update(selectors)
-        dims_to_select_animate = [dim for dim, agg in selectors.items() if agg in ['select', 'animate']]
+        dims_to_roll = {dim: agg.split()[1] for dim, agg in selectors.items()
+                        if agg.startswith('rolling')}
+        dims_to_resample = {dim: RESAMPLING[agg] for dim, agg in selectors.items()
+                            if agg in RESAMPLING}
+        levels = parse_levels(self.levels.value)
+        dims_to_interpolate = {dim: levels for dim, agg in selectors.items()
+                               if agg == INTERPOLATE and levels and
+                               self.vertical.value is not None}
+        # rolled, resampled and interpolated dims are selected or animated too
+        dims_to_select_animate = [dim for dim, agg in selectors.items()
+                                  if agg in ['select', 'animate', INTERPOLATE] or
+                                  dim in dims_to_roll or dim in dims_to_resample]
         dims_to_agg = [dim for dim in selectors
                        if dim not in dims_to_select_animate]
         out.update({'dims_to_agg': dims_to_agg})
+        out.update({'dims_to_roll': dims_to_roll})
+        out.update({'dims_to_resample': dims_to_resample})
+        out.update({'dims_to_interpolate': dims_to_interpolate})
+        out.update({'vertical coordinate': self.vertical.value})
+        out.update({'rolling window': self.window.value})
+        out.update({'percentile': self.percentile.value})
+        threshold = self.threshold.value
+        out.update({'threshold': float(threshold) if is_float(threshold) else 0.})
         out.update({'dims_to_select_animate': sorted(dims_to_select_animate)})
         out.update({'are_var_coords': self.are_var_coords})
         # remaining_dims = dims_to_agg + dims_to_select_animate
@@ -0,0 +1,171 @@
+import numba
+import numpy as np
+
+#  Number of values above which numpy-backed data is reduced by the
+#  kernels of this module, rather than by xarray. None to never use them.
+KERNEL_SIZE = 2 ** 22
+
+#  Aggregations with a kernel.
+AGGREGATIONS = ['mean', 'max', 'min', 'median', 'std', 'count']
+
+#  Number of columns processed by one thread at a time, so that each thread
+#  reads contiguous memory.
+BLOCK = 4096
+
+#  The kernels reduce 3-d arrays along their middle axis, NaNs being
+#  skipped, and run in parallel over the first axis and blocks of columns of
+#  the last. The inner loops are written without branches, so that they are
+#  vectorized. Kernels are compiled on first use for each dtype, and cached
+#  on disk.
+
+
+@numba.njit(parallel=True, cache=True)
+def _nansum_count(values):
+    p, n, m = values.shape
+    blocks = (m + BLOCK - 1) // BLOCK
+    sums = np.zeros((p, m))
+    counts = np.zeros((p, m), dtype=np.int64)
+    for k in numba.prange(p * blocks):
+        a, b = k // blocks, k % blocks
+        s = sums[a, b * BLOCK:(b + 1) * BLOCK]
+        c = counts[a, b * BLOCK:(b + 1) * BLOCK]
+        for i in range(n):
+            row = values[a, i, b * BLOCK:(b + 1) * BLOCK]
+            for j in range(s.shape[0]):
+                valid = row[j] == row[j]  # False for NaNs
+                s[j] += row[j] if valid else 0.
+                c[j] += valid
+    return sums, counts
+
+
+@numba.njit(parallel=True, cache=True)
+def _nansquares(values, means):
+    p, n, m = values.shape
+    blocks = (m + BLOCK - 1) // BLOCK
+    squares = np.zeros((p, m))
+    for k in numba.prange(p * blocks):
+        a, b = k // blocks, k % blocks
+        s = squares[a, b * BLOCK:(b + 1) * BLOCK]
+        mean = means[a, b * BLOCK:(b + 1) * BLOCK]
+        for i in range(n):
+            row = values[a, i, b * BLOCK:(b + 1) * BLOCK]
+            for j in range(s.shape[0]):
+                d = row[j] - mean[j]
+                s[j] += d * d if row[j] == row[j] else 0.
+    return squares
+
+
+@numba.njit(parallel=True, cache=True)
+def _nanmax(values):
+    p, n, m = values.shape
+    blocks = (m + BLOCK - 1) // BLOCK
+    out = np.full((p, m), -np.inf, dtype=values.dtype)
+    for k in numba.prange(p * blocks):
+        a, b = k // blocks, k % blocks
+        o = out[a, b * BLOCK:(b + 1) * BLOCK]
+        for i in range(n):
+            row = values[a, i, b * BLOCK:(b + 1) * BLOCK]
+            for j in range(o.shape[0]):
+                o[j] = row[j] if row[j] > o[j] else o[j]  # False for NaNs
+    return _all_nan(values, out, -np.inf)
+
+
+@numba.njit(parallel=True, cache=True)
+def _nanmin(values):
+    p, n, m = values.shape
+    blocks = (m + BLOCK - 1) // BLOCK
+    out = np.full((p, m), np.inf, dtype=values.dtype)
+    for k in numba.prange(p * blocks):
+        a, b = k // blocks, k % blocks
+        o = out[a, b * BLOCK:(b + 1) * BLOCK]
+        for i in range(n):
+            row = values[a, i, b * BLOCK:(b + 1) * BLOCK]
+            for j in range(o.shape[0]):
+                o[j] = row[j] if row[j] < o[j] else o[j]
+    return _all_nan(values, out, np.inf)
+
+
+@numba.njit(cache=True)
+def _all_nan(values, out, initial):
+    """Set to NaN the columns left at ``initial`` which are all NaNs"""
+    for a in range(out.shape[0]):
+        for j in range(out.shape[1]):
+            if out[a, j] == initial:
+                for i in range(values.shape[1]):
+                    if not np.isnan(values[a, i, j]):
+                        break
+                else:
+                    out[a, j] = np.nan
+    return out
+
+
+@numba.njit(parallel=True, cache=True)
+def _nanmedian(values):
+    p, n, m = values.shape
+    out = np.full((p, m), np.nan)
+    for k in numba.prange(p * m):
+        a, j = k // m, k % m
+        column = np.empty(n)
+        c = 0
+        for i in range(n):
+            v = values[a, i, j]
+            if not np.isnan(v):
+                column[c] = v
+                c += 1
+        if c:
+            out[a, j] = np.median(column[:c])
+    return out
+
+
+def _mean(sums, counts):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def applies(values, agg, axes=()):
+    """
+    Whether ``reduce`` should be used to aggregate ``values`` along
+    ``axes``. Reductions along the last axis are left to xarray, since
+    its values are contiguous and the kernels only vectorize over the
+    kept axes which follow the reduced ones.
+    """
+    return (KERNEL_SIZE is not None and agg in AGGREGATIONS and
+            isinstance(values, np.ndarray) and values.dtype.kind == 'f' and
+            values.size >= KERNEL_SIZE and values.ndim - 1 not in axes)
+
+
+def reduce(values, agg, axes):
+    """
+    NaN-aware reduction of a numpy array along ``axes``, in parallel.
+
+    Gives the same results as the xarray aggregations, i.e. NaNs are
+    skipped, ``std`` has no degrees of freedom correction and reducing NaNs
+    only gives NaN (or a count of 0).
+
+    Consecutive ``axes`` of a C-contiguous array are reduced without
+    copying it, wherever they are. Otherwise, the array is copied with the
+    reduced axes first, e.g. to reduce its first and third axes.
+    """
+    axes = sorted(axes)
+    shape = [size for i, size in enumerate(values.shape) if i not in axes]
+    if axes != list(range(axes[0], axes[0] + len(axes))):
+        values = np.moveaxis(values, axes, list(range(len(axes))))
+        axes = list(range(len(axes)))
+    first, last = axes[0], axes[-1] + 1
+    values = values.reshape((int(np.prod(values.shape[:first])),
+                             int(np.prod(values.shape[first:last])),
+                             int(np.prod(values.shape[last:]))))
+    if agg in ['mean', 'std', 'count']:
+        sums, counts = _nansum_count(values)
+        if agg == 'count':
+            return counts.reshape(shape)
+        out = _mean(sums, counts)
+        if agg == 'std':
+            out = np.sqrt(_mean(_nansquares(values, out), counts))
+    elif agg == 'max':
+        out = _nanmax(values)
+    elif agg == 'min':
+        out = _nanmin(values)
+    else:
+        out = _nanmedian(values)
+    return out.astype(values.dtype).reshape(shape)
@@ -0,0 +1,374 @@
+import collections
+import contextlib
+import functools
+import os
+import time
+import tracemalloc
+import pandas as pd
+import panel as pn
+from dask.callbacks import Callback
+from dask.sizeof import sizeof
+from .sigslot import SigSlot
+from .compatibility import logger, has_psutil
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+TEXT = """
+Time spent in each stage of the last plotting calls, and the memory they
+used (in bytes). Note that, for dask data, aggregation is lazy and its cost
+shows up in the stage which first computes values (usually ``cmap limits``
+or ``render``).
+"""
+
+
+class Invocation(object):
+    """
+    Measurements for one call of a plotting method.
+
+    Attributes
+    ----------
+    name:
+        Name of the instrumented method.
+    stages:
+        Mapping of stage name to seconds spent in it, in the order in
+        which the stages first ran.
+    info:
+        Sizes noted during the call, such as ``bytes`` and ``shape``.
+    hits, misses:
+        Number of cache lookups which did or did not find a value.
+    total:
+        Wall time of the whole call, in seconds.
+    memory:
+        Memory measurements in bytes, see ``MemoryProbe``.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.stages = collections.OrderedDict()
+        self.info = {}
+        self.hits = 0
+        self.misses = 0
+        self.total = None
+        self.memory = {}
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time the enclosed block as the named stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = (self.stages.get(name, 0.) +
+                                 time.perf_counter() - start)
+
+    def note(self, data=None, **info):
+        """Record the size of ``data`` and/or any other given values"""
+        if data is not None:
+            info.update({'bytes': int(data.nbytes),
+                         'shape': tuple(data.shape)})
+        self.info.update(info)
+
+    def cache(self, hit):
+        """Record a cache lookup"""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def finish(self):
+        self.total = time.perf_counter() - self._start
+
+
+class _NullInvocation(object):
+    """Stands in for ``Invocation`` while recording is disabled"""
+    def stage(self, name):
+        return contextlib.nullcontext()
+
+    def note(self, data=None, **info):
+        pass
+
+    def cache(self, hit):
+        pass
+
+
+_null_invocation = _NullInvocation()
+
+
+class _TaskMemory(Callback):
+    """Sizes of the results of the dask tasks run by local schedulers"""
+    def __init__(self):
+        super().__init__()
+        self.total = 0
+        self.largest = 0
+
+    def _posttask(self, key, result, dsk, state, id):
+        size = sizeof(result)
+        self.total += size
+        self.largest = max(self.largest, size)
+
+
+def rss():
+    """Resident set size of this process in bytes, or None if unknown"""
+    if has_psutil:
+        import psutil
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _max_rss():
+    """High-water mark of the resident set size in bytes, or None"""
+    if resource is None:
+        return None
+    # kilobytes on Linux, bytes on macOS
+    scale = 1 if os.uname().sysname == 'Darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class MemoryProbe(object):
+    """
+    Measures the memory used between ``start`` and ``stop``.
+
+    ``stop`` returns a dict with the following entries, in bytes, leaving
+    out those which cannot be measured here:
+
+        - ``rss delta``: change of the resident set size of the process.
+        - ``rss peak increase``: how much the high-water mark of the resident
+          set size rose. This catches spikes freed before the end.
+        - ``heap delta``, ``heap peak``: change and peak of the Python heap,
+          relative to the start. Only with ``trace_heap``, as tracemalloc
+          slows down allocations.
+        - ``dask bytes``, ``dask largest task``: total and largest size of
+          the results of dask tasks run by a local scheduler.
+    """
+
+    def __init__(self, trace_heap=False):
+        self.trace_heap = trace_heap
+
+    def start(self):
+        self._rss, self._max_rss = rss(), _max_rss()
+        self._started_tracing = False
+        if self.trace_heap:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            elif hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            self._heap = tracemalloc.get_traced_memory()[0]
+        self._tasks = _TaskMemory()
+        self._tasks.register()
+
+    def stop(self):
+        self._tasks.unregister()
+        out = {'dask bytes': self._tasks.total,
+               'dask largest task': self._tasks.largest}
+        if self.trace_heap:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._started_tracing:
+                tracemalloc.stop()
+            out.update({'heap delta': current - self._heap,
+                        'heap peak': peak - self._heap})
+        now, high = rss(), _max_rss()
+        if now is not None and self._rss is not None:
+            out['rss delta'] = now - self._rss
+        if high is not None and self._max_rss is not None:
+            out['rss peak increase'] = high - self._max_rss
+        return out
+
+    @staticmethod
+    def peak(memory):
+        """Largest memory increase found in the output of ``stop``"""
+        return max([memory.get(k) or 0 for k in
+                    ['rss delta', 'rss peak increase', 'heap peak']])
+
+
+class Recorder(SigSlot):
+    """
+    Keeps the ``Invocation`` records of the last ``maxlen`` plotting calls.
+
+    The anonymous signal ``recorded`` is emitted with each finished record.
+    While disabled, ``invocation`` yields a no-op record.
+
+    Memory is measured around each invocation with a ``MemoryProbe``. When
+    its peak exceeds ``memory_threshold`` bytes, a warning is logged and the
+    anonymous signal ``memory_exceeded`` is emitted with the record.
+
+    The methods ``stage``, ``note`` and ``cache`` apply to the invocation
+    in progress, so that instrumentation points need not pass it around.
+    """
+
+    def __init__(self, enabled=False, maxlen=20, memory_threshold=None,
+                 trace_heap=False):
+        super().__init__()
+        self.enabled = enabled
+        self.records = collections.deque(maxlen=maxlen)
+        self.memory_threshold = memory_threshold
+        self.trace_heap = trace_heap
+        self._active = None
+        self._register(None, 'recorded')
+        self._register(None, 'memory_exceeded')
+
+    @contextlib.contextmanager
+    def invocation(self, name):
+        """Record the enclosed block as a call of the method ``name``
+
+        Nested calls are accounted to the outermost invocation.
+        """
+        if not self.enabled:
+            yield _null_invocation
+        elif self._active is not None:
+            yield self._active
+        else:
+            self._active = Invocation(name)
+            probe = MemoryProbe(trace_heap=self.trace_heap)
+            probe.start()
+            try:
+                yield self._active
+            finally:
+                record, self._active = self._active, None
+                record.memory = probe.stop()
+                record.finish()
+                self.records.append(record)
+                self._emit('recorded', record)
+                self._check_memory(record)
+
+    def _check_memory(self, record):
+        peak = MemoryProbe.peak(record.memory)
+        if self.memory_threshold is not None and peak > self.memory_threshold:
+            logger.warning(f"{record.name} used {peak / 2**20:.1f} MiB, "
+                           f"more than the threshold of "
+                           f"{self.memory_threshold / 2**20:.1f} MiB")
+            self._emit('memory_exceeded', record)
+
+    @property
+    def current(self):
+        """The invocation in progress, or a no-op one"""
+        return self._active if self._active is not None else _null_invocation
+
+    def stage(self, name):
+        return self.current.stage(name)
+
+    def note(self, data=None, **info):
+        self.current.note(data, **info)
+
+    def cache(self, hit):
+        self.current.cache(hit)
+
+    def memory_report(self):
+        """Memory measurements of the recorded invocations, most recent first"""
+        return pd.DataFrame([dict(call=record.name, **record.memory)
+                             for record in reversed(self.records)])
+
+    def to_dataframe(self):
+        """One row per recorded invocation, most recent first"""
+        rows = []
+        for record in reversed(self.records):
+            row = collections.OrderedDict(call=record.name,
+                                          total=record.total)
+            row.update(record.stages)
+            row.update(record.info)
+            row.update(record.memory)
+            row['cache hit rate'] = record.hit_rate
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+
+def instrument(method):
+    """Record calls of a method with the ``recorder`` of its instance"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.recorder.invocation(method.__name__):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class Performance(SigSlot):
+    """
+    A pane showing a per-stage timing breakdown of the last plotting calls.
+
+    Parameters
+    ----------
+    enabled: bool
+        Whether to record timings. The pane is added to the interface only
+        when enabled.
+    memory_threshold: int
+        Warn about plotting calls using more memory than this, in bytes.
+        Setting it turns recording on, even when the pane is not shown.
+
+    Attributes
+    ----------
+    recorder:
+        A ``Recorder`` instance, to be passed to the instrumented classes.
+    history:
+        To select how many of the last calls are kept.
+    clear_button:
+        Clears the records.
+    trace_heap:
+        Whether to also measure the Python heap with tracemalloc, which
+        slows down the plotting calls.
+    """
+
+    def __init__(self, enabled=False, memory_threshold=None):
+        super().__init__()
+        self.recorder = Recorder(
+            enabled=enabled or memory_threshold is not None,
+            memory_threshold=memory_threshold)
+        self.history = pn.widgets.IntSlider(name='history', value=20,
+                                            start=1, end=100)
+        self.clear_button = pn.widgets.Button(name='Clear', width=100)
+        self.trace_heap = pn.widgets.Checkbox(name='trace python heap',
+                                              value=False)
+        self.alert = pn.pane.Markdown('', margin=(0, 10))
+        self.table = pn.pane.HTML('', width_policy='max')
+
+        self._register(self.history, 'history')
+        self._register(self.clear_button, 'clear', 'clicks')
+        self._register(self.trace_heap, 'trace_heap')
+        self.connect('history', self.set_history)
+        self.connect('clear', self.clear)
+        self.connect('trace_heap', self.set_trace_heap)
+        self.recorder.connect('recorded', self.update)
+        self.recorder.connect('memory_exceeded', self.warn)
+
+        self.panel = pn.Column(
+            pn.pane.Markdown(TEXT, margin=(0, 10)),
+            pn.Row(self.history, self.clear_button, self.trace_heap),
+            self.alert,
+            self.table,
+            name='Performance'
+        )
+
+    def set_trace_heap(self, value):
+        self.recorder.trace_heap = value
+
+    def warn(self, record):
+        peak = MemoryProbe.peak(record.memory)
+        self.alert.object = (f"**Warning:** `{record.name}` used "
+                             f"{peak / 2**20:.1f} MiB of memory.")
+
+    def set_history(self, maxlen):
+        self.recorder.records = collections.deque(self.recorder.records,
+                                                  maxlen=maxlen)
+        self.update()
+
+    def clear(self, *args):
+        self.recorder.records.clear()
+        self.alert.object = ''
+        self.update()
+
+    def update(self, *args):
+        df = self.recorder.to_dataframe()
+        self.table.object = df.to_html(index=False, na_rep='',
+                                       float_format='{:.4g}'.format)
@@ -0,0 +1,188 @@
+import math
+import dask
+import dask.array
+import numpy as np
+from .reductions import histogram_nbytes
+
+#  Temporaries allocated by each aggregation, as a multiple of its input.
+#  `median` and `percentile` copy their input to partition it, `std` holds
+#  the squared deviations as well, `count` and `exceedances` hold a boolean
+#  mask, `slope`, `trend`, the weighted and the ensemble statistics hold
+#  the products of the sums they reduce. Quantiles of dask data also hold
+#  the histograms of ``xrviz.reductions.approximate_quantile``.
+TEMPORARIES = {'mean': 1., 'max': 0., 'min': 0., 'median': 1., 'std': 2.,
+               'count': 0.125, 'percentile': 1., 'exceedances': 0.125,
+               'slope': 3., 'trend': 3., 'ensemble mean': 3.,
+               'ensemble spread': 3., 'ensemble probability': 3.,
+               'ensemble percentile': 1., 'weighted mean': 3.,
+               'weighted std': 3.}
+
+#  Fewest samples kept along a dimension by the `approximate` strategy.
+MIN_SAMPLES = 32
+
+
+class Plan(object):
+    """
+    How an aggregation will be carried out, given a memory budget.
+
+    Attributes
+    ----------
+    bytes_touched:
+        Estimated number of bytes read by the exact operation.
+    peak_bytes:
+        Estimated peak memory of the exact operation.
+    strategy:
+        One of
+
+            - ``exact``: the operation fits the budget.
+            - ``chunked``: numpy-backed data is evaluated chunk by chunk with
+              dask, which gives the exact result.
+            - ``approximate``: medians are computed from evenly spaced
+              samples along the aggregated dimensions.
+            - ``coarsened``: a preview is computed from every ``n``-th
+              value along ``x`` and ``y``.
+            - ``confirm``: the operation is over budget and the user must
+              confirm it.
+    steps:
+        Stride along each dimension, for ``approximate`` and ``coarsened``.
+    chunks:
+        Chunks of the data, for ``chunked``.
+    """
+
+    def __init__(self, bytes_touched, peak_bytes, strategy='exact',
+                 steps=None, chunks=None):
+        self.bytes_touched = bytes_touched
+        self.peak_bytes = peak_bytes
+        self.strategy = strategy
+        self.steps = steps or {}
+        self.chunks = chunks or {}
+
+    def index(self, data):
+        """Take the samples of ``data`` used by the strategy"""
+        steps = {dim: slice(None, None, step)
+                 for dim, step in self.steps.items() if dim in data.dims}
+        return data.isel(**steps) if steps else data
+
+    def apply(self, data):
+        """Adapt ``data`` to the strategy, before aggregating it"""
+        chunks = {dim: size for dim, size in self.chunks.items()
+                  if dim in data.dims}
+        return self.index(data).chunk(chunks) if chunks else self.index(data)
+
+    @property
+    def description(self):
+        mib = 2 ** 20
+        text = (f"Estimated {self.bytes_touched / mib:.1f} MiB read, "
+                f"{self.peak_bytes / mib:.1f} MiB peak memory")
+        if self.strategy == 'chunked':
+            text += "; evaluating in chunks"
+        elif self.strategy == 'approximate':
+            text += "; medians approximated from every " + ", ".join(
+                f"{step}th {dim}" for dim, step in self.steps.items())
+        elif self.strategy == 'coarsened':
+            text += "; showing a preview from every " + ", ".join(
+                f"{step}th {dim}" for dim, step in self.steps.items())
+        return text + "."
+
+
+def _nbytes(data, selection):
+    """Bytes of ``data`` left after indexing ``selection``"""
+    size = data.size
+    for dim in selection:
+        if dim in data.dims:
+            size //= data.sizes[dim]
+    return size * data.dtype.itemsize
+
+
+def _n_workers():
+    return dask.config.get('num_workers', None) or dask.system.CPU_COUNT
+
+
+def estimate(data, aggs, selection=(), approximate=False):
+    """
+    Estimate bytes touched and peak memory of aggregating ``data``.
+
+    Parameters
+    ----------
+    data: xarray.DataArray
+    aggs: dict
+        Aggregation for each dimension to aggregate, e.g. ``{'time': 'mean'}``.
+    selection: iterable
+        Dimensions selected at a single value before aggregating.
+    approximate: bool
+        Whether medians of dask data are approximated in a streaming pass,
+        see ``xrviz.reductions.approximate_quantile``.
+
+    Returns
+    -------
+    (bytes_touched, peak_bytes)
+    """
+    touched = _nbytes(data, selection)
+    factor = 1 + max([TEMPORARIES.get(agg, 1.) for agg in aggs.values()] or [0])
+    if isinstance(data.data, dask.array.Array):
+        chunks = dict(zip(data.dims, data.chunks))
+        chunk = data.dtype.itemsize * np.prod(
+            [1 if dim in selection else
+             # the chunks must span the whole dimension for an exact median
+             data.sizes[dim] if aggs.get(dim) == 'median' and not approximate
+             else max(c)
+             for dim, c in chunks.items()])
+        peak = min(touched, chunk * _n_workers()) * factor
+        quantiles = ['percentile', 'median'] if approximate else ['percentile']
+        histograms = [data.get_axis_num(dim) for dim, agg in aggs.items()
+                      if dim in data.dims and agg in quantiles]
+        if histograms:
+            chunks = [(1,) if dim in selection else c
+                      for dim, c in chunks.items()]
+            peak += histogram_nbytes(chunks, histograms) * _n_workers()
+    else:
+        loaded = data.variable._in_memory
+        peak = touched * (factor if loaded else factor + 1)
+    return touched, int(peak)
+
+
+def plan(data, aggs, budget, spatial=(), selection=(), confirm=False,
+         approximate=False):
+    """
+    Choose how to aggregate ``data`` within ``budget`` bytes of memory.
+
+    Parameters as for ``estimate``, plus
+
+    budget: int
+        Memory budget in bytes. No limit if None.
+    spatial: iterable
+        Dimensions of the plotted axes, which may be coarsened.
+    confirm: bool
+        If True, ask for confirmation rather than degrading an operation
+        which is over budget.
+
+    Returns
+    -------
+    ``Plan``
+    """
+    touched, peak = estimate(data, aggs, selection, approximate)
+    if budget is None or peak <= budget:
+        return Plan(touched, peak)
+    if confirm:
+        return Plan(touched, peak, 'confirm')
+
+    ratio = peak / budget
+    medians = [dim for dim, agg in aggs.items() if agg == 'median']
+    if not medians and not isinstance(data.data, dask.array.Array):
+        # chunks along the largest dimension which is kept
+        kept = [dim for dim in data.dims
+                if dim not in aggs and dim not in selection]
+        if kept:
+            dim = max(kept, key=lambda d: data.sizes[d])
+            size = max(1, int(data.sizes[dim] / (ratio * _n_workers())))
+            return Plan(touched, peak, 'chunked', chunks={dim: size})
+
+    if medians:
+        dim = max(medians, key=lambda d: data.sizes[d])
+        step = math.ceil(ratio)
+        if data.sizes[dim] // step >= MIN_SAMPLES:
+            return Plan(touched, peak, 'approximate', steps={dim: step})
+
+    step = math.ceil(math.sqrt(ratio))
+    return Plan(touched, peak, 'coarsened',
+                steps={dim: step for dim in spatial if dim in data.dims})
@@ -0,0 +1,135 @@
+import contextlib
+import functools
+import threading
+import time
+import panel as pn
+from dask.callbacks import Callback
+from .sigslot import SigSlot, _on_document
+from .compatibility import logger
+
+
+class Cancelled(Exception):
+    """Raised within a computation stopped by the user"""
+
+
+class _ProgressCallback(Callback):
+    """
+    Reports the tasks completed by local dask schedulers, for the
+    computations started by the thread tracking them.
+    """
+    def __init__(self, reporter):
+        super().__init__()
+        self.reporter = reporter
+        self.thread = threading.get_ident()
+
+    def _tracked(self):
+        # callbacks are global: leave the computations of other threads be,
+        # e.g. the warm-up and the exact colormap limits
+        return threading.get_ident() == self.thread
+
+    def _start_state(self, dsk, state):
+        if self._tracked():
+            self.reporter._start_computation()
+
+    def _pretask(self, key, dsk, state):
+        if self._tracked() and self.reporter.cancelled:
+            raise Cancelled()
+
+    def _posttask(self, key, result, dsk, state, id):
+        if not self._tracked():
+            return
+        done = len(state['finished'])
+        total = done + sum(len(state[k]) for k in ['ready', 'waiting', 'running'])
+        self.reporter._update(done, total)
+
+
+class ProgressReporter(SigSlot):
+    """
+    Shows the progress of dask computations, and stops them on demand.
+
+    The progress bar counts the tasks completed by the computations run
+    within ``track``, by the thread running it. Clicking ``Stop`` makes the
+    next task raise ``Cancelled``, which aborts the computation.
+
+    Note that this applies to dask's local schedulers only. Also, the
+    click is only handled if the server is free to process it, e.g. when
+    the computation runs in the background, as the graphs of a served
+    dashboard do.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.bar = pn.widgets.Progress(name='Progress', value=0, max=100,
+                                       width=200, margin=(15, 10))
+        self.stop_button = pn.widgets.Button(name='Stop', width=100,
+                                             disabled=True)
+        self._register(self.stop_button, 'stop', 'clicks')
+        self.connect('stop', self.cancel)
+        self.panel = pn.Row(self.bar, self.stop_button)
+        self._cancel = threading.Event()
+        self._tracking = 0
+        self._last_update = 0.
+
+    @property
+    def tracking(self):
+        return self._tracking > 0
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self, *args):
+        """Stop the computations being tracked"""
+        if self.tracking:
+            self._cancel.set()
+
+    @contextlib.contextmanager
+    def track(self):
+        """Report the progress of dask computations run within this block"""
+        if self.tracking:  # nested
+            yield
+            return
+        self._tracking += 1
+        self._cancel.clear()
+        self._set(0, stop_enabled=True)
+        try:
+            with _ProgressCallback(self):
+                yield
+        finally:
+            self._tracking -= 1
+            self._set(0, stop_enabled=False)
+
+    def _start_computation(self):
+        self._last_update = 0.
+        self._set(0)
+
+    def _update(self, done, total):
+        now = time.perf_counter()
+        if done == total or now - self._last_update > 0.1:
+            self._last_update = now
+            self._set(int(100 * done / max(total, 1)))
+
+    def _set(self, value, stop_enabled=None):
+        def update():
+            self.bar.value = value
+            if stop_enabled is not None:
+                self.stop_button.disabled = not stop_enabled
+        _on_document(update)
+
+
+def cancellable(method):
+    """
+    Track the progress of a method with the ``progress`` of its instance.
+
+    If the user stops it, the method returns None.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.progress.tracking:
+            return method(self, *args, **kwargs)
+        try:
+            with self.progress.track():
+                return method(self, *args, **kwargs)
+        except Cancelled:
+            logger.info(f"{method.__name__} stopped by the user")
+    return wrapper
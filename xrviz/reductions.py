@@ -0,0 +1,599 @@
+import collections
+import dask
+import dask.array
+import numpy as np
+import pandas as pd
+import xarray as xr
+from . import kernels
+from .weights import WEIGHTED, weighted
+
+#  Number of bins of the histograms approximate quantiles are read from.
+QUANTILE_BINS = 256
+
+#  Number of points whose histograms are counted at once, which bounds the
+#  temporaries of ``approximate_quantile`` whatever the size of the chunks.
+HISTOGRAM_POINTS = 4096
+
+#  Aggregations of the trend and distribution of values along dimensions.
+STATISTICS = ['slope', 'trend', 'percentile', 'exceedances']
+
+#  Aggregations of the members of ensembles, offered for dimensions named
+#  as in ENSEMBLE_DIMS or with the CF standard name `realization`.
+ENSEMBLE = ['ensemble mean', 'ensemble spread', 'ensemble probability',
+            'ensemble percentile']
+ENSEMBLE_DIMS = ['member', 'members', 'realization', 'ensemble', 'number']
+
+
+def aggregate(data, aggs, approximate=False, percentile=95., threshold=0.):
+    """
+    Reduce ``data`` along several dimensions.
+
+    Numpy-backed data larger than ``xrviz.kernels.KERNEL_SIZE`` is reduced
+    in parallel by the kernels of ``xrviz.kernels``, unless along its last
+    dimension (see ``xrviz.kernels.applies``).
+
+    The dimensions with the same aggregation are reduced together, in a
+    single call, rather than one after the other. For ``median`` and
+    ``std``, this gives the statistic over all of them, rather than e.g. a
+    median of medians. Aggregations are applied in the order in which they
+    first appear in ``aggs``.
+
+    Parameters
+    ----------
+    data: xarray.DataArray
+    aggs: dict
+        Aggregation for each dimension, one of ``Fields.agg_opts`` other than
+        ``select`` and ``animate``, e.g. ``{'time': 'mean'}``.
+    approximate: bool
+        Approximate medians of dask data by ``approximate_quantile``, which
+        does not need chunks spanning the reduced dimensions.
+    percentile: float
+        Percentile computed by ``percentile``, from 0 to 100. It is
+        approximated by ``approximate_quantile`` for dask data.
+    threshold: float
+        Value above which ``exceedances`` counts values.
+
+    Returns
+    -------
+    xarray.DataArray
+    """
+    groups = collections.OrderedDict()
+    for dim, agg in aggs.items():
+        groups.setdefault(agg, []).append(dim)
+    for agg, dims in groups.items():
+        data = reduce(data, agg, dims, approximate=approximate,
+                      percentile=percentile, threshold=threshold)
+    return data
+
+
+def reduce(data, agg, dims, approximate=False, percentile=95., threshold=0.):
+    """Apply one aggregation along ``dims`` of ``data``"""
+    dims = [dim for dim in dims if dim in data.dims]
+    if not dims:
+        return data
+    if agg == 'count':  # number of values which are not NaN
+        return data.count(dims)
+    if agg in ['slope', 'trend']:
+        return linear_trend(data, dims, total=agg == 'trend')
+    if agg == 'percentile':
+        if not isinstance(data.data, dask.array.Array):
+            return data.quantile(percentile / 100., dim=dims).drop_vars(
+                'quantile')
+        return approximate_quantile(data, percentile / 100., dims)
+    if agg == 'exceedances':  # NaNs are not counted
+        return (data > threshold).sum(dims).rename(data.name)
+    if agg in WEIGHTED:
+        return weighted(data, agg.split()[1], dims)
+    if agg in ENSEMBLE:
+        return ensemble(data, agg.split()[1], dims, percentile=percentile,
+                        threshold=threshold)
+    if (agg == 'median' and approximate and
+            isinstance(data.data, dask.array.Array)):
+        return approximate_quantile(data, 0.5, dims)
+    axes = [data.get_axis_num(dim) for dim in dims]
+    if kernels.applies(data.data, agg, axes):
+        return _reduced(data, dims, kernels.reduce(data.data, agg, axes))
+    return getattr(data, agg)(dims)
+
+
+def _reduced(data, dims, values):
+    """``values`` reduced from ``data`` along ``dims``, as a DataArray"""
+    template = data.isel({dim: 0 for dim in dims}, drop=True)
+    return xr.DataArray(values, dims=template.dims, coords=template.coords,
+                        name=data.name)
+
+
+def is_ensemble_dim(data, dim):
+    """Whether ``dim`` of ``data`` holds the members of an ensemble"""
+    return (dim.lower() in ENSEMBLE_DIMS or
+            dim in data.coords and
+            data[dim].attrs.get('standard_name') == 'realization')
+
+
+def ensemble_moments(data, dims, threshold=0.):
+    """
+    Mean, spread (standard deviation) and probability of exceeding
+    ``threshold`` of the members of an ensemble, along ``dims``.
+
+    All three are derived from sums reduced in the same pass over the
+    members. The sums are of the deviations from the first member, for
+    the precision of the spread. NaNs are skipped.
+
+    Returns
+    -------
+    (mean, spread, probability)
+    """
+    valid = data.notnull()
+    n = valid.sum(dims)
+    first = data.isel({dim: 0 for dim in dims}, drop=True).fillna(0.)
+    deviations = data - first
+    sd = deviations.sum(dims)
+    sdd = (deviations * deviations).sum(dims)
+    above = (data > threshold).sum(dims)
+    n = n.where(n > 0)
+    mean = first + sd / n
+    spread = np.sqrt(np.maximum(sdd / n - (sd / n) ** 2, 0.))
+    return (mean.rename(data.name), spread.rename(data.name),
+            (above / n).rename(data.name))
+
+
+def ensemble(data, statistic, dims, percentile=95., threshold=0.):
+    """
+    Reduce the members of an ensemble along ``dims``.
+
+    ``statistic`` is one of ``mean``, ``spread``, ``probability`` (of
+    exceeding ``threshold``), read from ``ensemble_moments``, or
+    ``percentile``. For the percentile, the members of dask data are
+    gathered in single chunks, ensembles having few members.
+    """
+    if statistic == 'percentile':
+        if isinstance(data.data, dask.array.Array):
+            data = data.chunk({dim: -1 for dim in dims})
+        return data.quantile(percentile / 100., dim=dims).drop_vars(
+            'quantile').rename(data.name)
+    mean, spread, probability = ensemble_moments(data, dims, threshold)
+    return {'mean': mean, 'spread': spread,
+            'probability': probability}[statistic]
+
+
+def _numeric(coord):
+    """Values of a coordinate as floats, in days for datetimes"""
+    if coord.dtype.kind == 'M':
+        return (coord - coord[0]) / np.timedelta64(1, 'D')
+    return coord.astype('float64')
+
+
+def linear_trend(data, dims, total=False):
+    """
+    Least-squares slope of ``data`` against the coordinate of the first of
+    ``dims``, per unit of the coordinate (per day for datetimes).
+
+    Values along the other ``dims`` are pooled, as more samples at the same
+    coordinates. NaNs are skipped. The slope is computed in closed form from
+    the sums of ``x``, ``y``, ``x * y`` and ``x ** 2`` over the valid values,
+    all reduced in the same pass over dask data, chunk by chunk.
+
+    With ``total``, the slope times the range of the coordinate, i.e. the
+    linear change over the whole dimension.
+    """
+    dim = dims[0]
+    x = _numeric(data[dim]).reset_coords(drop=True)
+    x = x - x.mean()  # centred, for the precision of the sums
+    valid = data.notnull()
+    xv = x.where(valid, 0.)
+    n = valid.sum(dims)
+    sx = xv.sum(dims)
+    sy = data.sum(dims)
+    sxy = (data * x).sum(dims)
+    sxx = (xv * x).sum(dims)
+    denominator = n * sxx - sx ** 2
+    slope = (n * sxy - sx * sy) / denominator.where(denominator != 0)
+    if total:
+        slope = slope * float(x.max() - x.min())
+    return slope.rename(data.name)
+
+
+def correlation(data, other, dims):
+    """
+    Pearson correlation of ``data`` with ``other`` along ``dims``, at every
+    other point of ``data``.
+
+    ``other`` is broadcast against ``data``: it may be a series along
+    ``dims``, or another variable. Pairs where either is NaN are skipped.
+    The correlation is computed in closed form from the sums of ``x``,
+    ``y``, ``x * y``, ``x ** 2`` and ``y ** 2`` over the valid pairs, all
+    reduced in the same pass over dask data, chunk by chunk.
+    """
+    valid = data.notnull() & other.notnull()
+    x = data.where(valid)
+    y = other.where(valid)
+    n = valid.sum(dims)
+    sx = x.sum(dims)
+    sy = y.sum(dims)
+    covariance = n * (x * y).sum(dims) - sx * sy
+    variances = ((n * (x * x).sum(dims) - sx ** 2) *
+                 (n * (y * y).sum(dims) - sy ** 2))
+    out = covariance / np.sqrt(variances.where(variances > 0))
+    return out.rename(data.name)
+
+
+def approximate_quantile(data, q, dims, bins=QUANTILE_BINS, limits=None):
+    """
+    Approximate the quantile ``q`` of dask data along ``dims``, in one
+    streaming pass over its chunks.
+
+    Each chunk is reduced to a histogram of ``bins`` bins per remaining
+    point, over the range of the whole data, and the histograms are summed.
+    The quantile is interpolated within the bin where it falls, so that the
+    error is within the width of a bin, for many values with no large gaps
+    between them. Unlike exact quantiles, the chunks need not span the
+    reduced dimensions.
+
+    The range of the data is computed beforehand, unless given as
+    ``limits``. Histograms are counted ``HISTOGRAM_POINTS`` points at a
+    time, in the narrowest unsigned integers holding the values of a
+    chunk, so that they take ``histogram_nbytes`` per chunk.
+
+    Data which is not a dask array gets the exact quantile.
+    """
+    if not isinstance(data.data, dask.array.Array):
+        return data.quantile(q, dim=dims).drop_vars('quantile')
+    array = data.data
+    axes = tuple(sorted(data.get_axis_num(dim) for dim in dims))
+    if limits is None:
+        limits = dask.compute(dask.array.nanmin(array),
+                              dask.array.nanmax(array))
+    lower, upper = (float(v) for v in limits)
+    if not np.isfinite(lower):  # no valid values
+        lower, upper = 0., 0.
+    edges = np.linspace(lower, upper if upper > lower else lower + 1.,
+                        bins + 1)
+
+    chunks = tuple((1,) * len(c) if i in axes else c
+                   for i, c in enumerate(array.chunks))
+    dtype = _count_dtype(array.chunks, axes)
+    counts = array.map_blocks(_block_histogram, edges, axes, dtype,
+                              dtype=dtype, new_axis=array.ndim,
+                              chunks=chunks + ((bins,),))
+    total = np.prod([array.shape[i] for i in axes])
+    counts = counts.sum(axis=axes, dtype=np.min_scalar_type(total))
+    values = counts.map_blocks(_histogram_quantile, edges, q,
+                               dtype='float64', drop_axis=counts.ndim - 1)
+    return _reduced(data, dims, values)
+
+
+def _count_dtype(chunks, axes):
+    """Unsigned integers counting the values of a chunk along ``axes``"""
+    return np.min_scalar_type(np.prod([max(chunks[i]) for i in axes]))
+
+
+def histogram_nbytes(chunks, axes, bins=QUANTILE_BINS):
+    """
+    Bytes of the histograms ``approximate_quantile`` counts for the largest
+    of ``chunks``, a dask array's chunks, reduced along ``axes``.
+    """
+    points = np.prod([max(c) for i, c in enumerate(chunks) if i not in axes])
+    return int(points * bins * _count_dtype(chunks, axes).itemsize)
+
+
+def _block_histogram(block, edges, axes, dtype):
+    """Histograms of ``block`` along ``axes``, which are kept with size 1"""
+    kept = [i for i in range(block.ndim) if i not in axes]
+    values = np.transpose(block, kept + list(axes))
+    shape = values.shape[:len(kept)]
+    values = values.reshape((int(np.prod(shape)), -1))
+    n = len(edges) - 1
+    counts = np.empty((len(values), n), dtype=dtype)
+    for start in range(0, len(values), HISTOGRAM_POINTS):
+        part = values[start:start + HISTOGRAM_POINTS]
+        index = np.searchsorted(edges, part, side='right') - 1
+        index[part == edges[-1]] = n - 1  # closed last bin
+        valid = (index >= 0) & (index < n)
+        offsets = np.arange(len(part))[:, None] * n
+        counts[start:start + len(part)] = np.bincount(
+            (index + offsets)[valid], minlength=len(part) * n).reshape(
+                (len(part), n))
+    counts = counts.reshape(shape + (n,))
+    return np.expand_dims(counts, axes)
+
+
+def _histogram_quantile(counts, edges, q):
+    """Interpolate the quantile ``q`` of histograms along the last axis"""
+    cumulative = np.cumsum(counts, axis=-1)
+    total = cumulative[..., -1:]
+    rank = q * total
+    index = np.minimum((cumulative < rank).sum(axis=-1, keepdims=True),
+                       counts.shape[-1] - 1)
+    count = np.take_along_axis(counts, index, axis=-1)
+    before = np.take_along_axis(cumulative, index, axis=-1) - count
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraction = np.where(count > 0, (rank - before) / count, 0.)
+    width = edges[1] - edges[0]
+    values = edges[index] + fraction * width
+    values = np.where(total > 0, values, np.nan)
+    return values[..., 0]
+
+
+#  Aggregations available over rolling windows.
+ROLLING = ['mean', 'max', 'min', 'sum']
+
+
+def rolling(data, dim, agg, window):
+    """
+    Aggregate ``data`` over trailing windows of ``window`` values along
+    ``dim``.
+
+    The value at each position aggregates the values from ``window - 1``
+    positions before it, up to it, NaNs being skipped. The first positions
+    aggregate the values available. Sums and means are differences of
+    cumulative sums, maxima and minima are computed with the van
+    Herk/Gil-Werman algorithm, so that the cost does not depend on
+    ``window``.
+
+    Dask data is computed lazily, chunk by chunk, with chunks overlapping
+    by ``window - 1`` values.
+    """
+    axis = data.get_axis_num(dim)
+    window = min(window, data.sizes[dim])  # same result for longer ones
+    values = data.data
+    if isinstance(values, dask.array.Array):
+        values = _at_least(values, axis, window)
+        values = values.map_overlap(_rolling_values, depth={axis: window - 1},
+                                    boundary='none', axis=axis, agg=agg,
+                                    window=window, dtype=_rolling_dtype(data))
+    else:
+        values = _rolling_values(values, axis, agg, window)
+    return data.copy(data=values)
+
+
+def _rolling_dtype(data):
+    return data.dtype if data.dtype.kind == 'f' else np.dtype('float64')
+
+
+def _at_least(array, axis, size):
+    """Rechunk ``array`` to chunks of at least ``size`` along ``axis``"""
+    chunks = array.chunks[axis]
+    if min(chunks) >= size or len(chunks) == 1:
+        return array
+    n = sum(chunks)
+    step = max(size, max(chunks))
+    new = [step] * (n // step)
+    if n % step:
+        if new and n % step < size:
+            new[-1] += n % step
+        else:
+            new.append(n % step)
+    return array.rechunk({axis: tuple(new)})
+
+
+def _rolling_values(values, axis, agg, window):
+    """Trailing rolling aggregation of a numpy array along ``axis``"""
+    dtype = values.dtype if values.dtype.kind == 'f' else np.dtype('float64')
+    values = np.moveaxis(values, axis, 0).astype(dtype, copy=False)
+    n = values.shape[0]
+    if agg in ['mean', 'sum']:
+        valid = ~np.isnan(values)
+        zero = np.zeros((1,) + values.shape[1:])
+        sums = np.concatenate([zero, np.cumsum(np.where(valid, values, 0.),
+                                               axis=0, dtype='float64')])
+        counts = np.concatenate([zero, np.cumsum(valid, axis=0)])
+        end = np.arange(1, n + 1)
+        start = np.maximum(end - window, 0)
+        sums = sums[end] - sums[start]
+        counts = counts[end] - counts[start]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = sums / counts if agg == 'mean' else sums
+        out = np.where(counts > 0, out, np.nan)
+    else:
+        ufunc = np.fmax if agg == 'max' else np.fmin
+        blocks = -(-n // window)
+        padded = np.full((blocks * window,) + values.shape[1:], np.nan,
+                         dtype=dtype)
+        padded[:n] = values
+        padded = padded.reshape((blocks, window) + values.shape[1:])
+        prefix = ufunc.accumulate(padded, axis=1).reshape(
+            (-1,) + values.shape[1:])
+        suffix = ufunc.accumulate(padded[:, ::-1], axis=1)[:, ::-1].reshape(
+            (-1,) + values.shape[1:])
+        out = prefix[:n].copy()
+        # windows starting within a block end within the next one
+        end = np.arange(window - 1, n)
+        out[end] = ufunc(suffix[end - window + 1], prefix[end])
+    return np.moveaxis(out.astype(dtype, copy=False), 0, axis)
+
+
+class Rolling(object):
+    """
+    Trailing rolling aggregation of ``data`` along ``dim``, computed frame
+    by frame, e.g. while animating ``dim``.
+
+    Moving to the next position updates the previous result rather than
+    aggregating the whole window again: sums and means add the new frame
+    and subtract the one leaving the window, maxima and minima keep the
+    running extreme of the current block of ``window`` frames and the
+    suffix extremes of the previous block, as in the van Herk/Gil-Werman
+    algorithm. Frames are read once on average, whatever ``window``.
+    Other positions are computed from scratch.
+    """
+
+    def __init__(self, data, dim, agg, window):
+        self.data = data
+        self.dim = dim
+        self.agg = agg
+        self.window = window
+        self.dtype = _rolling_dtype(data)
+        self.position = None
+        self._state = None
+        self._suffix = (None, None)  # block, suffix extremes of the block
+
+    def _read(self, start, stop=None):
+        index = slice(start, stop) if stop is not None else start
+        values = np.asarray(self.data.isel({self.dim: index}))
+        if stop is not None:
+            values = np.moveaxis(values, self.data.get_axis_num(self.dim), 0)
+        return values.astype(self.dtype, copy=False)
+
+    def frame(self, position):
+        """The aggregated frame at ``position`` along ``dim``, without the
+        coordinate of ``dim``"""
+        if self.agg in ['mean', 'sum']:
+            values = self._sum_frame(position)
+        else:
+            values = self._extreme_frame(position)
+        self.position = position
+        template = self.data.isel({self.dim: position}, drop=True)
+        return template.copy(data=values.astype(self.dtype, copy=False))
+
+    def _sum_frame(self, i):
+        if self.position is not None and i == self.position + 1:
+            sums, counts = self._state
+            new = self._read(i)
+            valid = ~np.isnan(new)
+            sums = sums + np.where(valid, new, 0.)
+            counts = counts + valid
+            if i >= self.window:
+                old = self._read(i - self.window)
+                valid = ~np.isnan(old)
+                sums = sums - np.where(valid, old, 0.)
+                counts = counts - valid
+        else:
+            values = self._read(max(0, i - self.window + 1), i + 1)
+            valid = ~np.isnan(values)
+            sums = np.where(valid, values, 0.).sum(axis=0, dtype='float64')
+            counts = valid.sum(axis=0)
+        self._state = sums, counts
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = sums / counts if self.agg == 'mean' else sums
+        return np.where(counts > 0, out, np.nan)
+
+    def _extreme_frame(self, i):
+        ufunc = np.fmax if self.agg == 'max' else np.fmin
+        block, offset = divmod(i, self.window)
+        if self.position is not None and i == self.position + 1 and offset:
+            prefix = ufunc(self._state, self._read(i))
+        else:
+            prefix = ufunc.reduce(self._read(block * self.window, i + 1),
+                                  axis=0)
+        self._state = prefix
+        start = i - self.window + 1
+        if start < 0 or offset == self.window - 1:  # window within the block
+            return prefix
+        if self._suffix[0] != block - 1:
+            values = self._read((block - 1) * self.window,
+                                block * self.window)
+            self._suffix = (block - 1,
+                            ufunc.accumulate(values[::-1], axis=0)[::-1])
+        return ufunc(self._suffix[1][start - (block - 1) * self.window],
+                     prefix)
+
+
+#  Number of partial sums by group added up by each task of ``group_mean``.
+SPLIT_EVERY = 8
+
+#  Calendar resampling of time dimensions, by aggregation option: the
+#  frequency of the groups, and the period of pandas they are labelled by.
+#  Seasons are labelled by their first month (DJF by December).
+RESAMPLING = collections.OrderedDict([
+    ('daily mean', 'D'),
+    ('monthly mean', 'M'),
+    ('seasonal mean', 'Q-NOV'),
+    ('day-of-year climatology', 'dayofyear'),
+])
+
+
+def group_codes(index, freq):
+    """
+    Group of each time of ``index``, for one of the ``RESAMPLING``
+    frequencies.
+
+    Returns
+    -------
+    (codes, labels): the index of the group of each time in ``labels``, and
+    the sorted labels of the groups, which are either the start of each
+    period, or the day of the year (``dayofyear``) or month (``month``).
+    """
+    if freq in ['dayofyear', 'month']:
+        keys = getattr(index, freq)
+    else:
+        keys = index.to_period(freq).start_time
+    codes, labels = pd.factorize(keys, sort=True)
+    return codes, labels
+
+
+def resample(data, dim, freq):
+    """
+    Mean of ``data`` over the groups of ``dim`` given by ``group_codes``.
+
+    ``dim`` is kept, with the labels of the groups as coordinate. The means
+    are computed in one pass over the data, reading each chunk of dask data
+    once (see ``group_mean``).
+    """
+    codes, labels = group_codes(data.get_index(dim), freq)
+    values = group_mean(data.data, data.get_axis_num(dim), codes, len(labels))
+    coords = {name: coord for name, coord in data.coords.items()
+              if dim not in coord.dims}
+    coords[dim] = labels
+    return xr.DataArray(values, dims=data.dims, coords=coords,
+                        name=data.name, attrs=data.attrs)
+
+
+def group_mean(values, axis, codes, n_groups):
+    """
+    NaN-skipping mean of ``values`` along ``axis``, over the groups given by
+    integer ``codes`` along it.
+
+    Numpy arrays are sorted by group and reduced with ``np.add.reduceat``.
+    Each chunk of dask arrays is reduced to sums and counts by group, which
+    are added up as a tree, ``SPLIT_EVERY`` at a time, so that chunks need
+    not span ``axis`` and many small chunks still give a shallow graph.
+    """
+    if isinstance(values, dask.array.Array):
+        chunks = list(values.chunks)
+        chunks[axis] = (n_groups,) * len(chunks[axis])
+        parts = values.map_blocks(
+            _block_group_sums, axis, codes, n_groups, dtype='float64',
+            chunks=(2,) + tuple(chunks), new_axis=0)
+        while parts.numblocks[axis + 1] > 1:
+            parts = parts.rechunk({axis + 1: n_groups * SPLIT_EVERY})
+            chunks = list(parts.chunks)
+            chunks[axis + 1] = (n_groups,) * len(chunks[axis + 1])
+            parts = parts.map_blocks(_combine_group_sums, axis + 1, n_groups,
+                                     dtype='float64', chunks=tuple(chunks))
+        sums, counts = parts[0], parts[1]
+    else:
+        sums, counts = _group_sums(values, axis, codes, n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = np.where(counts > 0, sums / counts, np.nan)
+    dtype = values.dtype if values.dtype.kind == 'f' else np.dtype('float64')
+    return out.astype(dtype)
+
+
+def _block_group_sums(block, axis, codes, n_groups, block_info=None):
+    """Sums and counts by group of a chunk, at its location along ``axis``"""
+    start, stop = block_info[0]['array-location'][axis]
+    return _group_sums(block, axis, codes[start:stop], n_groups)
+
+
+def _combine_group_sums(block, axis, n_groups):
+    """Add up the sums by group of consecutive chunks, along ``axis``"""
+    shape = block.shape
+    block = block.reshape(shape[:axis] + (-1, n_groups) + shape[axis + 1:])
+    return block.sum(axis=axis)
+
+
+def _group_sums(values, axis, codes, n_groups):
+    """Sums and counts of the values which are not NaN, by group"""
+    values = np.moveaxis(values, axis, 0)
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.diff(sorted_codes, prepend=-1))
+    values = values[order]
+    valid = ~np.isnan(values)
+    shape = (n_groups,) + values.shape[1:]
+    sums, counts = np.zeros(shape), np.zeros(shape)
+    groups = sorted_codes[starts]
+    sums[groups] = np.add.reduceat(np.where(valid, values, 0.), starts,
+                                   axis=0, dtype='float64')
+    counts[groups] = np.add.reduceat(valid, starts, axis=0, dtype='float64')
+    return np.stack([np.moveaxis(sums, 0, axis),
+                     np.moveaxis(counts, 0, axis)])
@@ -0,0 +1,178 @@
+import hashlib
+import os
+import dask.array
+import numpy as np
+import xarray as xr
+from .chunking import auto_chunks
+from .climatology import CACHE_DIR
+from .compatibility import logger, scipy
+
+#  Methods of ``regrid_weights``.
+REGRID_METHODS = ['nearest', 'bilinear']
+
+#  Number of grids whose weights are kept in memory by ``regrid_weights``.
+CACHED_GRIDS = 4
+
+_cache = {}
+
+
+def target_grid(x, y):
+    """
+    A regular grid spanning the curvilinear coordinates ``x`` and ``y``,
+    with about as many points, in the same proportions as their extents.
+
+    Returns
+    -------
+    (x, y): the 1-D coordinates of the regular grid
+    """
+    x, y = np.asarray(x, dtype='float64'), np.asarray(y, dtype='float64')
+    valid = np.isfinite(x) & np.isfinite(y)
+    x0, x1 = x[valid].min(), x[valid].max()
+    y0, y1 = y[valid].min(), y[valid].max()
+    n = valid.sum()
+    ratio = (y1 - y0) / (x1 - x0) if x1 > x0 else 1.
+    ny = max(2, int(round(np.sqrt(n * ratio))))
+    nx = max(2, int(round(n / ny)))
+    return np.linspace(x0, x1, nx), np.linspace(y0, y1, ny)
+
+
+def _grid_hash(x, y, method):
+    """Hash of the coordinates of a grid and of the method regridding it"""
+    sha = hashlib.sha1(method.encode())
+    for values in [x, y]:
+        values = np.ascontiguousarray(values, dtype='float64')
+        sha.update(str(values.shape).encode())
+        sha.update(values.tobytes())
+    return sha.hexdigest()
+
+
+def regrid_weights(x, y, method='nearest', cache_dir=CACHE_DIR):
+    """
+    Weights regridding values on the curvilinear coordinates ``x`` and
+    ``y`` (2-D, on the same dimensions) to the regular grid of
+    ``target_grid``.
+
+    With ``nearest``, each point of the regular grid takes the value of the
+    nearest point of the curvilinear grid, within a grid step. With
+    ``bilinear``, values are interpolated linearly within the triangles of
+    the Delaunay triangulation of the curvilinear grid. Points outside of
+    the grid get no weight.
+
+    The weights are a scipy sparse matrix, from the flattened curvilinear
+    grid to the flattened regular one. They are computed once per grid,
+    and cached on disk in ``cache_dir`` under a hash of the coordinates, as
+    well as in memory for the last ``CACHED_GRIDS`` grids.
+
+    Returns
+    -------
+    (weights, target): the sparse matrix, and the coordinates of the
+    regular grid given by ``target_grid``
+    """
+    x, y = np.asarray(x, dtype='float64'), np.asarray(y, dtype='float64')
+    key = _grid_hash(x, y, method)
+    if key in _cache:
+        return _cache[key]
+    target = target_grid(x, y)
+    path = (os.path.join(cache_dir, f'regrid-{key}.npz')
+            if cache_dir is not None else None)
+    if path is not None and os.path.exists(path):
+        weights = scipy.sparse.load_npz(path)
+    else:
+        weights = _weights(x, y, target, method)
+        if path is not None:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                scipy.sparse.save_npz(path, weights)
+            except OSError as e:
+                logger.warning(f"Cannot cache the regridding weights: {e}")
+    while len(_cache) >= CACHED_GRIDS:
+        del _cache[next(iter(_cache))]
+    _cache[key] = (weights, target)
+    return _cache[key]
+
+
+def _weights(x, y, target, method):
+    """Sparse matrix of the weights of ``regrid_weights``"""
+    tx, ty = np.meshgrid(*target)
+    points = np.column_stack([tx.ravel(), ty.ravel()])
+    valid = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    sources = np.column_stack([x.ravel()[valid], y.ravel()[valid]])
+    shape = (len(points), x.size)
+    if method == 'nearest':
+        distance, nearest = scipy.spatial.cKDTree(sources).query(points)
+        # farther than a step of the grid is outside of it
+        steps = [np.hypot(np.diff(x, axis=axis), np.diff(y, axis=axis))
+                 for axis in range(x.ndim)]
+        step = max(np.nanmax(s) for s in steps if s.size)
+        rows = np.flatnonzero(distance <= step)
+        columns = valid[nearest[rows]]
+        values = np.ones(len(rows))
+    else:
+        triangulation = scipy.spatial.Delaunay(sources)
+        simplex = triangulation.find_simplex(points)
+        rows = np.flatnonzero(simplex >= 0)
+        transform = triangulation.transform[simplex[rows]]
+        offsets = points[rows] - transform[:, 2]
+        barycentric = np.einsum('nij,nj->ni', transform[:, :2], offsets)
+        barycentric = np.column_stack(
+            [barycentric, 1 - barycentric.sum(axis=1)])
+        columns = valid[triangulation.simplices[simplex[rows]]].ravel()
+        values = barycentric.ravel()
+        rows = np.repeat(rows, 3)
+    return scipy.sparse.csr_matrix((values, (rows, columns)), shape=shape)
+
+
+def _apply(block, weights, covered, shape):
+    """Regrid the frames of ``block``, over its last two axes"""
+    frames = block.reshape((-1, block.shape[-2] * block.shape[-1]))
+    out = weights.dot(frames.T).T
+    out[:, ~covered] = np.nan
+    dtype = np.result_type(block.dtype, 'float32')
+    return out.reshape(block.shape[:-2] + shape).astype(dtype, copy=False)
+
+
+def regrid(data, x, y, method='nearest', cache_dir=CACHE_DIR):
+    """
+    Regrid ``data`` from its curvilinear coordinates ``x`` and ``y`` to a
+    regular grid, so that it can be shown as an image.
+
+    The weights are computed once per grid (see ``regrid_weights``), and
+    applied lazily to each frame, as a sparse matrix-vector product. Data
+    not in a dask array gets chunks of one frame (see
+    ``xrviz.chunking.auto_chunks``).
+
+    Parameters
+    ----------
+    data: xarray.DataArray
+        With the dimensions of ``x`` and ``y``.
+    x, y: str
+        Names of 2-D coordinates of ``data``, on the same dimensions.
+    method: str
+        One of ``REGRID_METHODS``.
+
+    Returns
+    -------
+    xarray.DataArray, with the dimensions of ``x`` and ``y`` replaced by
+    the 1-D coordinates ``y`` and ``x``
+    """
+    grid = data[x].dims
+    data = data.transpose(..., *grid)
+    weights, (tx, ty) = regrid_weights(data[x].transpose(*grid),
+                                       data[y].transpose(*grid), method,
+                                       cache_dir=cache_dir)
+    covered = np.diff(weights.indptr) > 0
+    shape = (len(ty), len(tx))
+    if not isinstance(data.data, dask.array.Array):
+        data = data.chunk(auto_chunks(data, animate=data.dims[:-2]))
+    array = data.data
+    array = array.rechunk({array.ndim - 2: -1, array.ndim - 1: -1})
+    dtype = np.result_type(data.dtype, 'float32')
+    values = array.map_blocks(_apply, weights, covered, shape,
+                              dtype=dtype,
+                              chunks=array.chunks[:-2] + ((shape[0],),
+                                                          (shape[1],)))
+    coords = {name: coord for name, coord in data.coords.items()
+              if not set(coord.dims) & set(grid)}
+    coords.update({y: ty, x: tx})
+    return xr.DataArray(values, dims=data.dims[:-2] + (y, x), coords=coords,
+                        name=data.name, attrs=data.attrs)
@@ -1,10 +1,16 @@
 # Source: https://github.com/martindurant/dfviz/blob/master/dfviz/widget.py
+import asyncio
+import collections
 import contextlib
+import inspect
+import json
 import logging
+import os
+import sys
+import threading
+import time
 from .compatibility import logger
 
-logger.setLevel('DEBUG')
-
 
 class SigSlot(object):
     """Signal-slot mixin, for Panel event passing
@@ -56,12 +62,23 @@ class SigSlot(object):
         """Known named signals of this class"""
         return list(self._sigs)
 
-    def connect(self, name, callback):
+    def connect(self, name, callback, executor=None):
         """Associate call back with given event
         The callback must be a function which takes the "new" value of the
         watched attribute as the only parameter. If the callback return False,
         this cancels any further processing of the given event.
+
+        Coroutine functions are scheduled on the event loop of the document
+        (or run to completion when there is none), and with ``executor``
+        (a ``concurrent.futures.Executor``) the callback runs in that pool,
+        within the document of the thread emitting the event.
+        If an executor-backed callback returns a callable, that callable is
+        applied back on the document thread. For both kinds, work still
+        in flight for a superseded event is cancelled, and they cannot halt
+        the chain of remaining callbacks.
         """
+        if executor is not None or inspect.iscoroutinefunction(callback):
+            callback = _DeferredSlot(callback, executor)
         self._sigs[name]['callbacks'].append(callback)
 
     def _signal(self, event):
@@ -90,11 +107,203 @@ class SigSlot(object):
         directly changing visual elements.
         Calling of callbacks will halt whenever one returns False.
         """
-        logger.log(self._sigs[sig]['log'], f"{sig}: {value}")
+        level = self._sigs[sig]['log']
+        if logger.isEnabledFor(level):
+            logger.log(level, f"{sig}: {value}")
         for callback in self._sigs[sig]['callbacks']:
-            if callback(value) is False:
+            if tracer.enabled:
+                result = tracer.call(sig, callback, value)
+            else:
+                result = callback(value)
+            if result is False:
                 break
 
     def show(self):
         """Open a new browser tab and display this instance's interface"""
         self.panel.show()
+
+
+class Tracer(object):
+    """Records which slots are called for each signal, and how long they take
+
+    Events are kept in a bounded ring buffer, so that tracing can be left on
+    in a long-running session. When disabled, the only cost to ``_emit`` is
+    checking the ``enabled`` flag.
+
+    Each event is a tuple of ``(signal, callback, start, duration,
+    payload_bytes, thread_id)``, with times in seconds.
+
+    Example:
+    ```
+    from xrviz.sigslot import tracer
+    tracer.enable()
+    ...  # interact with the dashboard
+    tracer.dump('trace.json')  # open with chrome://tracing or Perfetto
+    ```
+    """
+
+    def __init__(self, maxlen=10000):
+        self.enabled = False
+        self.events = collections.deque(maxlen=maxlen)
+
+    def enable(self, maxlen=None):
+        """Start recording, optionally resizing the ring buffer"""
+        if maxlen is not None and maxlen != self.events.maxlen:
+            self.events = collections.deque(self.events, maxlen=maxlen)
+        self.enabled = True
+
+    def disable(self):
+        """Stop recording; recorded events are kept"""
+        self.enabled = False
+
+    def clear(self):
+        self.events.clear()
+
+    def call(self, sig, callback, value):
+        """Call ``callback(value)``, recording an event for it"""
+        start = time.perf_counter()
+        try:
+            return callback(value)
+        finally:
+            duration = time.perf_counter() - start
+            self.events.append((sig, _callback_name(callback), start,
+                                duration, _payload_size(value),
+                                threading.get_ident()))
+
+    def summary(self):
+        """Total time, number of calls and maximum time per slot
+
+        Sorted with the slots which take the most time in total first.
+        """
+        out = {}
+        for sig, name, _, duration, _, _ in self.events:
+            total, count, longest = out.get((sig, name), (0., 0, 0.))
+            out[(sig, name)] = (total + duration, count + 1,
+                                max(longest, duration))
+        return sorted(([sig, name, *stats] for (sig, name), stats in out.items()),
+                      key=lambda row: row[2], reverse=True)
+
+    def to_chrome_trace(self):
+        """Events in the Chrome Trace Event format"""
+        pid = os.getpid()
+        return {'traceEvents': [{'name': name, 'cat': sig, 'ph': 'X',
+                                 'ts': start * 1e6, 'dur': duration * 1e6,
+                                 'pid': pid, 'tid': tid,
+                                 'args': {'signal': sig,
+                                          'payload_bytes': size}}
+                                for sig, name, start, duration, size, tid
+                                in self.events],
+                'displayTimeUnit': 'ms'}
+
+    def dump(self, path):
+        """Write the recorded events as a Chrome trace JSON file"""
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+tracer = Tracer()
+
+
+def _callback_name(callback):
+    callback = getattr(callback, 'callback', callback)  # unwrap _DeferredSlot
+    return getattr(callback, '__qualname__', repr(callback))
+
+
+def _payload_size(value):
+    nbytes = getattr(value, 'nbytes', None)
+    return int(nbytes) if nbytes is not None else sys.getsizeof(value)
+
+
+def _served_document():
+    """The current Bokeh document, or None outside of a served one"""
+    import panel as pn
+    doc = pn.state.curdoc
+    if doc is not None and doc.session_context is not None:
+        return doc
+    return None
+
+
+def _on_document(func):
+    """Call ``func`` on the thread owning the current Bokeh document
+
+    Outside of a served document, ``func`` is called immediately.
+    """
+    doc = _served_document()
+    if doc is not None:
+        doc.add_next_tick_callback(func)
+    else:
+        func()
+
+
+def _in_document(doc, func, *args):
+    """
+    Call ``func`` with ``doc`` as the current document of this thread.
+
+    The previous document is restored afterwards, since older versions of
+    panel keep one current document for the whole process.
+    """
+    if doc is None:
+        return func(*args)
+    import panel as pn
+    previous = pn.state.curdoc
+    pn.state.curdoc = doc
+    try:
+        return func(*args)
+    finally:
+        pn.state.curdoc = previous
+
+
+def _spawn(coro):
+    """Run a coroutine on the running event loop, or to completion"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        asyncio.run(coro)
+        return None
+    return loop.create_task(coro)
+
+
+class _DeferredSlot(object):
+    """A callback which does not run synchronously within ``_emit``
+
+    Keeps track of the work started for the latest event only, so that
+    the results of a superseded event are cancelled or dropped. The
+    document is looked up when the event is emitted, since the executor's
+    threads have no current document, and is made the current document of
+    the thread running the callback.
+    """
+
+    def __init__(self, callback, executor=None):
+        self.callback = callback
+        self.executor = executor
+        self._pending = None
+
+    def __call__(self, value):
+        self.cancel()
+        if self.executor is None:
+            self._pending = _spawn(self.callback(value))
+        else:
+            doc = _served_document()
+            future = self.executor.submit(_in_document, doc, self.callback,
+                                          value)
+            self._pending = future
+            future.add_done_callback(lambda f: self._done(f, doc))
+
+    def cancel(self):
+        """Cancel the work in flight, if any"""
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+
+    def _done(self, future, doc):
+        if future is not self._pending or future.cancelled():
+            return  # superseded by a newer event
+        self._pending = None
+        exc = future.exception()
+        if exc is not None:
+            logger.error(f"{self.callback}: {exc!r}")
+        elif callable(future.result()):
+            if doc is not None:
+                doc.add_next_tick_callback(future.result())
+            else:
+                future.result()()
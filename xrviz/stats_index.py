@@ -0,0 +1,275 @@
+import hashlib
+import json
+import os
+import warnings
+import dask
+import dask.array
+import numpy as np
+import pandas as pd
+from .chunking import auto_chunks
+from .compatibility import logger
+
+#  Version of the layout of the index files.
+VERSION = 2
+
+#  Quantiles kept for each frame, which must include those used for the
+#  colormap limits (0.1 and 0.9).
+QUANTILES = (0., 0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 1.)
+
+#  Number of bins of the histograms.
+BINS = 64
+
+#  Suffix of the index file written next to a dataset.
+SUFFIX = '.xrviz.json'
+
+_FIELDS = ['min', 'max', 'mean', 'nan_fraction']
+
+
+def index_path(path):
+    """Path of the statistics index of the dataset at ``path``"""
+    return path + SUFFIX
+
+
+def source_signature(path):
+    """Size and modification time of a file, to detect stale indexes"""
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def index_signature(var):
+    """
+    Dimensions, shape and a hash of the index values of a variable, to
+    match the entries of an index with the variables of a subset of the
+    indexed file.
+    """
+    sha = hashlib.sha1()
+    for dim in var.dims:
+        if dim in var.indexes:
+            sha.update(pd.util.hash_pandas_object(
+                var.indexes[dim], index=False).values.tobytes())
+    return {'dims': list(var.dims), 'shape': list(var.shape),
+            'index': sha.hexdigest()}
+
+
+def _indexable(var):
+    return var.ndim >= 2 and var.dtype.kind in 'iuf'
+
+
+def _frame_stats(block, edges):
+    """
+    Statistics of each frame of ``block``, i.e. over its last two axes.
+
+    Returns an array of the leading shape of ``block``, plus one axis with
+    min, max, mean, NaN fraction, the ``QUANTILES`` and the histogram counts
+    along ``edges``.
+    """
+    lead = block.shape[:-2]
+    values = block.reshape((-1, block.shape[-2] * block.shape[-1]))
+    values = values.astype('float64')
+    with warnings.catch_warnings():  # frames of NaNs only
+        warnings.simplefilter('ignore', RuntimeWarning)
+        stats = [np.nanmin(values, axis=1), np.nanmax(values, axis=1),
+                 np.nanmean(values, axis=1), np.isnan(values).mean(axis=1)]
+        quantiles = np.nanquantile(values, QUANTILES, axis=1)
+    # histograms of all frames at once, with an offset of bins per frame
+    bins = np.searchsorted(edges, values, side='right') - 1
+    bins[values == edges[-1]] = len(edges) - 2  # closed last bin
+    valid = (bins >= 0) & (bins < len(edges) - 1)
+    offsets = np.arange(len(values))[:, None] * (len(edges) - 1)
+    counts = np.bincount((bins + offsets)[valid],
+                         minlength=len(values) * (len(edges) - 1))
+    counts = counts.reshape((len(values), len(edges) - 1))
+    out = np.concatenate([np.stack(stats, axis=1), quantiles.T, counts],
+                         axis=1)
+    return out.reshape(lead + (out.shape[-1],))
+
+
+def _as_dask(var):
+    """The values of ``var`` as a dask array, with whole frames per chunk"""
+    if not isinstance(var.data, dask.array.Array):
+        var = var.chunk(auto_chunks(var))
+    return var.data.rechunk({var.ndim - 2: -1, var.ndim - 1: -1})
+
+
+def build_index(data, path=None):
+    """
+    Compute the statistics of every variable of ``data`` with 2 or more
+    numeric dimensions, in parallel with dask.
+
+    Frames are the values over the last two dimensions of a variable. For
+    each variable and each frame, the index holds the min, max, mean, NaN
+    fraction, the values at ``QUANTILES`` and a histogram of ``BINS`` bins
+    spanning the range of the variable. Quantiles of whole variables are
+    interpolated from their histogram.
+
+    The data is read twice: once for the ranges of the variables, which set
+    the bins of the histograms, and once for all other statistics.
+
+    Parameters
+    ----------
+    data: xarray.Dataset
+    path: str
+        File ``data`` was read from, recorded to detect when it changes.
+
+    Returns
+    -------
+    ``StatsIndex``
+    """
+    names = [name for name, var in data.data_vars.items() if _indexable(var)]
+    arrays = {name: _as_dask(data[name]) for name in names}
+    ranges = dask.compute({name: (dask.array.nanmin(a), dask.array.nanmax(a))
+                           for name, a in arrays.items()})[0]
+
+    lazy = {}
+    edges = {}
+    for name, array in arrays.items():
+        lower, upper = (float(v) for v in ranges[name])
+        if not np.isfinite(lower):  # no valid values
+            lower, upper = 0., 1.
+        edges[name] = np.linspace(lower, upper if upper > lower
+                                  else lower + 1., BINS + 1)
+        size = len(_FIELDS) + len(QUANTILES) + BINS
+        lazy[name] = array.map_blocks(
+            _frame_stats, edges[name], dtype='float64',
+            drop_axis=[array.ndim - 2, array.ndim - 1],
+            new_axis=array.ndim - 2,
+            chunks=array.chunks[:-2] + ((size,),))
+    computed = dask.compute(lazy)[0]
+
+    variables = {}
+    for name, stats in computed.items():
+        var = data[name]
+        frames = {field: stats[..., i] for i, field in enumerate(_FIELDS)}
+        n = len(_FIELDS)
+        frames['quantiles'] = stats[..., n:n + len(QUANTILES)]
+        frames['histogram'] = stats[..., n + len(QUANTILES):].astype('int64')
+        variables[name] = _summary(var, frames, edges[name])
+
+    source = source_signature(path) if path is not None else {}
+    if path is not None:
+        source['path'] = os.path.abspath(path)
+    return StatsIndex({'version': VERSION, 'quantiles': list(QUANTILES),
+                       'source': source, 'variables': variables})
+
+
+def _summary(var, frames, edges):
+    """Statistics of a whole variable, merged from those of its frames"""
+    histogram = frames['histogram'].reshape((-1, BINS)).sum(axis=0)
+    valid = 1 - frames['nan_fraction']
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nansum(frames['mean'] * valid) / valid.sum()
+        lower, upper = np.nanmin(frames['min']), np.nanmax(frames['max'])
+    cdf = np.concatenate([[0.], np.cumsum(histogram)]) / max(histogram.sum(), 1)
+    quantiles = np.interp(QUANTILES, cdf, edges)
+    return {
+        'dims': list(var.dims[:-2]),
+        'spatial': list(var.dims[-2:]),
+        'signature': index_signature(var),
+        'min': float(lower), 'max': float(upper), 'mean': float(mean),
+        'nan_fraction': float(frames['nan_fraction'].mean()),
+        'quantiles': [float(q) for q in quantiles],
+        'edges': [float(e) for e in edges],
+        'histogram': [int(c) for c in histogram],
+        'frames': {field: values.tolist() for field, values in frames.items()},
+    }
+
+
+def write_index(index, path):
+    """Write ``index`` to the file at ``path``"""
+    with open(path, 'w') as f:
+        json.dump(index.content, f)
+
+
+def load_index(path, source=None, data=None):
+    """
+    Read the statistics index at ``path``.
+
+    Returns None if there is no such file, or if it was built from another
+    version of the file at ``source``, judging by its size and modification
+    time. With ``data``, only the variables matching those of ``data`` are
+    kept (see ``StatsIndex.matching``).
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        content = json.load(f)
+    if content.get('version') != VERSION:
+        logger.warning(f"Ignoring {path}, written by another version")
+        return None
+    if source is not None:
+        recorded = content.get('source', {})
+        current = source_signature(source)
+        if any(recorded.get(k) != current[k] for k in ['size', 'mtime']):
+            logger.warning(f"Ignoring {path}, {source} changed since it was "
+                           f"indexed")
+            return None
+    index = StatsIndex(content)
+    return index.matching(data) if data is not None else index
+
+
+class StatsIndex(object):
+    """
+    Statistics of the variables of a dataset, built by ``build_index``.
+
+    Frames are given as a dict of the integer position along each leading
+    dimension of a variable, e.g. ``{'time': 0}``.
+
+    Attributes
+    ----------
+    content:
+        The statistics, as written to the index file.
+    """
+
+    def __init__(self, content):
+        self.content = content
+        self.variables = content['variables']
+        self.quantiles = content['quantiles']
+
+    def __contains__(self, name):
+        return name in self.variables
+
+    def matching(self, data):
+        """
+        The index of the variables of the dataset ``data`` with the
+        dimensions, shape and index values they were indexed with, e.g.
+        not those of a subset of the indexed file, whose frames would not
+        be at the same positions.
+        """
+        variables = {name: entry for name, entry in self.variables.items()
+                     if name in data.data_vars and
+                     entry.get('signature') == index_signature(data[name])}
+        return StatsIndex(dict(self.content, variables=variables))
+
+    def frame(self, name, field, frame=None):
+        """
+        A statistic of a variable, or of one of its frames.
+
+        Returns None if the frame does not match the dimensions of the
+        variable.
+        """
+        entry = self.variables[name]
+        if frame is None:
+            return entry[field]
+        if set(frame) != set(entry['dims']):
+            return None
+        values = entry['frames'][field]
+        for dim in entry['dims']:
+            values = values[frame[dim]]
+        return values
+
+    def limits(self, name, frame=None, q=(0.1, 0.9)):
+        """Values at the quantiles ``q`` of a variable or frame, or None"""
+        quantiles = self.frame(name, 'quantiles', frame)
+        if quantiles is None or not all(v in self.quantiles for v in q):
+            return None
+        return [quantiles[self.quantiles.index(v)] for v in q]
+
+    def histogram(self, name, frame=None):
+        """Counts and edges of the histogram of a variable or frame"""
+        counts = self.frame(name, 'histogram', frame)
+        return counts, self.variables[name]['edges']
+
+    def all_missing(self, name):
+        """Whether a variable has no valid values"""
+        return name in self and self.variables[name]['nan_fraction'] == 1.
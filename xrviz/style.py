@@ -1,6 +1,8 @@
 import panel as pn
 from holoviews.plotting import list_cmaps
 from .sigslot import SigSlot
+from .regrid import REGRID_METHODS
+from .compatibility import has_scipy
 
 TEXT = """
 Control the style of the plot. For more information, please refer to the
@@ -36,6 +38,9 @@ class Style(SigSlot):
             In case of dask array, `dask.array.percentile <https://docs.dask.org/en/latest/array-api.html#dask.array.percentile>`_
             is use to compute the limits. ``tdigest`` method is used in case `crick <https://pypi.org/project/crick/>`_ is present.
             The value of limits is rounded off to 5 decimal places, for simplicity.
+            With ``Dashboard(data, provisional_limits=True)``, large data is first
+            plotted with limits estimated from a sample, and these inputs are
+            updated with the exact limits once computed in the background.
 
             Note that these values are filled with respect to color scaled
             values. Also these limits clear upon change in variable or
@@ -53,6 +58,13 @@ class Style(SigSlot):
             Provides option to use `data shading <http://datashader.org/>`_ .
             It is better to have its value `True`, to get highly optimized
             rendering.
+        9. ``regrid`` (default `none`):
+            Regrids data on curvilinear coordinates (2-D ``x`` and ``y``) to
+            a regular grid, to plot it as an image, which is faster than the
+            quadmesh plotted otherwise: ``nearest`` takes the nearest value,
+            ``bilinear`` interpolates linearly between the nearest values.
+            The weights are computed once per grid, and cached on disk (see
+            ``xrviz.regrid.regrid_weights``). Requires scipy.
     """
 
     def __init__(self):
@@ -76,6 +88,9 @@ class Style(SigSlot):
                                              value='linear',
                                              options=scaling_ops)
         self.rasterize = pn.widgets.Checkbox(name='rasterize', value=True, width=150)
+        self.regrid = pn.widgets.Select(
+            name='regrid', value='none', width=150,
+            options=['none'] + (REGRID_METHODS if has_scipy else []))
 
         self._register(self.use_all_data, 'clear_cmap_limits')
         self._register(self.color_scale, 'clear_cmap_limits')
@@ -87,6 +102,7 @@ class Style(SigSlot):
             pn.Row(self.cmap, self.color_scale),
             pn.Row(self.lower_limit, self.upper_limit),
             pn.Row(self.use_all_data, self.colorbar, self.rasterize),
+            pn.Row(self.regrid),
             name='Style'
         )
 
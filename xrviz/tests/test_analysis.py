@@ -0,0 +1,55 @@
+import pytest
+import panel as pn
+from xrviz.analysis import Analysis
+from xrviz.difference import SECOND_DATASET
+from . import data
+
+
+@pytest.fixture()
+def analysis(data):
+    return Analysis(data, reference=data[['temp']])
+
+
+def test_mode(analysis):
+    mode_widget = analysis.mode
+    assert isinstance(mode_widget, pn.widgets.Select)
+    assert mode_widget.value == 'values'
+    assert mode_widget.options == ['values', 'anomaly', 'difference',
+                                   'correlation']
+
+
+def test_kwargs(analysis):
+    analysis.setup_initial_values({'mode': 'anomaly',
+                                   'reference start': '2000-01-01'})
+    assert analysis.kwargs == {'mode': 'anomaly',
+                               'climatology': 'day-of-year',
+                               'reference start': '2000-01-01',
+                               'reference end': '',
+                               'difference along': None,
+                               'subtracted value': None,
+                               'correlate with': 'tapped series'}
+
+
+def test_setup(analysis, data):
+    analysis.setup('temp')
+    options = analysis.difference_along.options
+    assert options[-1] == SECOND_DATASET
+    assert set(options[:-1]) <= set(data.temp.dims)
+    for dim in options[:-1]:
+        analysis.difference_along.value = dim
+        assert analysis.subtracted_value.options == list(data[dim].values)
+    analysis.difference_along.value = SECOND_DATASET
+    assert analysis.subtracted_value.disabled
+    assert 'u' in analysis.correlate_with.options
+    analysis.setup('u')
+    assert SECOND_DATASET not in analysis.difference_along.options
+    assert 'u' not in analysis.correlate_with.options
+
+
+def test_difference_along_changes_values(analysis):
+    analysis.setup('temp')
+    changed = []
+    analysis.connect('values_changed', changed.append)
+    analysis.difference_along.value = SECOND_DATASET
+    assert changed == [SECOND_DATASET]
+    assert analysis.subtracted_value.disabled
@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+import dask
+import dask.array as da
+import pytest
+from xrviz.backend import Backend, _Utilisation
+
+
+@pytest.mark.parametrize('kind', ['threads', 'processes'])
+def test_local_backend(kind):
+    backend = Backend(kind, n_workers=2)
+    computed = []
+    backend.connect('computed', computed.append)
+    backend.activate()
+    try:
+        assert dask.config.get('scheduler') == kind
+        (da.ones(1000, chunks=100) + 1).sum().compute()
+    finally:
+        backend.close()
+    assert len(computed) == 1
+    assert 0 <= backend.utilisation
+    assert backend.status()['workers'] == 2
+    assert backend.describe().startswith(f'{kind}: 2 workers')
+
+
+def test_concurrent_computations():
+    backend = Backend('threads', n_workers=2)
+    computed = []
+    backend.connect('computed', computed.append)
+    utilisation = _Utilisation(backend)
+
+    def compute():
+        return (da.ones(1000, chunks=10) + 1).sum().compute(
+            scheduler='threads', num_workers=2, callbacks=[utilisation._callback])
+
+    with ThreadPoolExecutor(4) as executor:
+        futures = [executor.submit(compute) for _ in range(8)]
+        assert [f.result() for f in futures] == [2000] * 8
+    assert len(computed) == 8
+    assert all(0 <= u <= 1 for u in computed)
+    assert utilisation._states == {}
+
+
+def test_invalid_backend():
+    with pytest.raises(ValueError):
+        Backend('gpu')
@@ -0,0 +1,46 @@
+import numpy as np
+import panel as pn
+import xarray as xr
+from xrviz.chunking import auto_chunks, disk_chunks
+from xrviz.dashboard import Dashboard
+from . import data
+
+
+def make_var(encoding=None):
+    var = xr.DataArray(np.zeros((48, 10, 20, 30), dtype='float32'),
+                       dims=['time', 'level', 'y', 'x'])
+    var.encoding.update(encoding or {})
+    return var
+
+
+def test_disk_chunks():
+    assert disk_chunks(make_var()) == {}
+    var = make_var({'chunksizes': (1, 10, 20, 30)})
+    assert disk_chunks(var) == {'time': 1, 'level': 10, 'y': 20, 'x': 30}
+
+
+def test_auto_chunks_spatial_full_animate_single():
+    var = make_var()
+    chunks = auto_chunks(var, animate=['time'])
+    assert chunks['x'] == 30 and chunks['y'] == 20
+    assert chunks['time'] == 1
+    assert chunks['level'] == 10  # fits the target size
+
+
+def test_auto_chunks_multiple_of_disk_chunks():
+    var = make_var({'chunksizes': (4, 1, 20, 30)})
+    chunks = auto_chunks(var, spatial=['y', 'x'],
+                         target_bytes=13 * 20 * 30 * 4)
+    assert chunks['time'] % 4 == 0
+    assert chunks['x'] == 30 and chunks['y'] == 20
+    assert chunks['time'] * chunks['level'] * 20 * 30 * 4 <= 16 * 20 * 30 * 4
+
+
+def test_dashboard_auto_chunks(data):
+    dash = Dashboard(data, chunks='auto')
+    dash.control.displayer.select_variable('temp')
+    dash.control.fields.agg_selectors[0].value = 'animate'
+    dash.create_graph()
+    chunks = dict(zip(dash.variable_data().dims, dash.variable_data().chunks))
+    assert chunks['sigma'] == (1,) * data.sigma.size
+    assert isinstance(dash.output[0], pn.pane.holoviews.HoloViews)
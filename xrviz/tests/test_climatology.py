@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+from xrviz.climatology import anomalies, climatology, time_dim
+
+
+@pytest.fixture
+def data():
+    times = pd.date_range('2000-01-01', periods=3 * 365, freq='D')
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(len(times), 3, 4))
+    values[5, 0, 0] = np.nan
+    return xr.DataArray(values, dims=('time', 'y', 'x'), name='temp',
+                        coords={'time': times, 'y': np.arange(3),
+                                'x': np.arange(4)})
+
+
+def test_time_dim(data):
+    assert time_dim(data) == 'time'
+    assert time_dim(data.isel(time=0)) is None
+
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_climatology(data, chunked):
+    source = data.chunk({'time': 100}) if chunked else data
+    clim = climatology(source, 'time', 'month', start='2000-01-01',
+                       end='2001-12-31')
+    reference = data.sel(time=slice('2000', '2001'))
+    expected = reference.groupby('time.month').mean()
+    assert clim.dims == ('month', 'y', 'x')
+    np.testing.assert_allclose(clim, expected)
+
+    anomaly = anomalies(source, clim, 'time')
+    month = data.time.dt.month
+    np.testing.assert_allclose(
+        anomaly, data - expected.sel(month=month).drop_vars('month'))
+
+
+def test_missing_days(data):
+    clim = climatology(data, 'time', 'dayofyear', end='2000-06-30')
+    anomaly = anomalies(data, clim, 'time').compute()
+    assert np.isnan(anomaly.sel(time='2001-12-01')).all()
+    assert not np.isnan(anomaly.sel(time='2001-01-01')).all()
+
+
+def test_series_anomalies(data):
+    clim = climatology(data, 'time', 'dayofyear')
+    point = {'y': 1, 'x': 2}
+    series = anomalies(data.sel(point), clim.sel(point), 'time', lazy=False)
+    np.testing.assert_allclose(series, anomalies(data, clim, 'time')
+                               .sel(point))
+
+
+def test_cached_climatology(data, tmp_path):
+    source = tmp_path / 'data.nc'
+    source.write_bytes(b'data')
+    clim = climatology(data, 'time', 'month', source=str(source),
+                       cache_dir=str(tmp_path))
+    cached = list(tmp_path.glob('climatology-*.npz'))
+    assert len(cached) == 1
+    # read from the cache, not the data
+    again = climatology(data * 0, 'time', 'month', source=str(source),
+                        cache_dir=str(tmp_path))
+    xr.testing.assert_equal(clim, again)
+    # nor for another variable of the same name
+    derived = climatology((data * 0).assign_attrs(expression='temp * 0'),
+                          'time', 'month', source=str(source),
+                          cache_dir=str(tmp_path))
+    assert (derived == 0).all()
+    single = climatology(data.astype('float32'), 'time', 'month',
+                         source=str(source), cache_dir=str(tmp_path))
+    assert single.dtype == 'float32'
+    # nor for another subset of the same shape
+    first = climatology(data.isel(x=[0, 1]), 'time', 'month',
+                        source=str(source), cache_dir=str(tmp_path))
+    second = climatology(data.isel(x=[2, 3]), 'time', 'month',
+                         source=str(source), cache_dir=str(tmp_path))
+    np.testing.assert_allclose(second, clim.isel(x=[2, 3]))
+    assert not np.allclose(first, second)
+    source.write_bytes(b'changed')
+    changed = climatology(data * 0, 'time', 'month', source=str(source),
+                          cache_dir=str(tmp_path))
+    assert (changed == 0).all()
@@ -13,6 +13,7 @@ def test_control_initial(control):
     tabs = [tab.name for tab in control.tabs]
     if has_cartopy:
         assert tabs == ['Variables', 'Set Coords', 'Axes', 'Style',
-                        'Projection']
+                        'Analysis', '3D Cube', 'Projection']
     else:
-        assert tabs == ['Variables', 'Set Coords', 'Axes', 'Style']
+        assert tabs == ['Variables', 'Set Coords', 'Axes', 'Style',
+                        'Analysis', '3D Cube']
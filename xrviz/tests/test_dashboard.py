@@ -1,10 +1,14 @@
+import numpy as np
 import xarray as xr
 import panel as pn
-from xrviz.dashboard import Dashboard, find_cmap_limits
+import holoviews as hv
+from xrviz import dashboard as dashboard_module
+from xrviz.dashboard import Dashboard, find_cmap_limits, sample_cmap_limits
 import pytest
 from . import data
 from ..utils import _is_coord
-from ..compatibility import has_cartopy, has_crick_tdigest
+from ..regrid import regrid
+from ..compatibility import has_cartopy, has_crick_tdigest, has_scipy
 
 
 @pytest.fixture(scope='module')
@@ -219,3 +223,211 @@ def test_find_cmap_limits_with_crick_tdigest():
                                   chunks={'lat': 25, 'lon': 25, 'time': 10})
     a, b = find_cmap_limits(ds.air)
     assert abs(a - 255.38780056044027) < 0.1 and abs(b - 298.5900340551101) < 0.1
+
+
+def test_sample_cmap_limits():
+    data = xr.DataArray(np.arange(10 ** 6.).reshape(1000, 1000),
+                        dims=['y', 'x'])
+    lower, upper = sample_cmap_limits(data)
+    assert abs(lower - 10 ** 5) < 10 ** 4 and abs(upper - 9 * 10 ** 5) < 10 ** 4
+
+
+def test_provisional_limits(data, monkeypatch):
+    monkeypatch.setattr(dashboard_module, 'PROVISIONAL_SIZE', 0)
+    dash = Dashboard(data, provisional_limits=True)
+    dash.control.displayer.select_variable('temp')
+    dash.create_graph()
+    dash._limits_executor.submit(lambda: None).result()  # wait for limits
+    sel_data = data.temp.isel(sigma=0, time=0)
+    lower, upper = find_cmap_limits(sel_data)
+    assert dash.control.style.lower_limit.value == str(round(lower, 5))
+    assert dash.control.style.upper_limit.value == str(round(upper, 5))
+
+
+def test_limits_from_stats_index(data):
+    from xrviz.stats_index import build_index
+    stats = build_index(data)
+    dash = Dashboard(data, stats_index=stats)
+    dash.control.displayer.select_variable('temp')
+    dash.create_graph()
+    lower, upper = stats.limits('temp', {'time': 0, 'sigma': 0})
+    assert dash.control.style.lower_limit.value == str(round(lower, 5))
+    assert dash.control.style.upper_limit.value == str(round(upper, 5))
+
+
+def test_warm_up(data):
+    dash = Dashboard(data, warm_up=True)
+    dash.warm_up.wait(60)
+    assert 'temp' in dash.warm_up.results
+    limits = dash.limits_cache[('temp', (('sigma', 0), ('time', 0)))]
+    assert limits == find_cmap_limits(data.temp.isel(sigma=0, time=0))
+
+
+def test_rolling_aggregation_for_dims(data):
+    dash = Dashboard(data)
+    dash.control.coord_setter.coord_selector.value = ['time', 'sigma']
+    dash.control.displayer.select_variable('temp')
+    fields = dash.control.fields
+    fields.window.value = 2
+    fields.agg_selectors[1].value = 'rolling mean'  # time
+    dash.create_graph()
+    assert isinstance(dash.output[1][1][1], pn.widgets.player.DiscretePlayer)
+    frames = dash._rolling[1]
+    assert frames.position == 0
+    expected = data.temp.isel(sigma=0).rolling(time=2, min_periods=1).mean()
+    np.testing.assert_allclose(frames.frame(1), expected.isel(time=1))
+
+
+def test_resampling_for_dims(data):
+    dash = Dashboard(data)
+    dash.control.coord_setter.coord_selector.value = ['time', 'sigma']
+    dash.control.displayer.select_variable('temp')
+    fields = dash.control.fields
+    fields.agg_selectors[1].value = 'daily mean'  # time
+    dash.create_graph()
+    expected = data.temp.resample(time='D').mean()
+    player = dash.output[1][1][1]
+    assert list(player.options) == list(expected.time.values)
+    resampled = dash._resampled[1]
+    np.testing.assert_allclose(resampled, expected)
+
+
+def test_anomaly_mode(data):
+    dash = Dashboard(data)
+    dash.control.coord_setter.coord_selector.value = ['time', 'sigma']
+    dash.control.displayer.select_variable('temp')
+    dash.control.analysis.mode.value = 'anomaly'
+    dash.control.analysis.climatology.value = 'monthly'
+    dash.create_graph()
+    expected = data.temp.groupby('time.month').mean()
+    np.testing.assert_allclose(dash.climatology, expected)
+    key = dash._climatology[0]
+    dash.create_indexed_graph()
+    assert dash._climatology[0] == key
+
+
+def test_derived_variable(data):
+    dash = Dashboard(data, derived={'speed': 'sqrt(air_u**2 + air_v**2)'})
+    assert 'speed' in dash.control.displayer.select.options
+    displayer = dash.control.displayer
+    displayer.definition.value = 'double = speed * 2'
+    displayer.add_button.clicks += 1
+    assert displayer.select.value == 'double'
+    np.testing.assert_allclose(dash.data.double.isel(time=0),
+                               2 * np.hypot(data.air_u, data.air_v).isel(time=0))
+    displayer.definition.value = 'bad = open("file")'
+    displayer.add_button.clicks += 1
+    assert 'bad' not in dash.data and displayer.message.object
+
+
+def test_difference_mode(data):
+    dash = Dashboard(data, reference=data.temp + 1)
+    dash.control.coord_setter.coord_selector.value = ['time', 'sigma']
+    dash.control.displayer.select_variable('temp')
+    analysis = dash.control.analysis
+    analysis.mode.value = 'difference'
+    analysis.difference_along.value = 'time'
+    analysis.subtracted_value.value = data.time.values[0]
+    dash.create_graph()
+    np.testing.assert_allclose(dash._reference[1], data.temp.isel(time=0))
+
+    analysis.difference_along.value = 'second dataset'
+    dash.create_graph()
+    dash.kwargs = dash.control.kwargs
+    frame = dash.analyse(dash.data.temp).isel(time=0)
+    np.testing.assert_allclose(frame.fillna(-1), -1.)
+
+
+def test_correlation_with_tapped_series(dashboard):
+    dashboard.control.coord_setter.coord_selector.value = ['time', 'sigma']
+    dashboard.control.displayer.select_variable('temp')
+    dashboard.control.fields.s_selector.value = 'sigma'
+    dashboard.control.analysis.mode.value = 'correlation'
+    dashboard.create_graph()
+    dashboard.create_taps_graph(x=35, y=10)
+    assert isinstance(dashboard.correlation_graph[0], pn.pane.holoviews.HoloViews)
+    assert len(dashboard.correlations) == 1
+    dashboard.create_taps_graph(x=35, y=10)  # cached per tap
+    assert len(dashboard.correlations) == 1
+
+
+def test_correlation_with_variable(data):
+    dash = Dashboard(data)
+    dash.control.coord_setter.coord_selector.value = ['time', 'sigma']
+    dash.control.displayer.select_variable('u')
+    dash.control.fields.s_selector.value = 'time'
+    dash.control.analysis.mode.value = 'correlation'
+    dash.control.analysis.correlate_with.value = 'v'
+    dash.create_graph()
+    (key, corr), = dash.correlations.items()
+    assert 'time' not in corr.dims
+    np.testing.assert_allclose(corr, xr.corr(data.u, data.v, 'time'))
+
+
+def test_ensemble_plume(data):
+    ensemble = data[['temp']].expand_dims(member=[0, 1, 2])
+    dash = Dashboard(ensemble)
+    dash.control.coord_setter.coord_selector.value = ['time', 'sigma']
+    dash.control.displayer.select_variable('temp')
+    fields = dash.control.fields
+    selector, = [s for s in fields.agg_selectors if s.name == 'member']
+    assert 'ensemble spread' in selector.options
+    selector.value = 'ensemble spread'
+    fields.s_selector.value = 'sigma'
+    dash.create_graph()
+    dash.create_taps_graph(x=35, y=10)
+    assert isinstance(dash.series_graph[0], pn.pane.holoviews.HoloViews)
+    curves = dash.series_graph[0].object.traverse(lambda c: c, [hv.Curve])
+    assert len(curves) == 4  # members and spread
+
+
+def test_vertical_interpolation(data):
+    depth = xr.DataArray(np.linspace(0., 100., data.sizes['sigma']),
+                         dims='sigma')
+    dash = Dashboard(data.assign(depth=depth))
+    dash.control.displayer.select_variable('temp')
+    fields = dash.control.fields
+    selector, = [s for s in fields.agg_selectors if s.name == 'sigma']
+    assert 'interpolate' in selector.options
+    assert 'depth' in fields.vertical.options
+    selector.value = 'interpolate'
+    fields.vertical.value = 'depth'
+    fields.levels.value = '10, 50'
+    dash.plot_button.clicks += 1
+    sigma, = [s for s in dash.output[1] if s.name == 'sigma']
+    assert sigma.options == [10., 50.]
+    dash.kwargs = dash.control.kwargs
+    out = dash.interpolate(dash.data.temp).isel(time=0, sigma=1)
+    expected = np.apply_along_axis(
+        lambda column: np.interp(50., depth, column), 0,
+        data.temp.isel(time=0).values)
+    np.testing.assert_allclose(out, expected)
+
+
+@pytest.mark.skipif(not has_scipy, reason='scipy not present')
+def test_regrid_curvilinear(data, tmpdir, monkeypatch):
+    monkeypatch.setattr(dashboard_module, 'regrid',
+                        lambda *args: regrid(*args, cache_dir=str(tmpdir)))
+    dash = Dashboard(data)
+    dash.control.coord_setter.coord_selector.value = ['lat', 'lon']
+    dash.control.displayer.select_variable('temp')
+    dash.control.style.regrid.value = 'bilinear'
+    dash.create_graph()
+    assert isinstance(dash.output[0], pn.pane.holoviews.HoloViews)
+    out, regridded = dash.regrid(dash.data.temp)
+    assert regridded and out.lat.ndim == 1 and out.lon.ndim == 1
+    assert len(tmpdir.listdir()) == 1  # weights computed once
+
+
+def test_regular_grid_image(data):
+    dash = Dashboard(data)
+    dash.control.displayer.select_variable('temp')
+    dash.control.style.rasterize.value = False
+    dash.create_graph()
+    assert dash.graph.traverse(lambda e: e, [hv.Image])
+    nx = np.arange(data.sizes['nx']) ** 2  # irregular
+    dash = Dashboard(data.assign_coords(nx=nx))
+    dash.control.displayer.select_variable('temp')
+    dash.control.style.rasterize.value = False
+    dash.create_graph()
+    assert dash.graph.traverse(lambda e: e, [hv.QuadMesh])
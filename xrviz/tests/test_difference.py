@@ -0,0 +1,36 @@
+import dask.array
+import numpy as np
+import pytest
+import xarray as xr
+from xrviz.difference import align, subtract
+
+
+@pytest.fixture
+def data():
+    values = np.arange(3 * 4 * 5, dtype='float64').reshape((3, 4, 5))
+    return xr.DataArray(values, dims=('time', 'y', 'x'), name='temp',
+                        coords={'time': [0, 1, 2], 'y': np.arange(4.),
+                                'x': np.arange(5.)})
+
+
+def test_subtract_frame(data):
+    reference = data.sel(time=1, drop=True)
+    out = subtract(data, reference)
+    assert isinstance(out.data, dask.array.Array)
+    assert out.chunks[0] == (1, 1, 1)
+    assert out.dims == data.dims and out.name == 'temp'
+    np.testing.assert_allclose(out.isel(time=2), 20.)
+
+
+def test_align(data):
+    xr.testing.assert_identical(align(data, data), data)
+    other = data.transpose('x', 'y', 'time') + 1
+    np.testing.assert_allclose(subtract(data, align(other, data)), -1.)
+    # a coarser and shifted grid, matched by nearest neighbours
+    coarse = data.isel(y=[0, 2], x=[0, 2, 4]).assign_coords(
+        y=[0.1, 2.1], x=[0.1, 2.1, 4.1])
+    aligned = align(coarse, data)
+    assert aligned.shape == data.shape
+    np.testing.assert_allclose(aligned.isel(y=1, x=1), data.isel(y=0, x=0))
+    with pytest.raises(ValueError):
+        align(data.isel(time=0), data)
@@ -0,0 +1,75 @@
+import dask.array
+import numpy as np
+import pytest
+import xarray as xr
+from xrviz.expressions import derive, evaluate, parse, split_definition
+
+
+@pytest.fixture
+def dataset():
+    rng = np.random.default_rng(0)
+    shape = (4, 5, 6)
+    return xr.Dataset(
+        {'u': (('time', 'y', 'x'), rng.normal(size=shape)),
+         'v': (('time', 'y', 'x'), rng.normal(size=shape).astype('float32')),
+         'mask': (('y', 'x'), rng.integers(0, 2, size=shape[1:]))},
+        coords={'time': np.arange(4), 'lat': (('y', 'x'), np.ones(shape[1:]))})
+
+
+def test_parse():
+    assert parse('sqrt(u**2 + v**2)', ['u', 'v', 'w']) == ['u', 'v']
+    assert parse('where(mask > 0, u, -1.5)', ['u', 'mask']) == ['mask', 'u']
+
+
+@pytest.mark.parametrize('expression', [
+    'u.real', 'open("x")', '__import__("os")', 'u[0]', 'lambda: u',
+    '"a" + u', 'np.sqrt(u)', 'sqrt(u, out=v)', 'w + 1', '1 + 2', 'u +'])
+def test_parse_unsafe(expression):
+    with pytest.raises(ValueError):
+        parse(expression, ['u', 'v'])
+
+
+@pytest.mark.parametrize('expression', [
+    'u + 9**9**8', 'u * (2**100)**100', 'u ** 1000', 'u + 10**-65',
+    'u ** (v ** 2)', 'u + 9 ** (10000*10000)', 'u + 9 ** --100000000',
+    'u + 9 ** ~-100000000', 'u + 9 ** abs(100000000)'])
+def test_large_powers(dataset, expression):
+    with pytest.raises(ValueError):
+        derive(dataset, {'w': expression})
+
+
+def test_small_powers(dataset):
+    out = derive(dataset, {'w': 'u ** 2 + 2 ** -3 + u ** v + 2 ** --1'})
+    assert 'w' in out
+
+
+def test_evaluate(dataset):
+    speed = evaluate(dataset, 'sqrt(u**2 + v**2)', 'speed')
+    assert isinstance(speed.data, dask.array.Array)
+    assert speed.chunks[0] == (1, 1, 1, 1)
+    assert speed.name == 'speed' and speed.dtype == 'float64'
+    assert speed.attrs['expression'] == 'sqrt(u**2 + v**2)'
+    assert 'lat' in speed.coords
+    np.testing.assert_allclose(speed, np.sqrt(dataset.u ** 2 +
+                                              dataset.v ** 2))
+
+    masked = evaluate(dataset, 'where(mask > 0, maximum(u, 0), -1)')
+    assert masked.dims == ('time', 'y', 'x')
+    expected = xr.where(dataset.mask > 0, np.maximum(dataset.u, 0), -1)
+    np.testing.assert_allclose(masked, expected.transpose(*masked.dims))
+
+
+def test_derive(dataset):
+    derived = derive(dataset.chunk({'time': 2}),
+                     {'speed': 'sqrt(u**2 + v**2)', 'double': 'speed * 2'})
+    assert derived.double.chunks[0] == (2, 2)
+    np.testing.assert_allclose(derived.double, 2 * derived.speed)
+    with pytest.raises(ValueError):
+        derive(dataset, {'u': 'v'})
+
+
+def test_split_definition():
+    assert split_definition(' speed = sqrt(u) ') == ('speed', 'sqrt(u)')
+    for definition in ['sqrt(u)', 'a b = u', 'speed =']:
+        with pytest.raises(ValueError):
+            split_definition(definition)
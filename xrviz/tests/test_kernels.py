@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+import xarray as xr
+from xrviz import kernels
+from xrviz.reductions import aggregate
+
+
+@pytest.fixture
+def array():
+    values = np.random.RandomState(0).normal(size=(30, 4, 6, 5000))
+    values[0, :, 0, 0] = np.nan
+    values[:, :, 1, 1] = np.nan  # all NaNs
+    values[:, :, 2, 2] = -np.inf
+    return xr.DataArray(values.astype('float32'),
+                        dims=['time', 'level', 'y', 'x'],
+                        coords={'time': np.arange(30)}, name='temp')
+
+
+@pytest.mark.parametrize('dims', [['time', 'y'], ['level'], ['y'],
+                                  ['level', 'y'], ['x']])
+@pytest.mark.parametrize('agg', kernels.AGGREGATIONS)
+def test_kernels_match_xarray(array, agg, dims, monkeypatch):
+    monkeypatch.setattr(kernels, 'KERNEL_SIZE', None)
+    expected = aggregate(array, {dim: agg for dim in dims})
+    monkeypatch.setattr(kernels, 'KERNEL_SIZE', 0)
+    out = aggregate(array, {dim: agg for dim in dims})
+    assert out.dims == expected.dims and out.dtype == expected.dtype
+    np.testing.assert_allclose(out, expected, rtol=1e-5, atol=1e-6)
+
+
+def test_kernels_threshold(array, monkeypatch):
+    monkeypatch.setattr(kernels, 'KERNEL_SIZE', array.size + 1)
+    assert not kernels.applies(array.data, 'mean')
+    monkeypatch.setattr(kernels, 'KERNEL_SIZE', array.size)
+    assert kernels.applies(array.data, 'mean')
+    assert not kernels.applies(array.data.astype('int32'), 'mean')
+    assert not kernels.applies(array.chunk().data, 'mean')
+    assert kernels.applies(array.data, 'mean', [1, 2])
+    assert not kernels.applies(array.data, 'mean', [3])
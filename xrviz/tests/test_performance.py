@@ -0,0 +1,66 @@
+import dask.array as da
+import numpy as np
+from xrviz.dashboard import Dashboard
+from xrviz.performance import Recorder
+from . import data
+
+
+def test_recorder_disabled():
+    recorder = Recorder()
+    with recorder.invocation('call') as inv:
+        with inv.stage('stage'):
+            pass
+    assert len(recorder.records) == 0
+
+
+def test_recorder_nested_invocations():
+    recorder = Recorder(enabled=True)
+    with recorder.invocation('outer'):
+        with recorder.stage('a'):
+            pass
+        with recorder.invocation('inner'):
+            with recorder.stage('b'):
+                pass
+            recorder.cache(hit=True)
+            recorder.cache(hit=False)
+    [record] = recorder.records
+    assert record.name == 'outer'
+    assert list(record.stages) == ['a', 'b']
+    assert record.hit_rate == 0.5
+    assert record.total >= sum(record.stages.values())
+
+
+def test_dashboard_records_stages(data):
+    dash = Dashboard(data, performance=True)
+    assert dash.control.tabs[-1].name == 'Performance'
+    dash.control.displayer.select_variable('temp')
+    dash.plot_button.clicks += 1
+    record = dash.recorder.records[-1]
+    assert record.name == 'create_graph'
+    assert {'aggregation', 'cmap limits', 'hvplot', 'render'} <= set(record.stages)
+    assert record.info['bytes'] == data.temp.nbytes
+    df = dash.recorder.to_dataframe()
+    assert df['call'][0] == 'create_graph'
+
+
+def test_recorder_memory_threshold():
+    exceeded = []
+    recorder = Recorder(enabled=True, memory_threshold=2**20, trace_heap=True)
+    recorder.connect('memory_exceeded', exceeded.append)
+    with recorder.invocation('small'):
+        pass
+    with recorder.invocation('large'):
+        np.ones(2**22).sum()
+    assert [record.name for record in exceeded] == ['large']
+    assert exceeded[0].memory['heap peak'] >= 2**25
+    report = recorder.memory_report()
+    assert list(report['call']) == ['large', 'small']
+
+
+def test_recorder_dask_task_memory():
+    recorder = Recorder(enabled=True)
+    with recorder.invocation('dask'):
+        (da.ones(1000, chunks=100) + 1).compute(scheduler='sync')
+    memory = recorder.records[-1].memory
+    assert memory['dask largest task'] >= 800
+    assert memory['dask bytes'] >= 8000
@@ -0,0 +1,78 @@
+import numpy as np
+import panel as pn
+import pytest
+import xarray as xr
+from xrviz.planner import estimate, plan
+from . import data
+from .test_dashboard import dashboard
+
+
+@pytest.fixture()
+def array():
+    return xr.DataArray(np.zeros((100, 20, 30)), dims=['time', 'y', 'x'])
+
+
+def test_estimate(array):
+    touched, peak = estimate(array, {'time': 'mean'})
+    assert touched == array.nbytes
+    assert peak == 2 * array.nbytes
+    touched, _ = estimate(array, {}, selection=['time'])
+    assert touched == array.nbytes // 100
+
+
+def test_estimate_dask(array):
+    chunked = array.chunk({'time': 10})
+    _, peak = estimate(chunked, {'time': 'mean'})
+    assert peak < 2 * array.nbytes
+    _, median_peak = estimate(chunked, {'time': 'median'})
+    assert median_peak > peak
+    # histograms of 256 one-byte bins per point of each chunk
+    _, quantile_peak = estimate(chunked, {'time': 'median'},
+                                approximate=True)
+    assert quantile_peak - peak >= 20 * 30 * 256
+
+
+def test_plan_within_budget(array):
+    assert plan(array, {'time': 'mean'}, None).strategy == 'exact'
+    assert plan(array, {'time': 'mean'}, 10 * array.nbytes).strategy == 'exact'
+
+
+def test_plan_chunked(array):
+    p = plan(array, {'time': 'mean'}, array.nbytes // 10)
+    assert p.strategy == 'chunked'
+    out = p.apply(array).mean('time')
+    assert out.chunks is not None
+    np.testing.assert_allclose(out, array.mean('time'))
+
+
+def test_plan_approximate_and_coarsened(array):
+    p = plan(array, {'time': 'median'}, array.nbytes)
+    assert p.strategy == 'approximate'
+    assert p.apply(array).sizes['time'] < 100
+    p = plan(array, {'time': 'median'}, array.nbytes // 10,
+             spatial=['x', 'y'])
+    assert p.strategy == 'coarsened'
+    assert p.apply(array).sizes['x'] < 30
+    assert p.apply(array).sizes['time'] == 100
+
+
+def test_plan_confirm(array):
+    p = plan(array, {'time': 'mean'}, 1, confirm=True)
+    assert p.strategy == 'confirm'
+
+
+def test_dashboard_over_budget(dashboard):
+    dashboard.control.displayer.select_variable('temp')
+    dashboard.control.fields.agg_selectors[0].value = 'median'
+    dashboard.memory_budget = 1
+    dashboard.confirm_over_budget = True
+    try:
+        dashboard.create_graph()
+        assert dashboard.plan.strategy == 'confirm'
+        assert dashboard.budget_pane[1] is dashboard.plot_anyway_button
+        dashboard.plot_anyway_button.clicks += 1
+        assert dashboard.plan.strategy != 'confirm'
+        assert isinstance(dashboard.output[0], pn.pane.holoviews.HoloViews)
+    finally:
+        dashboard.memory_budget = None
+        dashboard.confirm_over_budget = False
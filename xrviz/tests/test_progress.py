@@ -0,0 +1,47 @@
+import dask.array as da
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from xrviz.progress import Cancelled, ProgressReporter
+
+
+def test_track_progress():
+    reporter = ProgressReporter()
+    values = []
+    reporter.bar.param.watch(lambda event: values.append(event.new), 'value')
+    with reporter.track():
+        assert reporter.tracking
+        assert not reporter.stop_button.disabled
+        (da.ones(100, chunks=10) + 1).sum().compute(scheduler='sync')
+    assert 100 in values
+    assert not reporter.tracking
+    assert reporter.stop_button.disabled
+
+
+def test_cancel_computation():
+    reporter = ProgressReporter()
+
+    def stop(block):
+        reporter.stop_button.clicks += 1
+        return block
+
+    with pytest.raises(Cancelled):
+        with reporter.track():
+            da.ones(10, chunks=1).map_blocks(stop).sum().compute(scheduler='sync')
+    assert not reporter.tracking
+
+    # a new computation is not cancelled
+    with reporter.track():
+        da.ones(10, chunks=1).sum().compute(scheduler='sync')
+
+
+def test_other_threads_not_tracked():
+    reporter = ProgressReporter()
+    with reporter.track():
+        reporter.cancel()
+        # e.g. the warm-up, or the exact colormap limits
+        with ThreadPoolExecutor(1) as executor:
+            future = executor.submit(
+                lambda: da.ones(10, chunks=1).sum().compute(scheduler='sync'))
+            assert future.result() == 10
+        with pytest.raises(Cancelled):
+            da.ones(10, chunks=1).sum().compute(scheduler='sync')
@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+from xrviz import reductions
+from xrviz.reductions import (RESAMPLING, ROLLING, Rolling, aggregate,
+                              approximate_quantile, correlation,
+                              histogram_nbytes, is_ensemble_dim, resample,
+                              rolling)
+
+
+@pytest.fixture
+def array():
+    values = np.random.RandomState(0).normal(size=(200, 10, 4, 5))
+    values[0, 0, 0, 0] = np.nan
+    return xr.DataArray(values, dims=['time', 'level', 'y', 'x'])
+
+
+def test_fused_dims(array):
+    out = aggregate(array, {'time': 'median', 'level': 'median'})
+    assert out.dims == ('y', 'x')
+    np.testing.assert_allclose(out, array.median(['time', 'level']))
+
+
+def test_fused_count(array):
+    out = aggregate(array, {'time': 'count', 'level': 'count'})
+    assert int(out[0, 0]) == 1999 and int(out[0, 1]) == 2000
+
+
+def test_mixed_aggregations(array):
+    out = aggregate(array, {'time': 'mean', 'level': 'max'})
+    np.testing.assert_allclose(out, array.mean('time').max('level'))
+
+
+def test_approximate_quantile(array):
+    chunked = array.chunk({'time': 30, 'level': 4})
+    out = approximate_quantile(chunked, 0.5, ['time', 'level'])
+    exact = array.median(['time', 'level'])
+    width = (np.nanmax(array) - np.nanmin(array)) / 256
+    assert out.dims == ('y', 'x')
+    assert float(abs(out - exact).max()) <= width
+    out = aggregate(chunked, {'time': 'median'}, approximate=True)
+    assert float(abs(out - array.median('time')).max()) <= width
+
+
+def test_approximate_quantile_blocks(array, monkeypatch):
+    chunked = array.chunk({'time': 30, 'level': 4})
+    limits = (np.nanmin(array), np.nanmax(array))
+    expected = approximate_quantile(chunked, 0.9, ['time'], limits=limits)
+    monkeypatch.setattr(reductions, 'HISTOGRAM_POINTS', 3)
+    out = approximate_quantile(chunked, 0.9, ['time'])
+    np.testing.assert_array_equal(out, expected)
+    # 30 values of a chunk along time are counted in bytes
+    assert histogram_nbytes(chunked.chunks, [0]) == 4 * 4 * 5 * 256
+
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_linear_trend(array, chunked):
+    times = pd.date_range('2000-01-01', periods=200, freq='D')
+    data = array.assign_coords(time=times)
+    data = data + 0.5 * np.arange(200)[:, None, None, None]
+    if chunked:
+        data = data.chunk({'time': 30})
+    slope = aggregate(data, {'time': 'slope'})
+    expected = data.polyfit('time', 1, skipna=True).polyfit_coefficients
+    per_day = expected.sel(degree=1) * 1e9 * 86400  # from per nanosecond
+    np.testing.assert_allclose(slope.isel(level=1), per_day.isel(level=1))
+    np.testing.assert_allclose(slope.isel(level=0)[1:], per_day.isel(level=0)[1:])
+    trend = aggregate(data, {'time': 'trend', 'level': 'trend'})
+    assert trend.dims == ('y', 'x')
+    np.testing.assert_allclose(trend, 0.5 * 199, rtol=0.2)
+
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_percentile_exceedances(array, chunked):
+    data = array.chunk({'time': 30}) if chunked else array
+    out = aggregate(data, {'time': 'percentile'}, percentile=90)
+    exact = array.quantile(0.9, 'time').drop_vars('quantile')
+    width = (np.nanmax(array) - np.nanmin(array)) / 256
+    assert float(abs(out - exact).max()) <= width
+    count = aggregate(data, {'time': 'exceedances', 'level': 'exceedances'},
+                      threshold=1.)
+    np.testing.assert_array_equal(count, (array > 1).sum(['time', 'level']))
+
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_correlation(array, chunked):
+    data = array.chunk({'time': 30}) if chunked else array
+    series = array.isel(level=0, y=1, x=2)
+    out = correlation(data, series, ['time'])
+    assert out.dims == ('level', 'y', 'x')
+    np.testing.assert_allclose(out, xr.corr(array, series, 'time'))
+    assert float(out.isel(level=0, y=1, x=2)) == pytest.approx(1.)
+    other = -2 * array + 1
+    np.testing.assert_allclose(correlation(data, other, ['time']), -1.)
+
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_ensemble(array, chunked):
+    members = (array + 300).rename(level='member')
+    assert is_ensemble_dim(members, 'member')
+    assert not is_ensemble_dim(members, 'time')
+    data = members.chunk({'time': 50, 'member': 3}) if chunked else members
+    np.testing.assert_allclose(aggregate(data, {'member': 'ensemble mean'}),
+                               members.mean('member'))
+    np.testing.assert_allclose(aggregate(data, {'member': 'ensemble spread'}),
+                               members.std('member'))
+    probability = aggregate(data, {'member': 'ensemble probability'},
+                            threshold=300.5)
+    np.testing.assert_allclose(
+        probability, (members > 300.5).sum('member') / members.count('member'))
+    out = aggregate(data, {'member': 'ensemble percentile'}, percentile=80)
+    np.testing.assert_allclose(
+        out, members.quantile(0.8, 'member').drop_vars('quantile'))
+
+
+@pytest.mark.parametrize('agg', ROLLING)
+@pytest.mark.parametrize('window', [1, 4, 300])
+def test_rolling(array, agg, window):
+    expected = getattr(array.rolling(time=min(window, 200), min_periods=1),
+                       agg)()
+    np.testing.assert_allclose(rolling(array, 'time', agg, window), expected)
+    chunked = rolling(array.chunk({'time': 1}), 'time', agg, window)
+    np.testing.assert_allclose(chunked, expected)
+
+
+@pytest.mark.parametrize('agg', ROLLING)
+def test_rolling_frames(array, agg):
+    expected = getattr(array.rolling(time=4, min_periods=1), agg)()
+    frames = Rolling(array, 'time', agg, 4)
+    # in sequence, then jumping
+    for position in list(range(12)) + [50, 3, 4, 5]:
+        np.testing.assert_allclose(frames.frame(position),
+                                   expected.isel(time=position))
+
+
+@pytest.mark.parametrize('option, reference', [
+    ('daily mean', lambda d: d.resample(time='D').mean()),
+    ('monthly mean', lambda d: d.resample(time='MS').mean()),
+    ('seasonal mean', lambda d: d.resample(time='QS-DEC').mean()),
+    ('day-of-year climatology',
+     lambda d: d.groupby('time.dayofyear').mean().rename(dayofyear='time')),
+])
+def test_resample(option, reference):
+    times = pd.date_range('2000-11-20', periods=24 * 400, freq='h')
+    values = np.random.RandomState(0).normal(size=(len(times), 3, 4))
+    values[5:40, 0, 0] = np.nan
+    data = xr.DataArray(values, dims=['time', 'y', 'x'],
+                        coords={'time': times})
+    expected = reference(data)
+    for array in [data, data.chunk({'time': 100})]:
+        out = resample(array, 'time', RESAMPLING[option])
+        np.testing.assert_allclose(out, expected)
+        np.testing.assert_array_equal(out.time, expected.time)
+
+
+def test_group_mean_many_chunks():
+    # chunks of one time, as given by chunks='auto' to animated dimensions
+    times = pd.date_range('2000-01-01', periods=3000, freq='h')
+    values = np.random.RandomState(0).normal(size=(len(times), 2, 3))
+    data = xr.DataArray(values, dims=['time', 'y', 'x'],
+                        coords={'time': times})
+    chunked = data.chunk({'time': 1})
+    out = resample(chunked, 'time', 'D')
+    np.testing.assert_allclose(out, data.resample(time='D').mean())
+    # the partial sums are added up as a tree, in few tasks per chunk
+    assert len(dict(out.data.__dask_graph__())) < 4 * len(times)
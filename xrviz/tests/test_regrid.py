@@ -0,0 +1,58 @@
+import os
+import dask.array
+import numpy as np
+import pytest
+import xarray as xr
+from xrviz.compatibility import has_scipy
+from xrviz.regrid import regrid, regrid_weights, target_grid
+
+pytestmark = pytest.mark.skipif(not has_scipy, reason="requires scipy")
+
+
+@pytest.fixture
+def data():
+    # a rotated grid, on which values are linear in x and y
+    j, i = np.meshgrid(np.arange(6.), np.arange(8.), indexing='ij')
+    angle = np.deg2rad(20)
+    x = 10 + i * np.cos(angle) - j * np.sin(angle)
+    y = 40 + i * np.sin(angle) + j * np.cos(angle)
+    values = np.stack([2 * x + 3 * y + t for t in range(3)])
+    return xr.DataArray(values, dims=('time', 'ny', 'nx'), name='temp',
+                        coords={'time': [0, 1, 2], 'lon': (('ny', 'nx'), x),
+                                'lat': (('ny', 'nx'), y)})
+
+
+def test_target_grid(data):
+    x, y = target_grid(data.lon, data.lat)
+    assert x[0] == data.lon.min() and x[-1] == data.lon.max()
+    assert y[0] == data.lat.min() and y[-1] == data.lat.max()
+    assert abs(len(x) * len(y) - data.lon.size) < max(len(x), len(y))
+
+
+@pytest.mark.parametrize('method', ['nearest', 'bilinear'])
+def test_regrid(data, method, tmpdir):
+    out = regrid(data, 'lon', 'lat', method, cache_dir=str(tmpdir))
+    assert isinstance(out.data, dask.array.Array)
+    assert out.dims == ('time', 'lat', 'lon') and out.name == 'temp'
+    assert out.lat.ndim == 1 and out.lon.ndim == 1
+    frame = out.isel(time=1).values
+    expected = 2 * out.lon.values[None, :] + 3 * out.lat.values[:, None] + 1
+    inside = np.isfinite(frame)
+    assert 0.3 < inside.mean() < 1  # corners outside of the rotated grid
+    if method == 'bilinear':
+        np.testing.assert_allclose(frame[inside], expected[inside])
+    else:
+        assert np.abs(frame - expected)[inside].max() < 5 * np.sqrt(2)
+    files = os.listdir(str(tmpdir))
+    assert len(files) == 1 and files[0].startswith('regrid-')
+
+
+def test_weights_cached(data, tmpdir):
+    weights, target = regrid_weights(data.lon, data.lat,
+                                     cache_dir=str(tmpdir))
+    again, _ = regrid_weights(data.lon.copy(), data.lat.copy(),
+                              cache_dir=str(tmpdir))
+    assert again is weights
+    assert weights.shape == (len(target[0]) * len(target[1]), data.lon.size)
+    np.testing.assert_allclose(weights.sum(axis=1)[weights.getnnz(axis=1) > 0],
+                               1.)
@@ -0,0 +1,111 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .. import sigslot
+from ..sigslot import SigSlot, tracer
+
+
+def test_return_false_halts_chain():
+    slots = SigSlot()
+    slots._register(None, 'sig')
+    called = []
+    slots.connect('sig', lambda value: called.append(1) or False)
+    slots.connect('sig', lambda value: called.append(2))
+    slots._emit('sig', 'value')
+    assert called == [1]
+
+
+def test_connect_coroutine():
+    slots = SigSlot()
+    slots._register(None, 'sig')
+    called = []
+
+    async def callback(value):
+        called.append(value)
+
+    slots.connect('sig', callback)
+    slots._emit('sig', 'value')
+    assert called == ['value']
+
+
+def test_connect_with_executor():
+    slots = SigSlot()
+    slots._register(None, 'sig')
+    applied = threading.Event()
+    results = []
+
+    def callback(value):
+        return lambda: (results.append(value * 2), applied.set())
+
+    with ThreadPoolExecutor(1) as executor:
+        slots.connect('sig', callback, executor=executor)
+        slots._emit('sig', 21)
+        assert applied.wait(5)
+    assert results == [42]
+
+
+def test_executor_result_on_document(monkeypatch):
+    class Document(object):
+        callbacks = []
+
+        def add_next_tick_callback(self, callback):
+            self.callbacks.append(callback)
+
+    doc = Document()
+    main = threading.current_thread()
+    # only the thread emitting the event has a current document
+    monkeypatch.setattr(sigslot, '_served_document',
+                        lambda: doc if threading.current_thread() is main
+                        else None)
+    slots = SigSlot()
+    slots._register(None, 'sig')
+    results = []
+    with ThreadPoolExecutor(1) as executor:
+        slots.connect('sig', lambda value: lambda: results.append(value),
+                      executor=executor)
+        slots._emit('sig', 1)
+    assert results == [] and len(doc.callbacks) == 1
+    doc.callbacks[0]()
+    assert results == [1]
+
+
+def test_superseded_event_is_cancelled():
+    slots = SigSlot()
+    slots._register(None, 'sig')
+    release = threading.Event()
+    results = []
+
+    def callback(value):
+        release.wait(5)
+        return lambda: results.append(value)
+
+    with ThreadPoolExecutor(1) as executor:
+        slots.connect('sig', callback, executor=executor)
+        for value in range(3):
+            slots._emit('sig', value)
+        release.set()
+    assert results == [2]
+
+
+def test_tracer(tmpdir):
+    slots = SigSlot()
+    slots._register(None, 'sig')
+    slots.connect('sig', lambda value: None)
+    slots._emit('sig', 'untraced')
+    tracer.enable(maxlen=2)
+    try:
+        for value in range(3):
+            slots._emit('sig', value)
+    finally:
+        tracer.disable()
+    assert len(tracer.events) == 2
+    [(sig, name, total, count, longest)] = tracer.summary()
+    assert (sig, count) == ('sig', 2) and name.endswith('<lambda>')
+    assert total >= longest
+
+    path = str(tmpdir.join('trace.json'))
+    tracer.dump(path)
+    with open(path) as f:
+        events = json.load(f)['traceEvents']
+    assert [event['cat'] for event in events] == ['sig', 'sig']
+    tracer.clear()
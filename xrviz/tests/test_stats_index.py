@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+import xarray as xr
+from xrviz.stats_index import (BINS, QUANTILES, build_index, index_path,
+                               load_index, write_index)
+
+
+@pytest.fixture
+def dataset():
+    values = np.arange(4 * 5 * 6, dtype='float64').reshape((4, 5, 6))
+    values[1, 0, :] = np.nan
+    return xr.Dataset({'temp': (('time', 'y', 'x'), values),
+                       'empty': (('y', 'x'), np.full((5, 6), np.nan)),
+                       'flag': (('time',), np.arange(4))})
+
+
+def test_build_index(dataset):
+    stats = build_index(dataset)
+    assert 'temp' in stats and 'empty' in stats and 'flag' not in stats
+    entry = stats.variables['temp']
+    assert entry['dims'] == ['time'] and entry['spatial'] == ['y', 'x']
+    assert entry['min'] == 0 and entry['max'] == 119
+    assert entry['mean'] == pytest.approx(np.nanmean(dataset.temp))
+    assert entry['nan_fraction'] == pytest.approx(6 / 120)
+    assert sum(entry['histogram']) == 114 and len(entry['edges']) == BINS + 1
+    assert len(entry['quantiles']) == len(QUANTILES)
+
+    frame = dataset.temp.isel(time=1)
+    assert stats.frame('temp', 'nan_fraction', {'time': 1}) == 0.2
+    assert stats.limits('temp', {'time': 1}) == pytest.approx(
+        [float(q) for q in frame.quantile([0.1, 0.9])])
+    counts, edges = stats.histogram('temp', {'time': 1})
+    assert sum(counts) == 24
+    assert stats.limits('temp', {'level': 0}) is None
+    assert stats.all_missing('empty') and not stats.all_missing('temp')
+
+
+def test_build_index_dask(dataset):
+    exact = build_index(dataset)
+    chunked = build_index(dataset.chunk({'time': 1}))
+    assert chunked.variables['temp'] == exact.variables['temp']
+
+
+def test_stale_index(dataset, tmp_path):
+    source = tmp_path / 'data.nc'
+    source.write_bytes(b'data')
+    path = index_path(str(source))
+    write_index(build_index(dataset, str(source)), path)
+    assert load_index(path, source=str(source)) is not None
+    assert load_index(str(tmp_path / 'missing.json')) is None
+
+    # subsets of the indexed data are not at the same positions
+    loaded = load_index(path, source=str(source),
+                        data=dataset.isel(time=slice(1, None)))
+    assert 'temp' not in loaded and 'empty' in loaded
+    shifted = dataset.assign_coords(time=np.arange(1, 5))
+    assert 'temp' not in load_index(path, data=shifted)
+    assert 'temp' in load_index(path, data=dataset)
+
+    source.write_bytes(b'changed')
+    assert load_index(path, source=str(source)) is None
@@ -85,3 +85,11 @@ def test_setup(style):
     style._emit('clear_cmap_limits', '')
     assert style.lower_limit.value is None
     assert style.upper_limit.value is None
+
+
+def test_regrid(style):
+    regrid_wid = style.regrid
+    assert isinstance(regrid_wid, pn.widgets.Select)
+    assert regrid_wid.name == 'regrid'
+    assert regrid_wid.value == 'none'
+    assert style.kwargs['regrid'] == 'none'
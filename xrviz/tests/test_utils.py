@@ -1,7 +1,10 @@
+import numpy as np
 import panel as pn
 import pytest
+import xarray as xr
 from panel.widgets import DiscretePlayer, DiscreteSlider, Select
-from ..utils import convert_widget, player_with_name_and_value
+from ..utils import (convert_widget, is_regular, player_with_name_and_value,
+                     plot_type)
 
 
 @pytest.mark.parametrize("source_widget,target_widget",
@@ -41,3 +44,23 @@ def test_player_with_name_and_value():
     player.value = 'c'
     out_markdown_value = out[0][1]
     assert out_markdown_value.object == player.value
+
+
+def test_is_regular():
+    assert is_regular(xr.DataArray(np.linspace(0., 1., 11)))
+    assert is_regular(xr.DataArray(np.arange(10)[::-1]))
+    assert is_regular(xr.DataArray(np.linspace(0., 1., 11) + 1e-5 *
+                                   (np.arange(11) % 2)))
+    assert not is_regular(xr.DataArray(np.array([0., 1., 3.])))
+    assert not is_regular(xr.DataArray(np.zeros((2, 2))))
+    assert not is_regular(xr.DataArray(np.array([0.])))
+
+
+def test_plot_type():
+    data = xr.DataArray(np.zeros((3, 4)), dims=('y', 'x'),
+                        coords={'y': [0., 1., 2.], 'x': [0., 2., 4., 6.]})
+    assert plot_type(data, 'x', 'y') == 'image'
+    irregular = data.assign_coords(x=[0., 1., 4., 6.])
+    assert plot_type(irregular, 'x', 'y') == 'quadmesh'
+    curvilinear = data.assign_coords(lon=(('y', 'x'), np.zeros((3, 4))))
+    assert plot_type(curvilinear, 'lon', 'y') == 'quadmesh'
@@ -0,0 +1,61 @@
+import dask.array
+import numpy as np
+import pytest
+import xarray as xr
+from xrviz.vertical import (interpolate, interpolation_weights,
+                            is_level_dim, parse_levels, vertical_coords)
+
+
+@pytest.fixture
+def data():
+    rng = np.random.RandomState(0)
+    sigma = np.linspace(0., 1., 5)
+    bathymetry = np.array([[10., 20., 40.], [80., np.nan, 5.]])
+    depth = xr.DataArray(sigma[:, None, None] * bathymetry,
+                         dims=('sigma', 'y', 'x'))
+    return xr.Dataset({'temp': (('time', 'sigma', 'y', 'x'),
+                                rng.normal(size=(3, 5, 2, 3))),
+                       'depth': depth},
+                      coords={'time': [0, 1, 2], 'sigma': sigma})
+
+
+def expected(data, target):
+    """Interpolated by numpy, column by column"""
+    out = np.full((3, 2, 3), np.nan)
+    for t in range(3):
+        for j in range(2):
+            for i in range(3):
+                levels = data.depth.values[:, j, i]
+                if levels[0] <= target <= levels[-1]:
+                    out[t, j, i] = np.interp(target, levels,
+                                             data.temp.values[t, :, j, i])
+    return out
+
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_interpolate(data, chunked):
+    temp = data.temp.chunk({'time': 1}) if chunked else data.temp
+    out = interpolate(temp, 'sigma', data.depth, (5., 15.))
+    assert isinstance(out.data, dask.array.Array)
+    assert out.dims == temp.dims and out.name == 'temp'
+    assert list(out.sigma.values) == [5., 15.]
+    for k, target in enumerate([5., 15.]):
+        np.testing.assert_allclose(out.isel(sigma=k), expected(data, target))
+
+
+def test_weights_per_geometry(data):
+    index, weight = interpolation_weights(data.depth, 'sigma', (5.,))
+    assert index.dims == ('sigma', 'y', 'x')
+    # shared by all variables on the same levels, decreasing or not
+    again, _ = interpolation_weights(data.depth.copy(), 'sigma', (5.,))
+    assert again.data is index.data
+    flipped, _ = interpolation_weights(-data.depth, 'sigma', (-5.,))
+    np.testing.assert_array_equal(flipped, index)
+    assert np.isnan(weight.values[0, 1, 1])  # column of NaNs
+
+
+def test_levels(data):
+    assert is_level_dim(data, 'sigma') and not is_level_dim(data, 'time')
+    assert vertical_coords(data, 'temp', 'sigma') == ['sigma', 'depth']
+    assert parse_levels('500, 850 1000') == (500., 850., 1000.)
+    assert parse_levels('500 hPa') == ()
@@ -0,0 +1,44 @@
+import threading
+import dask.array as da
+from xrviz.warmup import WarmUp
+
+
+def test_most_recent_first():
+    computed = []
+    warm_up = WarmUp(computed.append, ['a', 'b', 'c'])
+    warm_up.touch('c')
+    warm_up.touch('b')
+    warm_up.start()
+    warm_up.wait(5)
+    assert computed == ['b', 'c', 'a']
+    assert set(warm_up.results) == {'a', 'b', 'c'}
+
+
+def test_yields_while_busy():
+    busy = threading.Event()
+    busy.set()
+    warm_up = WarmUp(lambda name: name, ['a'], busy=busy.is_set, pause=0.01)
+    warm_up.start()
+    warm_up.wait(0.1)
+    assert warm_up.results == {}
+    busy.clear()
+    warm_up.wait(5)
+    assert warm_up.results == {'a': 'a'}
+
+
+def test_interrupted_computation_is_retried():
+    busy = threading.Event()
+    attempts = []
+
+    def compute(name):
+        attempts.append(name)
+        if len(attempts) == 1:  # interactive work starts meanwhile
+            busy.set()
+            threading.Timer(0.05, busy.clear).start()
+        return int(da.ones(10, chunks=2).sum().compute(scheduler='sync'))
+
+    warm_up = WarmUp(compute, ['a'], busy=busy.is_set, pause=0.01)
+    warm_up.start()
+    warm_up.wait(5)
+    assert attempts == ['a', 'a']
+    assert warm_up.results == {'a': 10}
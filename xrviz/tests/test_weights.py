@@ -0,0 +1,61 @@
+import dask.array
+import numpy as np
+import pytest
+import xarray as xr
+from xrviz.reductions import aggregate
+from xrviz.weights import (area_weights, grid_dims, weighted,
+                           with_cell_measure)
+
+
+@pytest.fixture
+def data():
+    rng = np.random.RandomState(0)
+    values = rng.normal(size=(3, 4, 5))
+    values[0, 1, 2] = np.nan
+    return xr.DataArray(values, dims=('time', 'lat', 'lon'), name='temp',
+                        coords={'time': [0, 1, 2],
+                                'lat': [-60., -20., 20., 60.],
+                                'lon': np.arange(5.) * 72})
+
+
+def expected(data, weights, dims):
+    w = weights.broadcast_like(data).where(data.notnull())
+    total = w.sum(dims)
+    mean = (w * data).sum(dims) / total
+    std = np.sqrt((w * (data - mean) ** 2).sum(dims) / total)
+    return mean, std
+
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_cosine_weights(data, chunked):
+    weights = area_weights(data)
+    np.testing.assert_allclose(weights, np.cos(np.deg2rad(data.lat)))
+    assert area_weights(data.isel(time=0)) is weights  # same grid
+    assert grid_dims(data) == ['lat', 'lon']
+    if chunked:
+        data = data.chunk({'time': 1})
+    mean, std = expected(data, weights, ['lat', 'lon'])
+    out = aggregate(data, {'lat': 'weighted mean', 'lon': 'weighted mean'})
+    assert isinstance(out.data, dask.array.Array) == chunked
+    assert out.dims == ('time',) and out.name == 'temp'
+    np.testing.assert_allclose(out, mean)
+    np.testing.assert_allclose(weighted(data, 'std', ['lat', 'lon']), std)
+
+
+def test_cell_measures(data):
+    areas = xr.DataArray(np.arange(1., 21.).reshape((4, 5)),
+                         dims=('lat', 'lon'))
+    dataset = xr.Dataset({'temp': data.assign_attrs(
+        cell_measures='area: cell_area'), 'cell_area': areas})
+    var = with_cell_measure(dataset, 'temp')
+    assert 'cell_area' in var.coords
+    np.testing.assert_allclose(area_weights(var), areas)
+    mean, _ = expected(data, areas, ['lat'])
+    out = aggregate(var.isel(lon=slice(1, 3)), {'lat': 'weighted mean'})
+    np.testing.assert_allclose(out, mean.isel(lon=slice(1, 3)))
+
+
+def test_no_weights():
+    data = xr.DataArray(np.arange(6.).reshape((2, 3)), dims=('y', 'x'))
+    assert area_weights(data) is None and grid_dims(data) == []
+    np.testing.assert_allclose(weighted(data, 'mean', ['x']), [1., 4.])
@@ -1,7 +1,12 @@
 import inspect
+import numpy as np
 import panel as pn
 from .compatibility import ccrs, has_cartopy
 
+#  Tolerance on the steps of evenly spaced coordinates, relative to their
+#  mean step, as for the sampling of ``holoviews.Image``.
+REGULAR_RTOL = 1e-3
+
 
 def convert_widget(source, target):
     """
@@ -86,6 +91,32 @@ def is_float(a):
     except:
         return False
 
+def is_regular(coord, rtol=REGULAR_RTOL):
+    """
+    Whether ``coord`` is a numeric 1-D coordinate, evenly spaced within
+    ``rtol`` of its mean step.
+    """
+    if coord.ndim != 1 or len(coord) < 2 or coord.dtype.kind not in 'iuf':
+        return False
+    steps = np.diff(np.asarray(coord, dtype='float64'))
+    step = steps.mean()
+    return bool(np.isfinite(step) and step != 0 and
+                np.all(np.abs(steps - step) <= rtol * abs(step)))
+
+
+def plot_type(data, x, y):
+    """
+    The hvplot method plotting ``data`` against its coordinates ``x`` and
+    ``y``: ``image`` if they are its dimensions, evenly spaced (see
+    ``is_regular``), and ``quadmesh`` otherwise. Images are faster to
+    build, rasterize and send to the browser.
+    """
+    if (x in data.dims and y in data.dims and
+            is_regular(data[x]) and is_regular(data[y])):
+        return 'image'
+    return 'quadmesh'
+
+
 if has_cartopy:
     def proj_params(proj):
         proj = getattr(ccrs, proj)
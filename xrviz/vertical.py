@@ -0,0 +1,152 @@
+import hashlib
+import dask.array
+import numpy as np
+import xarray as xr
+from .chunking import auto_chunks
+
+#  Aggregation option of vertical dimensions, to interpolate the variable to
+#  target levels of a vertical coordinate.
+INTERPOLATE = 'interpolate'
+
+#  Names of vertical dimensions, when their coordinate has no CF ``axis``,
+#  ``positive`` or ``standard_name`` telling so.
+LEVEL_DIMS = ['level', 'levels', 'lev', 'plev', 'sigma', 'bottom_top', 'z',
+              'depth', 'height', 'altitude', 'isobaricinhpa', 's_rho',
+              'layer', 'nz']
+
+#  Number of column geometries whose interpolation weights are kept.
+CACHED_GEOMETRIES = 8
+
+_cache = {}
+
+
+def is_level_dim(data, dim):
+    """Whether ``dim`` of ``data`` is a vertical dimension"""
+    if dim.lower() in LEVEL_DIMS:
+        return True
+    if dim not in data.coords:
+        return False
+    attrs = data[dim].attrs
+    standard_name = attrs.get('standard_name', '')
+    return (attrs.get('axis') == 'Z' or 'positive' in attrs or
+            'sigma' in standard_name or 'level' in standard_name or
+            standard_name in ['depth', 'height', 'altitude',
+                              'air_pressure'])
+
+
+def vertical_coords(data, var, dim):
+    """
+    Names of the variables of the dataset ``data`` which may serve as the
+    vertical coordinate of ``var`` along ``dim``: those along ``dim``, and
+    no dimension that ``var`` does not have, e.g. ``depth(sigma, y, x)``.
+    """
+    dims = set(data[var].dims)
+    return [name for name, other in data.variables.items()
+            if name != var and dim in other.dims and set(other.dims) <= dims]
+
+
+def parse_levels(text):
+    """Target levels written as ``500, 850``, as a tuple of floats"""
+    try:
+        return tuple(float(v) for v in text.replace(',', ' ').split())
+    except ValueError:
+        return ()
+
+
+def interpolation_weights(levels, dim, targets):
+    """
+    Where each of ``targets`` falls in each column of ``levels``, the values
+    of a vertical coordinate along ``dim``.
+
+    Each target lies between the levels at ``index`` and ``index + 1``, at
+    ``weight`` from the first to the second. Levels may increase or
+    decrease along ``dim``. Targets outside of a column, or of a column of
+    NaNs, get a NaN weight. The weights are computed once per geometry,
+    i.e. values of ``levels``, and kept for the last ``CACHED_GEOMETRIES``:
+    they are shared by all the variables and time steps on the same levels.
+
+    Returns
+    -------
+    (index, weight): DataArrays with the dimensions of ``levels``, ``dim``
+    holding the targets
+    """
+    levels = levels.reset_coords(drop=True)
+    values = np.moveaxis(np.asarray(levels, dtype='float64'),
+                         levels.get_axis_num(dim), 0)
+    key = (levels.name, levels.dims, values.shape, tuple(targets),
+           hashlib.sha1(np.ascontiguousarray(values).tobytes()).hexdigest())
+    if key not in _cache:
+        while len(_cache) >= CACHED_GEOMETRIES:
+            del _cache[next(iter(_cache))]
+        _cache[key] = _weights(values, np.asarray(targets, dtype='float64'))
+    index, weight = _cache[key]
+    dims = (dim,) + tuple(d for d in levels.dims if d != dim)
+    coords = {dim: list(targets)}
+    return (xr.DataArray(index, dims=dims, coords=coords),
+            xr.DataArray(weight, dims=dims, coords=coords))
+
+
+def _weights(levels, targets):
+    """Indices and weights of ``targets`` in the ``levels`` along axis 0"""
+    shape = (len(targets),) + levels.shape[1:]
+    index = np.zeros(shape, dtype='intp')
+    weight = np.full(shape, np.nan)
+    if len(levels) < 2:
+        return index, weight
+    lower, upper = levels[:-1], levels[1:]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for i, target in enumerate(targets):
+            # first layer spanning the target, in either direction
+            spans = (lower - target) * (upper - target) <= 0
+            found = spans.any(axis=0)
+            k = np.argmax(spans, axis=0)
+            below = np.take_along_axis(lower, k[None], 0)[0]
+            above = np.take_along_axis(upper, k[None], 0)[0]
+            thickness = above - below
+            w = np.where(thickness != 0, (target - below) / thickness, 0.)
+            index[i] = k
+            weight[i] = np.where(found, w, np.nan)
+    return index, weight
+
+
+def _interpolate(values, index, weight):
+    """Interpolate ``values`` along their last axis, see ``interpolate``"""
+    leading = (1,) * (values.ndim - index.ndim)  # dimensions of values only
+    index = index.reshape(leading + index.shape)
+    weight = weight.reshape(leading + weight.shape)
+    lower = np.take_along_axis(values, index, -1)
+    upper = np.take_along_axis(values, index + 1, -1)
+    return lower + weight * (upper - lower)
+
+
+def interpolate(data, dim, levels, targets):
+    """
+    Interpolate ``data`` linearly to ``targets`` of the vertical coordinate
+    ``levels``, e.g. to depths from sigma levels.
+
+    ``levels`` has the dimension ``dim`` of ``data``, and may vary along
+    some of its other dimensions, e.g. ``depth(sigma, y, x)``. The indices
+    and weights of the targets are computed once per geometry (see
+    ``interpolation_weights``), and applied lazily: data not in a dask
+    array gets chunks of one frame along its other dimensions (see
+    ``xrviz.chunking.auto_chunks``), and all of ``dim`` in each chunk.
+
+    Returns
+    -------
+    xarray.DataArray, with ``dim`` holding the targets
+    """
+    index, weight = interpolation_weights(levels, dim, targets)
+    target = f'{dim}_target'
+    index = index.rename({dim: target})
+    weight = weight.rename({dim: target})
+    if not isinstance(data.data, dask.array.Array):
+        data = data.chunk(auto_chunks(
+            data, animate=[d for d in data.dims[:-2] if d != dim]))
+    data = data.chunk({dim: -1})
+    dtype = np.result_type(data.dtype, 'float32')
+    out = xr.apply_ufunc(_interpolate, data, index, weight,
+                         input_core_dims=[[dim], [target], [target]],
+                         output_core_dims=[[target]],
+                         dask='parallelized', output_dtypes=[dtype])
+    out = out.rename({target: dim}).assign_coords({dim: list(targets)})
+    return out.transpose(*data.dims).rename(data.name)
@@ -0,0 +1,106 @@
+import threading
+from dask.callbacks import Callback
+from .sigslot import SigSlot
+from .compatibility import logger
+
+
+class _Interrupted(Exception):
+    """Raised within a warm-up computation when interactive work starts"""
+
+
+class _YieldCallback(Callback):
+    """Aborts the computations of the warm-up thread while ``busy``"""
+    def __init__(self, warm_up):
+        super().__init__()
+        self.warm_up = warm_up
+
+    def _pretask(self, key, dsk, state):
+        # callbacks are global: leave the computations of other threads be
+        if (threading.get_ident() == self.warm_up._thread.ident and
+                self.warm_up.busy()):
+            raise _Interrupted()
+
+
+class WarmUp(SigSlot):
+    """
+    Runs ``compute`` for each of ``names`` in a background thread, most
+    recently used names first.
+
+    Interactive work takes precedence: no computation starts while ``busy()``
+    returns True, and dask computations in progress are aborted as soon as
+    it does, to be run again later. Each result is kept in ``results``, and
+    the anonymous signal ``warmed`` is emitted with ``(name, result)``.
+
+    Parameters
+    ----------
+    compute: callable
+        Called with a name, returns its result.
+    names: list
+        In the order in which they are computed, unless used.
+    busy: callable
+        Whether interactive work is going on.
+    pause: float
+        Seconds between checks of ``busy``.
+    """
+
+    def __init__(self, compute, names, busy=lambda: False, pause=0.1):
+        super().__init__()
+        self.compute = compute
+        self.names = list(names)
+        self.busy = busy
+        self.pause = pause
+        self.recent = []
+        self.results = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._register(None, 'warmed')
+
+    def start(self):
+        """Start computing in the background"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                                            name='xrviz-warm-up')
+            self._thread.start()
+
+    def stop(self):
+        """Stop after the computation in progress"""
+        self._stop.set()
+
+    def wait(self, timeout=None):
+        """Wait until all names are computed, or the warm-up stopped"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def touch(self, name):
+        """Mark a name as used, to compute it before others"""
+        with self._lock:
+            if name in self.recent:
+                self.recent.remove(name)
+            self.recent.insert(0, name)
+
+    def _next(self):
+        with self._lock:
+            for name in self.recent + self.names:
+                if name in self.names and name not in self.results:
+                    return name
+
+    def _run(self):
+        while not self._stop.is_set():
+            name = self._next()
+            if name is None:
+                return
+            if self.busy():
+                self._stop.wait(self.pause)
+                continue
+            try:
+                with _YieldCallback(self):
+                    result = self.compute(name)
+            except _Interrupted:
+                continue
+            except Exception as e:
+                logger.debug(f"Warming up {name} failed: {e}")
+                result = None
+            self.results[name] = result
+            self._emit('warmed', (name, result))
@@ -0,0 +1,126 @@
+import hashlib
+import numpy as np
+
+#  Names of latitude and longitude coordinates, when they have no CF
+#  ``standard_name`` or ``units``.
+LATITUDES = ['lat', 'latitude', 'nav_lat', 'xlat', 'lat_rho']
+LONGITUDES = ['lon', 'longitude', 'nav_lon', 'xlong', 'lon_rho']
+
+#  Aggregations weighted by the areas of the cells of the grid, offered for
+#  the dimensions of latitude/longitude grids.
+WEIGHTED = ['weighted mean', 'weighted std']
+
+#  Number of grids whose weights are kept by ``area_weights``.
+CACHED_GRIDS = 8
+
+_cache = {}
+
+
+def _find(data, axis, names):
+    """The coordinate of ``data`` along the CF ``axis``, or None"""
+    units = {'latitude': ['degrees_north', 'degree_north', 'degrees_N',
+                          'degree_N'],
+             'longitude': ['degrees_east', 'degree_east', 'degrees_E',
+                           'degree_E']}[axis]
+    for name, coord in data.coords.items():
+        if (coord.attrs.get('standard_name') == axis or
+                coord.attrs.get('units') in units or
+                name.lower() in names):
+            return coord
+    return None
+
+
+def _measure_name(data):
+    """Name of the area variable in the ``cell_measures`` of ``data``"""
+    measures = data.attrs.get('cell_measures', '').split()
+    return dict(zip(measures[::2], measures[1::2])).get('area:')
+
+
+def with_cell_measure(data, var):
+    """
+    The variable ``var`` of the dataset ``data``, with the area variable
+    named in its ``cell_measures`` attribute as a coordinate, so that it
+    follows the variable through selections.
+    """
+    out = data[var]
+    name = _measure_name(out)
+    if (name is not None and name in data.variables and
+            name not in out.coords and
+            set(data[name].dims) <= set(out.dims)):
+        out = out.assign_coords({name: data[name]})
+    return out
+
+
+def cell_measure(data):
+    """The coordinate of ``data`` holding the areas of its cells, or None"""
+    name = _measure_name(data)
+    for key, coord in data.coords.items():
+        if key == name or coord.attrs.get('standard_name') == 'cell_area':
+            return coord
+    return None
+
+
+def grid_dims(data):
+    """Dimensions of the horizontal grid of ``data``, which may be weighted"""
+    coords = [cell_measure(data), _find(data, 'latitude', LATITUDES),
+              _find(data, 'longitude', LONGITUDES)]
+    dims = set()
+    for coord in coords:
+        if coord is not None:
+            dims.update(coord.dims)
+    return [dim for dim in data.dims if dim in dims]
+
+
+def area_weights(data):
+    """
+    Weights proportional to the areas of the cells of ``data``.
+
+    The areas are read from its cell measure (see ``cell_measure``), or
+    approximated by the cosine of its latitude coordinate. Weights are
+    computed once per grid, and kept for the ``CACHED_GRIDS`` grids used
+    last. Returns None if ``data`` has neither.
+    """
+    coord = cell_measure(data)
+    cosine = coord is None
+    if cosine:
+        coord = _find(data, 'latitude', LATITUDES)
+    if coord is None:
+        return None
+    values = np.asarray(coord)
+    key = (coord.name, coord.dims, values.shape, cosine,
+           hashlib.sha1(np.ascontiguousarray(values).tobytes()).hexdigest())
+    if key not in _cache:
+        while len(_cache) >= CACHED_GRIDS:
+            del _cache[next(iter(_cache))]
+        weights = np.cos(np.deg2rad(values)) if cosine else values
+        weights = coord.reset_coords(drop=True).copy(data=weights)
+        _cache[key] = weights.drop_vars(list(weights.coords))
+    return _cache[key]
+
+
+def weighted(data, statistic, dims):
+    """
+    Area-weighted ``mean`` or ``std`` of ``data`` along ``dims``, with the
+    weights of ``area_weights``.
+
+    NaNs are skipped. Both statistics are derived from the sums of ``w``,
+    ``w * x`` and ``w * x ** 2``, reduced in the same pass over dask data,
+    so that it stays lazy. Data without weights gets the unweighted
+    statistic.
+    """
+    weights = area_weights(data)
+    if weights is None:
+        return getattr(data, statistic)(dims)
+    valid = data.notnull()
+    w = weights.where(valid, 0.)
+    x = data.fillna(0.)
+    total = w.sum(dims)
+    total = total.where(total > 0)
+    mean = (w * x).sum(dims) / total
+    if statistic == 'mean':
+        out = mean
+    else:
+        variance = (w * x * x).sum(dims) / total - mean ** 2
+        out = np.sqrt(np.maximum(variance, 0.))
+    kept = [dim for dim in data.dims if dim not in dims]
+    return out.transpose(*kept).rename(data.name)